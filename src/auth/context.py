@@ -0,0 +1,79 @@
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+import jwt
+from fastapi import Request
+
+from auth.verifier import token_verifier
+
+# Użytkownik przypisywany żądaniom w trybie testowym E2E
+TEST_USER = {"id": "test-user-id", "login": "test-user"}
+
+
+@dataclass
+class AuthContext:
+    """Authentication state of one request, resolved once by auth_middleware
+
+    Attributes:
+        token_user: User from a verified session_token cookie
+        claims: Claims of the verified token
+        test_mode: Whether the E2E test mode was requested
+        error: Why there is no token user ("Not authenticated" or
+            "Could not validate credentials")
+    """
+    token_user: Optional[Dict[str, Any]] = None
+    claims: Optional[Dict[str, Any]] = None
+    test_mode: bool = False
+    error: Optional[str] = None
+
+    @property
+    def user(self) -> Optional[Dict[str, Any]]:
+        """Effective user: the token user, or the test user in test mode"""
+        if self.token_user is not None:
+            return self.token_user
+        return dict(TEST_USER) if self.test_mode else None
+
+    @property
+    def authenticated(self) -> bool:
+        return self.user is not None
+
+
+def is_test_mode(request: Request) -> bool:
+    """Whether the E2E test mode is requested by header or query parameter"""
+    return (request.headers.get("X-Test-Mode") == "true" or
+            request.query_params.get("test_mode") == "true")
+
+
+async def resolve_auth_context(request: Request) -> AuthContext:
+    """Verify the session cookie of a request and build its auth context"""
+    context = AuthContext(test_mode=is_test_mode(request))
+    token = request.cookies.get("session_token")
+    if not token:
+        context.error = "Not authenticated"
+        return context
+
+    try:
+        claims = await token_verifier.verify(token)
+    except jwt.InvalidTokenError:
+        context.error = "Could not validate credentials"
+        return context
+
+    context.claims = claims
+    context.token_user = {
+        "id": claims["sub"],
+        "login": (claims.get("user_metadata") or {}).get("login", "unknown"),
+    }
+    return context
+
+
+async def get_auth_context(request: Request) -> AuthContext:
+    """Auth context of the request, as populated by auth_middleware
+
+    Resolved here (and stored) only when the middleware didn't run,
+    e.g. when a route is called directly in tests.
+    """
+    context = getattr(request.state, "auth", None)
+    if context is None:
+        context = await resolve_auth_context(request)
+        request.state.auth = context
+    return context
@@ -1,5 +1,6 @@
 from fastapi import Request, HTTPException, status, Depends
 from fastapi.security import HTTPBearer
+from auth.context import get_auth_context
 
 security = HTTPBearer()
 
@@ -7,10 +8,11 @@ async def require_auth(request: Request):
     """
     Funkcja dependency do ochrony endpointów wymagających autentykacji
     """
-    if not request.state.authenticated:
+    context = await get_auth_context(request)
+    if not context.authenticated:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Nieautoryzowany dostęp",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    return request.state.user 
\ No newline at end of file
+    return context.user 
\ No newline at end of file
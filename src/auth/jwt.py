@@ -13,6 +13,7 @@ from passlib.context import CryptContext
 
 from db.database import get_db
 from schemas.user import User
+from auth.context import get_auth_context
 
 # Konfiguracja loggera
 logger = logging.getLogger(__name__)
@@ -179,49 +180,17 @@ async def get_current_user(token: str = Depends(oauth2_scheme)) -> dict:
 async def get_current_user_optional(request: Request) -> Optional[dict]:
     """Get the current user if authenticated, or None if not
     
-    This dependency can be used for routes where authentication is optional
+    This dependency can be used for routes where authentication is optional.
+    The session token is verified once per request by auth_middleware.
     
     Args:
         request: The FastAPI request object
         
     Returns:
-        User data from token or None if not authenticated
+        User data from token or None if not authenticated (also in test mode)
     """
-    # Print request data for debugging
-    print(f"JWT: Request URL: {request.url}")
-    
-    # Try to get token from cookies
-    token = request.cookies.get("session_token")
-    
-    if token:
-        print(f"JWT: Found token in cookies: {token[:10]}...")
-    else:
-        print("JWT: No token found in cookies")
-        return None
-    
-    try:
-        # Try to get the user - without verifying signature
-        # This is safe for user identification but should be handled with care
-        # In production, consider using Supabase client to verify tokens properly
-        payload = jwt.decode(token, options={"verify_signature": False})
-        
-        # Extract user ID from token
-        user_id = payload.get("sub")
-        if user_id is None:
-            print("JWT: No user_id in payload")
-            return None
-        
-        # Print user metadata if available
-        user_metadata = payload.get("user_metadata", {})
-        login = user_metadata.get("login", "unknown")
-        print(f"JWT: Successfully extracted user info: id={user_id}, login={login}")
-        
-        # Return user data
-        return {"id": user_id, "login": login}
-    except Exception as e:
-        # Return None if token is invalid or missing
-        print(f"JWT: Failed to decode token: {str(e)}")
-        return None
+    context = await get_auth_context(request)
+    return context.token_user
 
 async def get_current_user_db(
     credentials: HTTPAuthorizationCredentials = Depends(security),
@@ -288,41 +257,12 @@ async def get_current_user_from_cookie(request: Request) -> dict:
     Raises:
         HTTPException: 401 if token is invalid or missing
     """
-    # Get token from cookie
-    token = request.cookies.get("session_token")
-    if not token:
+    # Token zweryfikowany już przez auth_middleware - tylko odczyt kontekstu żądania
+    context = await get_auth_context(request)
+    if context.token_user is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Not authenticated",
+            detail=context.error,
             headers={"WWW-Authenticate": "Bearer"}
         )
-    
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"}
-    )
-    
-    try:
-        # Decode token without verifying signature
-        # This is safe for user identification in this context
-        payload = jwt.decode(token, options={"verify_signature": False})
-        
-        # Extract user ID from token
-        user_id = payload.get("sub")
-        if user_id is None:
-            raise credentials_exception
-        
-        # Extract user metadata
-        user_metadata = payload.get("user_metadata", {})
-        login = user_metadata.get("login")
-        
-        # Log successful token extraction
-        logger.info(f"Successfully extracted user info from token: id={user_id}, login={login}")
-        
-        # Return user data
-        return {"id": user_id, "login": login}
-        
-    except Exception as e:
-        logger.error(f"Error decoding token: {str(e)}")
-        raise credentials_exception 
\ No newline at end of file
+    return context.token_user
@@ -1,52 +1,26 @@
 from fastapi import Request
-from auth.service import AuthService
-import logging
+from auth.context import get_auth_context
+from services.structured_log import get_structured_logger
 
-# Set up logger
-logger = logging.getLogger(__name__)
+# Zdarzenia z każdego żądania są próbkowane (LOG_SAMPLE_RATE)
+log = get_structured_logger(__name__)
 
 async def auth_middleware(request: Request, call_next):
-    # Check for test mode header or query parameter - allow bypassing auth for E2E tests
-    is_test_mode = (request.headers.get("X-Test-Mode") == "true" or 
-                   request.query_params.get("test_mode") == "true")
-    
-    if is_test_mode:
-        print(f"TEST MODE DETECTED - Authentication check bypassed for path: {request.url.path}")
-        request.state.authenticated = True
-        request.state.user = {"id": "test-user-id", "login": "test-user"}
-        response = await call_next(request)
-        return response
-    
-    # Pobieranie tokenu sesji z ciasteczka
-    session_token = request.cookies.get("session_token")
+    # Token sesji weryfikowany raz na żądanie; zależności czytają request.state.auth
+    context = await get_auth_context(request)
     
-    # Print all cookies for debugging
-    print(f"Request path: {request.url.path}")
-    print(f"All cookies: {request.cookies}")
-    
-    # Domyślnie użytkownik jest niezalogowany
-    request.state.authenticated = False
-    request.state.user = None
+    # Check for test mode header or query parameter - allow bypassing auth for E2E tests
+    if context.test_mode:
+        log.debug("auth.test_mode", sampled=True, path=request.url.path)
+    elif context.token_user is not None:
+        log.debug("auth.authenticated", sampled=True, path=request.url.path, user_id=context.token_user["id"])
+    elif context.error != "Not authenticated":
+        # Token jest nieprawidłowy lub wygasł - użytkownik pozostaje niezalogowany
+        log.warning("auth.session_invalid", sampled=True, path=request.url.path, reason=context.error)
     
-    # Jeśli token istnieje, sprawdzamy jego ważność
-    if session_token:
-        print(f"Found session token: {session_token[:10]}... (truncated)")
-        auth_service = AuthService()
-        try:
-            user = await auth_service.validate_session(session_token)
-            if user:
-                request.state.authenticated = True
-                request.state.user = user
-                print(f"User authenticated: {user}")
-            else:
-                print("Session token validation failed - no user returned")
-        except Exception as e:
-            # Token jest nieprawidłowy lub wygasł - ignorujemy błąd
-            print(f"Session validation error: {str(e)}")
-            pass
-    else:
-        print("No session token in cookies")
+    request.state.authenticated = context.authenticated
+    request.state.user = context.user
     
     # Kontynuujemy obsługę żądania
     response = await call_next(request)
-    return response 
\ No newline at end of file
+    return response
@@ -1,20 +1,69 @@
 import os
-from supabase import create_client, Client
+import logging
+from typing import Optional
+from supabase import create_client, Client, ClientOptions
 from fastapi import HTTPException
 from auth.exceptions import AuthenticationError, RegistrationError, ResetPasswordError
+from auth.verifier import token_verifier
+from services.structured_log import get_structured_logger
+
+# Konfiguracja loggera
+logger = logging.getLogger(__name__)
+log = get_structured_logger(__name__)
+
+
+def create_supabase_client() -> Client:
+    """Create a stateless Supabase client from SUPABASE_URL and SUPABASE_KEY
+    
+    The client neither persists nor refreshes sessions; operations on
+    behalf of a user get the user's JWT explicitly.
+    
+    Raises:
+        ValueError: If the configuration is missing
+    """
+    supabase_url = os.environ.get("SUPABASE_URL")
+    supabase_key = os.environ.get("SUPABASE_KEY")
+    if not supabase_url or not supabase_key:
+        raise ValueError("Brak konfiguracji SUPABASE_URL lub SUPABASE_KEY w zmiennych środowiskowych")
+    return create_client(supabase_url, supabase_key,
+                         options=ClientOptions(persist_session=False, auto_refresh_token=False))
+
 
 class AuthService:
-    def __init__(self):
-        supabase_url = os.environ.get("SUPABASE_URL")
-        supabase_key = os.environ.get("SUPABASE_KEY")
-        if not supabase_url or not supabase_key:
-            raise ValueError("Brak konfiguracji SUPABASE_URL lub SUPABASE_KEY w zmiennych środowiskowych")
-        self.supabase: Client = create_client(supabase_url, supabase_key)
+    """Supabase Auth operations
+    
+    The shared client (see get_auth_service) is used only for calls that
+    don't depend on a client-side session. sign_up, sign_in_with_password
+    and update_user store or read a session inside the client, so they run
+    on a short-lived client of their own - otherwise one user's session
+    would be visible to the next request.
+    """
+    
+    def __init__(self, client: Optional[Client] = None, client_factory=create_supabase_client):
+        """Initialize the service
+        
+        Args:
+            client: Shared Supabase client; a new one is created without it.
+                The application shares one instance, see get_auth_service.
+            client_factory: Creates the per-call clients for session operations
+        """
+        self.supabase: Client = client or client_factory()
+        self.client_factory = client_factory
+    
+    def _session_client(self) -> Client:
+        """New client for one operation that keeps a session in the client"""
+        return self.client_factory()
+    
+    def close(self):
+        """Close the HTTP connections held by the Supabase auth client"""
+        close = getattr(self.supabase.auth, "close", None)
+        if close is not None:
+            close()
     
     async def register(self, login: str, password: str):
         try:
-            # Rejestracja użytkownika poprzez Supabase Auth
-            response = self.supabase.auth.sign_up({
+            # Rejestracja użytkownika poprzez Supabase Auth (sesja zostaje w kliencie tego wywołania)
+            response = self._session_client().auth.sign_up({
                 "email": f"{login}@example.com",  # Tymczasowe rozwiązanie
                 "password": password,
                 "options": {
@@ -38,8 +87,8 @@ class AuthService:
         
     async def login(self, login: str, password: str):
         try:
-            # Logowanie użytkownika poprzez Supabase Auth
-            response = self.supabase.auth.sign_in_with_password({
+            # Logowanie użytkownika poprzez Supabase Auth (sesja zostaje w kliencie tego wywołania)
+            response = self._session_client().auth.sign_in_with_password({
                 "email": f"{login}@example.com",
                 "password": password
             })
@@ -70,10 +119,18 @@ class AuthService:
             else:
                 raise AuthenticationError(f"Błąd logowania: {str(e)}")
         
-    async def logout(self):
+    async def logout(self, access_token: Optional[str]):
+        """Revoke the session of the caller
+        
+        Args:
+            access_token: JWT from the caller's session cookie; without it
+                there is nothing to revoke
+        """
+        if not access_token:
+            return {"success": True}
         try:
-            # Wylogowanie użytkownika
-            self.supabase.auth.sign_out()
+            # Unieważnienie sesji wskazanej tokenem wywołującego - nie sesji zapamiętanej w kliencie
+            self.supabase.auth.admin.sign_out(access_token, "local")
             return {"success": True}
         except Exception as e:
             raise AuthenticationError(f"Błąd wylogowania: {str(e)}")
@@ -89,52 +146,75 @@ class AuthService:
         
     async def set_new_password(self, token: str, password: str):
         try:
-            # Ustawienie nowego hasła
-            self.supabase.auth.update_user({
+            # Ustawienie nowego hasła użytkownikowi, którego dotyczy token resetu;
+            # update_user działa na sesji klienta, więc dostaje własnego klienta z tą sesją
+            client = self._session_client()
+            client.auth.set_session(token, "")
+            client.auth.update_user({
                 "password": password
-            }, token)
+            })
             return {"success": True}
         except Exception as e:
             raise ResetPasswordError(f"Błąd ustawiania nowego hasła: {str(e)}")
         
     async def validate_session(self, session_token: str):
         try:
-            # Use Supabase's method to validate the token directly
-            # session_token is the JWT token from the cookie
-            print(f"Trying to validate session token with Supabase...")
+            from jwt.exceptions import InvalidTokenError
             
+            # Podpis sprawdzany lokalnie - bez zapytania do Supabase
             try:
-                # For Supabase tokens from cookies, we need to build a session
-                # Since we don't have the refresh token, we'll extract info from the token directly
-                import jwt
-                from jwt.exceptions import InvalidTokenError
+                decoded = await token_verifier.verify(session_token)
+                user_id = decoded.get("sub")
                 
-                # Just decode the token to get the user ID without verifying
-                # This is safe because we're only using it to identify the user, not for authentication
-                try:
-                    decoded = jwt.decode(session_token, options={"verify_signature": False})
-                    user_id = decoded.get("sub")
-                    
-                    if user_id:
-                        # Return basic user info
-                        # Since we can't verify the token properly, we'll trust the cookie
-                        # In production, you should use a more secure approach
-                        print(f"Found user ID in token: {user_id}")
-                        user_data = {
-                            "id": user_id,
-                            "login": decoded.get("user_metadata", {}).get("login", "unknown")
-                        }
-                        print(f"User data: {user_data}")
-                        return user_data
-                except InvalidTokenError as e:
-                    print(f"Token decode error: {str(e)}")
-                    return None
-                    
-            except Exception as e:
-                print(f"Error during token processing: {str(e)}")
+                if user_id:
+                    # Return basic user info
+                    user_data = {
+                        "id": user_id,
+                        "login": decoded.get("user_metadata", {}).get("login", "unknown")
+                    }
+                    log.debug("auth.session_valid", sampled=True, user_id=user_id)
+                    return user_data
+            except InvalidTokenError as e:
+                log.warning("auth.session_invalid", sampled=True, reason=str(e))
                 return None
                 
             return None
         except Exception as e:
-            print(f"Session validation error: {str(e)}")
-            return None 
\ No newline at end of file
+            log.warning("auth.session_error", error=str(e))
+            return None
+
+
+# Współdzielona instancja - jeden klient Supabase z pulą połączeń keep-alive
+_auth_service: Optional[AuthService] = None
+
+
+def init_auth_service() -> AuthService:
+    """Create the shared AuthService (called in the application lifespan)"""
+    global _auth_service
+    if _auth_service is None:
+        _auth_service = AuthService()
+        logger.info("Supabase client created")
+    return _auth_service
+
+
+def get_auth_service() -> AuthService:
+    """FastAPI dependency returning the shared AuthService
+    
+    The service is created on first use when the lifespan didn't run
+    (tests, scripts).
+    
+    Raises:
+        ValueError: If the Supabase configuration is missing
+    """
+    return _auth_service or init_auth_service()
+
+
+def close_auth_service():
+    """Release the shared AuthService and its connections"""
+    global _auth_service
+    service, _auth_service = _auth_service, None
+    if service is not None:
+        try:
+            service.close()
+        except Exception as e:
+            logger.warning(f"Error closing Supabase client: {str(e)}")
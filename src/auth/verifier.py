@@ -0,0 +1,193 @@
+import asyncio
+import logging
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+import httpx
+import jwt
+from dotenv import load_dotenv
+
+# Konfiguracja loggera
+logger = logging.getLogger(__name__)
+
+# Load environment variables
+load_dotenv()
+
+SUPABASE_URL = os.getenv("SUPABASE_URL", "http://127.0.0.1:54321")
+# Sekret projektu Supabase (tokeny HS256); bez niego klucze publiczne pobierane są z JWKS
+SUPABASE_JWT_SECRET = os.getenv("SUPABASE_JWT_SECRET")
+SUPABASE_JWKS_URL = os.getenv("SUPABASE_JWKS_URL", f"{SUPABASE_URL.rstrip('/')}/auth/v1/.well-known/jwks.json")
+# Pusta wartość wyłącza sprawdzanie audience
+SUPABASE_JWT_AUDIENCE = os.getenv("SUPABASE_JWT_AUDIENCE", "authenticated")
+JWKS_REFRESH_SECONDS = float(os.getenv("JWKS_REFRESH_SECONDS", "600"))
+# Najkrótszy odstęp między pobraniami JWKS wymuszonymi nieznanym kid
+JWKS_MIN_REFRESH_INTERVAL_SECONDS = float(os.getenv("JWKS_MIN_REFRESH_INTERVAL_SECONDS", "30"))
+VERIFIED_TOKEN_CACHE_ENTRIES = int(os.getenv("VERIFIED_TOKEN_CACHE_ENTRIES", "4096"))
+
+ASYMMETRIC_ALGORITHMS = ["RS256", "ES256", "EdDSA"]
+
+
+class TokenVerifier:
+    """Verifies Supabase access tokens locally, without a call to Supabase
+
+    HS256 tokens are checked with the project JWT secret; asymmetric tokens
+    with the public keys from the JWKS endpoint, fetched at startup and
+    refreshed in the background. Claims of verified tokens are kept in an
+    LRU until the token expires, so a repeated token costs a dict lookup.
+    """
+
+    def __init__(self, secret: Optional[str] = SUPABASE_JWT_SECRET, jwks_url: Optional[str] = SUPABASE_JWKS_URL,
+                 audience: Optional[str] = SUPABASE_JWT_AUDIENCE, refresh_seconds: float = JWKS_REFRESH_SECONDS,
+                 max_entries: int = VERIFIED_TOKEN_CACHE_ENTRIES):
+        """Initialize the verifier
+
+        Args:
+            secret: Supabase JWT secret for HS256 tokens
+            jwks_url: URL of the JSON Web Key Set for asymmetric tokens
+            audience: Required "aud" claim, None or empty to skip the check
+            refresh_seconds: Interval of the background JWKS refresh
+            max_entries: Capacity of the verified token LRU
+        """
+        self.secret = secret
+        self.jwks_url = jwks_url
+        self.audience = audience or None
+        self.refresh_seconds = refresh_seconds
+        self.max_entries = max_entries
+        self._keys: Dict[str, Any] = {}
+        self._keys_fetched_at = 0.0
+        self._refresh_lock = asyncio.Lock()
+        self._refresh_task: Optional[asyncio.Task] = None
+        # token -> (claims, exp)
+        self._verified: "OrderedDict[str, Tuple[Dict[str, Any], float]]" = OrderedDict()
+
+        # Metryki
+        self.hits = 0
+        self.misses = 0
+        self.failures = 0
+        self.key_refreshes = 0
+
+    async def start(self):
+        """Fetch the key set and start the periodic refresh (no-op with a secret only)"""
+        if self._refresh_task is not None or not self.jwks_url:
+            return
+        try:
+            await self.refresh_keys()
+        except Exception as e:
+            # Bez kluczy tokeny asymetryczne będą odrzucane do następnej próby
+            logger.warning(f"Could not fetch JWKS from {self.jwks_url}: {str(e)}")
+        self._refresh_task = asyncio.create_task(self._refresh_loop())
+
+    async def stop(self):
+        """Stop the periodic refresh"""
+        if self._refresh_task is None:
+            return
+        self._refresh_task.cancel()
+        try:
+            await self._refresh_task
+        except asyncio.CancelledError:
+            pass
+        self._refresh_task = None
+
+    async def _refresh_loop(self):
+        while True:
+            await asyncio.sleep(self.refresh_seconds)
+            try:
+                await self.refresh_keys()
+            except Exception as e:
+                logger.warning(f"JWKS refresh failed, keeping {len(self._keys)} cached key(s): {str(e)}")
+
+    async def refresh_keys(self):
+        """Download the JWKS and replace the cached keys"""
+        async with self._refresh_lock:
+            async with httpx.AsyncClient(timeout=5.0) as client:
+                response = await client.get(self.jwks_url)
+                response.raise_for_status()
+            self.load_keys(response.json())
+            self.key_refreshes += 1
+            logger.info(f"Loaded {len(self._keys)} JWT signing key(s)")
+
+    def load_keys(self, jwks: Dict[str, Any]):
+        """Replace the cached keys with the keys of a JWKS document"""
+        key_set = jwt.PyJWKSet.from_dict(jwks)
+        self._keys = {key.key_id: key for key in key_set.keys}
+        self._keys_fetched_at = time.time()
+
+    async def _signing_key(self, header: Dict[str, Any]) -> Tuple[Any, list]:
+        """Key and allowed algorithms for a token header"""
+        algorithm = header.get("alg")
+        if algorithm == "HS256":
+            if not self.secret:
+                raise jwt.InvalidTokenError("HS256 token but SUPABASE_JWT_SECRET is not configured")
+            return self.secret, ["HS256"]
+        if algorithm not in ASYMMETRIC_ALGORITHMS:
+            raise jwt.InvalidTokenError(f"Unsupported token algorithm: {algorithm}")
+
+        key_id = header.get("kid")
+        key = self._keys.get(key_id)
+        # Nieznany kid - klucze mogły zostać zrotowane; ograniczamy liczbę pobrań
+        if (key is None and self.jwks_url and
+                time.time() - self._keys_fetched_at >= JWKS_MIN_REFRESH_INTERVAL_SECONDS):
+            try:
+                await self.refresh_keys()
+            except Exception as e:
+                logger.warning(f"Could not refresh JWKS for unknown key {key_id}: {str(e)}")
+            key = self._keys.get(key_id)
+        if key is None:
+            raise jwt.InvalidTokenError(f"Unknown signing key: {key_id}")
+        return key.key, [algorithm]
+
+    async def verify(self, token: str) -> Dict[str, Any]:
+        """Verify a token and return its claims
+
+        Args:
+            token: Encoded JWT (session_token cookie)
+
+        Returns:
+            Token claims
+
+        Raises:
+            jwt.InvalidTokenError: If the signature, expiry or audience is invalid
+        """
+        now = time.time()
+        entry = self._verified.get(token)
+        if entry is not None:
+            claims, expires_at = entry
+            if expires_at > now:
+                self.hits += 1
+                self._verified.move_to_end(token)
+                return claims
+            del self._verified[token]
+
+        self.misses += 1
+        try:
+            key, algorithms = await self._signing_key(jwt.get_unverified_header(token))
+            claims = jwt.decode(
+                token, key, algorithms=algorithms, audience=self.audience,
+                options={"require": ["exp", "sub"], "verify_aud": self.audience is not None},
+            )
+        except jwt.InvalidTokenError:
+            self.failures += 1
+            raise
+
+        self._verified[token] = (claims, float(claims["exp"]))
+        while len(self._verified) > self.max_entries:
+            self._verified.popitem(last=False)
+        return claims
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "cached_tokens": len(self._verified),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "failures": self.failures,
+            "signing_keys": len(self._keys),
+            "key_refreshes": self.key_refreshes,
+        }
+
+
+# Współdzielony weryfikator tokenów uruchamiany w lifespan aplikacji
+token_verifier = TokenVerifier()
@@ -0,0 +1,116 @@
+"""Benchmark: request throughput with per-request print() vs. sampled structured logging
+
+Before, auth_middleware printed the authenticated user for every request
+with a session cookie. Now it emits a sampled debug event, written (when
+enabled) by the queue listener thread. The app is driven in-process over
+ASGI with concurrent clients; stdout goes to a line-buffered file, like a
+container log pipe.
+
+Usage (from the src directory):
+    python -m benchmarks.bench_auth_logging --requests 5000 --concurrency 50
+"""
+import argparse
+import asyncio
+import contextlib
+import logging
+import os
+import statistics
+import tempfile
+import time
+
+import httpx
+import jwt
+from fastapi import FastAPI, Request
+from fastapi.responses import PlainTextResponse
+
+BENCHMARK_SECRET = "benchmark-secret-benchmark-secret"
+
+os.environ.setdefault("SUPABASE_JWT_SECRET", BENCHMARK_SECRET)
+
+from auth import middleware
+from auth.context import get_auth_context
+
+
+async def print_middleware(request: Request, call_next):
+    """Previous behaviour: one print() per request"""
+    context = await get_auth_context(request)
+    if context.test_mode:
+        print(f"TEST MODE DETECTED - Authentication check bypassed for path: {request.url.path}")
+    elif context.token_user is not None:
+        print(f"User authenticated: {context.token_user}")
+    elif context.error != "Not authenticated":
+        print(f"Session validation failed for path: {request.url.path}")
+    request.state.authenticated = context.authenticated
+    request.state.user = context.user
+    return await call_next(request)
+
+
+def make_app(auth_middleware) -> FastAPI:
+    app = FastAPI()
+    app.middleware("http")(auth_middleware)
+
+    @app.get("/ping")
+    async def ping(request: Request):
+        return PlainTextResponse("ok")
+
+    return app
+
+
+async def measure(app: FastAPI, token: str, requests: int, concurrency: int):
+    transport = httpx.ASGITransport(app=app)
+    timings = []
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench",
+                                 cookies={"session_token": token}) as client:
+        async def worker(count: int):
+            for _ in range(count):
+                start = time.perf_counter()
+                await client.get("/ping")
+                timings.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(requests // concurrency) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+    return len(timings) / elapsed, timings
+
+
+def report(name: str, throughput: float, timings: list):
+    timings = sorted(timings)
+    p99 = timings[int(len(timings) * 0.99) - 1]
+    print(f"  {name:<22} {throughput:8.0f} req/s   median {statistics.median(timings) * 1e3:6.2f} ms"
+          f"   p99 {p99 * 1e3:6.2f} ms")
+
+
+async def run(requests: int, concurrency: int):
+    token = jwt.encode({"sub": "00000000-0000-0000-0000-000000000000", "aud": "authenticated",
+                        "exp": int(time.time()) + 3600, "user_metadata": {"login": "bench"}},
+                       BENCHMARK_SECRET, algorithm="HS256")
+
+    results = {}
+    with tempfile.TemporaryFile("w", buffering=1) as sink:
+        with contextlib.redirect_stdout(sink):
+            for name, handler in (("print per request", print_middleware),
+                                  ("structured (sampled)", middleware.auth_middleware)):
+                app = make_app(handler)
+                # Rozgrzewka - weryfikacja tokenu trafia do cache
+                await measure(app, token, concurrency, concurrency)
+                results[name] = await measure(app, token, requests, concurrency)
+
+    print(f"{requests} requests, {concurrency} concurrent clients")
+    for name, (throughput, timings) in results.items():
+        report(name, throughput, timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    # Logi klienta benchmarku nie są częścią mierzonej ścieżki
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    asyncio.run(run(args.requests, args.concurrency))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""Benchmark: auth_middleware overhead with a per-request vs. a shared Supabase client
+
+Before, auth_middleware created AuthService() - and a new Supabase client
+with its own HTTP session - for every request with a session cookie. Now
+the middleware only verifies the cookie locally and the routers share the
+instance from get_auth_service. No Supabase server is contacted.
+
+Usage (from the src directory):
+    python -m benchmarks.bench_auth_middleware --requests 2000
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import logging
+import os
+import statistics
+import time
+
+import jwt
+from starlette.requests import Request
+from starlette.responses import Response
+
+BENCHMARK_SECRET = "benchmark-secret-benchmark-secret"
+
+# Klient nie łączy się z serwerem - wystarczą przykładowe wartości
+os.environ.setdefault("SUPABASE_URL", "http://127.0.0.1:54321")
+os.environ.setdefault("SUPABASE_KEY", jwt.encode({"role": "anon"}, BENCHMARK_SECRET, algorithm="HS256"))
+os.environ.setdefault("SUPABASE_JWT_SECRET", BENCHMARK_SECRET)
+
+from auth import middleware
+from auth.service import AuthService
+
+
+def make_request(token: str) -> Request:
+    return Request({
+        "type": "http",
+        "method": "GET",
+        "path": "/static/css/style.css",
+        "headers": [(b"cookie", f"session_token={token}".encode())],
+        "query_string": b"",
+    })
+
+
+async def call_next(request: Request) -> Response:
+    return Response("ok")
+
+
+async def per_request_client(request: Request, call_next):
+    """Previous behaviour: a new AuthService (and Supabase client) for every request"""
+    AuthService()
+    return await middleware.auth_middleware(request, call_next)
+
+
+async def measure(handler, token: str, requests: int) -> list:
+    timings = []
+    # Middleware wypisuje diagnostykę dla każdego żądania
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(requests):
+            start = time.perf_counter()
+            await handler(make_request(token), call_next)
+            timings.append(time.perf_counter() - start)
+    return timings
+
+
+def report(name: str, timings: list):
+    timings = sorted(timings)
+    p95 = timings[int(len(timings) * 0.95) - 1]
+    print(f"  {name:<28} median {statistics.median(timings) * 1e6:9.1f} us   p95 {p95 * 1e6:9.1f} us")
+
+
+async def run(requests: int):
+    token = jwt.encode({"sub": "00000000-0000-0000-0000-000000000000", "aud": "authenticated",
+                        "exp": int(time.time()) + 3600, "user_metadata": {"login": "bench"}},
+                       BENCHMARK_SECRET, algorithm="HS256")
+
+    per_request = await measure(per_request_client, token, requests)
+    shared = await measure(middleware.auth_middleware, token, requests)
+
+    print(f"{requests} requests with a session cookie")
+    report("new client per request", per_request)
+    report("shared client", shared)
+    saved = statistics.median(per_request) - statistics.median(shared)
+    print(f"  saved per request: {saved * 1e6:.1f} us (median)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    asyncio.run(run(args.requests))
+
+
+if __name__ == "__main__":
+    main()
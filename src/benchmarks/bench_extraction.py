@@ -0,0 +1,91 @@
+"""Benchmark: serial PyMuPDF loop vs. the extraction engine on a large PDF
+
+Usage (from the src directory):
+    python -m benchmarks.bench_extraction --pages 240 --repeat 3
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+
+import fitz  # PyMuPDF
+
+from services.extraction_engine import ExtractionEngine
+
+PARAGRAPH = (
+    "We evaluate the proposed method on several benchmark datasets and report "
+    "mean accuracy together with standard deviation over five random seeds. "
+)
+
+
+def make_pdf(path: str, pages: int):
+    """Create a synthetic PDF with a full page of text on every page"""
+    doc = fitz.open()
+    for i in range(pages):
+        page = doc.new_page()
+        text = f"Section {i + 1}\n" + (PARAGRAPH * 40)
+        page.insert_textbox(page.rect + (50, 50, -50, -50), text, fontsize=9)
+    doc.save(path)
+    doc.close()
+
+
+def serial_loop(path: str) -> str:
+    """The original extract_text loop, for reference"""
+    pdf_document = fitz.open(path)
+    text = ""
+    for page_num in range(len(pdf_document)):
+        page = pdf_document[page_num]
+        text += page.get_text()
+    pdf_document.close()
+    return text
+
+
+async def run_engine(engine: ExtractionEngine, path: str, repeat: int):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await engine.extract_text(path)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--pages", type=int, default=240)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "large.pdf")
+        make_pdf(path, args.pages)
+
+        serial = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            serial_loop(path)
+            serial.append(time.perf_counter() - start)
+
+        single = ExtractionEngine(max_workers=args.workers, parallel_threshold=0)
+        parallel = ExtractionEngine(max_workers=args.workers, parallel_threshold=1)
+        await single.start()
+        await parallel.start()
+        try:
+            single_pass = await run_engine(single, path, args.repeat)
+            page_parallel = await run_engine(parallel, path, args.repeat)
+        finally:
+            await single.shutdown()
+            await parallel.shutdown()
+
+    baseline = statistics.median(serial)
+    print(f"{args.pages} pages, {args.workers} workers, median of {args.repeat} runs")
+    for name, timings in [("serial loop", serial), ("engine single-pass", single_pass),
+                          ("engine page-parallel", page_parallel)]:
+        median = statistics.median(timings)
+        print(f"  {name:<22} {median * 1000:8.1f} ms   speedup x{baseline / median:.2f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,142 @@
+"""Benchmark: tail latency with synchronous request logging vs. the queue pipeline
+
+Before, log_requests wrote two text lines per request and the routers a
+TEST_EVENT line, each formatted and written on the event loop. Now
+log_requests emits one event, the root logger only enqueues records (JSON
+formatting and writing happen in the listener thread) and TEST_EVENT
+markers are disabled. The app is driven in-process over ASGI with many
+concurrent clients; records go to a file, optionally through a sink that
+blocks for --sink-delay-ms per record (a slow disk or a full log pipe).
+
+Usage (from the src directory):
+    python -m benchmarks.bench_logging_pipeline --requests 5000 --concurrency 100 --sink-delay-ms 0.2
+"""
+import argparse
+import asyncio
+import logging
+import statistics
+import tempfile
+import time
+
+import httpx
+from fastapi import FastAPI, Request
+from fastapi.responses import PlainTextResponse
+
+from services.e2e_events import E2EEvent, E2EEventEmitter
+from services.structured_log import get_structured_logger, start_queue_logging, stop_queue_logging
+
+logger = logging.getLogger("bench")
+log = get_structured_logger("bench")
+
+
+class SlowFileHandler(logging.StreamHandler):
+    """File handler that blocks for a fixed time per record"""
+
+    def __init__(self, stream, delay: float):
+        super().__init__(stream)
+        self.delay = delay
+
+    def emit(self, record):
+        super().emit(record)
+        if self.delay:
+            time.sleep(self.delay)
+
+
+def make_app(pipeline: bool, events: E2EEventEmitter) -> FastAPI:
+    app = FastAPI()
+
+    if pipeline:
+        @app.middleware("http")
+        async def log_requests(request: Request, call_next):
+            start_time = time.perf_counter()
+            response = await call_next(request)
+            log.info("http.request", method=request.method, path=request.url.path,
+                     status=response.status_code, duration_ms=round((time.perf_counter() - start_time) * 1000, 2))
+            return response
+    else:
+        @app.middleware("http")
+        async def log_requests(request: Request, call_next):
+            """Previous behaviour: two text lines per request"""
+            start_time = time.time()
+            logger.info(f"Request: {request.method} {request.url.path}")
+            response = await call_next(request)
+            process_time = (time.time() - start_time) * 1000
+            logger.info(f"Response: {response.status_code} (took {process_time:.2f}ms)")
+            return response
+
+    @app.get("/api/documents/{document_id}/summary")
+    async def get_summary(document_id: str):
+        if pipeline:
+            events.emit(E2EEvent.SUMMARY_RETRIEVED, document_id=document_id, summary_id="s1")
+        else:
+            logger.info(f"TEST_EVENT: summary_retrieved, document_id={document_id}, summary_id=s1")
+        return PlainTextResponse("ok")
+
+    return app
+
+
+async def measure(app: FastAPI, requests: int, concurrency: int):
+    transport = httpx.ASGITransport(app=app)
+    timings = []
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def worker(count: int):
+            for _ in range(count):
+                start = time.perf_counter()
+                await client.get("/api/documents/d1/summary")
+                timings.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(requests // concurrency) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+    return len(timings) / elapsed, timings
+
+
+def report(name: str, throughput: float, timings: list):
+    timings = sorted(timings)
+    percentile = lambda q: timings[int(len(timings) * q) - 1] * 1e3
+    print(f"  {name:<24} {throughput:7.0f} req/s   p50 {statistics.median(timings) * 1e3:7.2f} ms"
+          f"   p99 {percentile(0.99):7.2f} ms   p99.9 {percentile(0.999):7.2f} ms")
+
+
+async def run_variant(pipeline: bool, requests: int, concurrency: int, delay: float):
+    root = logging.getLogger()
+    with tempfile.TemporaryFile("w") as sink:
+        handler = SlowFileHandler(sink, delay)
+        handler.setFormatter(logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s"))
+        root.addHandler(handler)
+        if pipeline:
+            start_queue_logging(log_format="json")
+        try:
+            app = make_app(pipeline, E2EEventEmitter(enabled=not pipeline))
+            await measure(app, concurrency, concurrency)
+            return await measure(app, requests, concurrency)
+        finally:
+            stop_queue_logging()
+            root.removeHandler(handler)
+
+
+async def run(requests: int, concurrency: int, delay: float):
+    results = {
+        "synchronous text": await run_variant(False, requests, concurrency, delay),
+        "queue + JSON": await run_variant(True, requests, concurrency, delay),
+    }
+    print(f"{requests} requests, {concurrency} concurrent clients, sink delay {delay * 1e3:.2f} ms/record")
+    for name, (throughput, timings) in results.items():
+        report(name, throughput, timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--sink-delay-ms", type=float, default=0.0)
+    args = parser.parse_args()
+
+    logging.getLogger().setLevel(logging.INFO)
+    # Logi klienta benchmarku nie są częścią mierzonej ścieżki
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    asyncio.run(run(args.requests, args.concurrency, args.sink_delay_ms / 1000))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""Benchmark: PyTorch eager vs. ONNX Runtime (fp32 / int8) seq2seq summarization
+
+Measures per-batch latency and how far the ONNX models drift from the eager
+model: agreement of greedy next-token predictions (teacher-forced on the
+eager output), max logit difference, and unigram F1 between the summaries.
+
+Usage (from the src directory, needs requirements-onnx.txt):
+    python -m benchmarks.bench_onnx --model sshleifer/distilbart-cnn-6-6 --threads 4
+"""
+import argparse
+import statistics
+import tempfile
+import time
+from collections import Counter
+
+from benchmarks.bench_summarizers import synthetic_paper
+from services.backends.onnx_runtime import OnnxSeq2SeqBackend
+from services.backends.seq2seq import Seq2SeqBackend
+from services.chunking import chunk_text
+
+
+def unigram_f1(reference: str, candidate: str) -> float:
+    """ROUGE-1 style F1 between two summaries"""
+    ref, cand = Counter(reference.lower().split()), Counter(candidate.lower().split())
+    overlap = sum((ref & cand).values())
+    if not overlap:
+        return 0.0
+    precision, recall = overlap / sum(cand.values()), overlap / sum(ref.values())
+    return 2 * precision * recall / (precision + recall)
+
+
+def measure(backend, texts, max_words: int, repeat: int):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        summaries = backend.generate(texts, max_words)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings), summaries
+
+
+def logit_drift(reference, candidate, texts):
+    """Compare next-token logits of two backends teacher-forced on the reference output"""
+    import torch
+
+    tokenizer = reference.tokenizer
+    inputs = tokenizer(texts, return_tensors="pt", padding=True, truncation=True,
+                       max_length=reference.max_input_tokens)
+    decoder_ids = reference.model.generate(**inputs, max_new_tokens=64, num_beams=1)
+    with torch.no_grad():
+        ref_logits = reference.model(**inputs, decoder_input_ids=decoder_ids).logits
+        cand_logits = candidate.model(**inputs, decoder_input_ids=decoder_ids).logits
+    agreement = (ref_logits.argmax(-1) == cand_logits.argmax(-1)).float().mean().item()
+    max_diff = (ref_logits - cand_logits).abs().max().item()
+    return agreement, max_diff
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--model", required=True, help="Hugging Face seq2seq model id")
+    parser.add_argument("--batch", type=int, default=8, help="Chunks per generate call")
+    parser.add_argument("--threads", type=int, default=0, help="ONNX Runtime intra-op threads")
+    parser.add_argument("--max-words", type=int, default=80)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    eager = Seq2SeqBackend(args.model)
+    texts = chunk_text(synthetic_paper(20), eager.max_input_tokens // 2, eager.count_tokens)[:args.batch]
+    print(f"{args.model}: batch of {len(texts)} chunks, median of {args.repeat} runs")
+
+    eager_seconds, eager_summaries = measure(eager, texts, args.max_words, args.repeat)
+    print(f"  {'eager (torch)':<16} {eager_seconds * 1000:9.1f} ms")
+
+    with tempfile.TemporaryDirectory() as model_dir:
+        for quantize in (False, True):
+            backend = OnnxSeq2SeqBackend(args.model, model_dir=model_dir, quantize=quantize,
+                                         intra_op_threads=args.threads)
+            seconds, summaries = measure(backend, texts, args.max_words, args.repeat)
+            agreement, max_diff = logit_drift(eager, backend, texts)
+            f1 = statistics.mean(unigram_f1(a, b) for a, b in zip(eager_summaries, summaries))
+            label = "onnx int8" if quantize else "onnx fp32"
+            print(f"  {label:<16} {seconds * 1000:9.1f} ms   speedup {eager_seconds / seconds:4.2f}x   "
+                  f"top-1 agreement {agreement:.3f}   max |dlogit| {max_diff:.3f}   summary F1 {f1:.3f}")
+
+
+if __name__ == "__main__":
+    main()
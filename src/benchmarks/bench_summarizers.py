@@ -0,0 +1,78 @@
+"""Benchmark: summarizer backend throughput on a 100-page paper
+
+Usage (from the src directory):
+    python -m benchmarks.bench_summarizers --pages 100 --repeat 5
+    python -m benchmarks.bench_summarizers --pdf ../tests/test_data/NIPS-2017-attention-is-all-you-need-Paper.pdf
+"""
+import argparse
+import random
+import statistics
+import time
+
+from services.backends import MockSciBertModel
+from services.backends.textrank import TextRankBackend
+
+VOCABULARY = (
+    "model training data attention layer encoder decoder sequence translation accuracy baseline "
+    "experiment results table figure method approach network parameters dataset evaluation loss "
+    "gradient optimization performance task benchmark score transformer recurrent convolution "
+    "embedding vocabulary token sentence corpus language neural architecture hidden state output"
+).split()
+
+WORDS_PER_PAGE = 500
+
+
+def synthetic_paper(pages: int, seed: int = 0) -> str:
+    """Generate a paper-sized text of random sentences over a technical vocabulary"""
+    rng = random.Random(seed)
+    sentences = []
+    total_words = 0
+    while total_words < pages * WORDS_PER_PAGE:
+        length = rng.randint(8, 30)
+        words = [rng.choice(VOCABULARY) for _ in range(length)]
+        sentences.append(" ".join(words).capitalize() + ".")
+        total_words += length
+    return " ".join(sentences)
+
+
+def pdf_text(path: str, pages: int) -> str:
+    """Extract a real PDF and repeat it until it reaches the requested page count"""
+    import fitz  # PyMuPDF
+
+    with fitz.open(path) as doc:
+        page_texts = [page.get_text() for page in doc]
+    return " ".join(page_texts[i % len(page_texts)] for i in range(pages))
+
+
+def measure(backend, text: str, repeat: int, max_words: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        backend.generate([text], max_words)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--pages", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--max-words", type=int, default=200)
+    parser.add_argument("--pdf", help="Use text from this PDF instead of a synthetic paper")
+    args = parser.parse_args()
+
+    text = pdf_text(args.pdf, args.pages) if args.pdf else synthetic_paper(args.pages)
+    print(f"{args.pages} pages, {len(text.split())} words, median of {args.repeat} runs")
+
+    backends = [
+        ("mock (first N words)", MockSciBertModel()),
+        ("textrank", TextRankBackend(method="textrank")),
+        ("centroid", TextRankBackend(method="centroid")),
+    ]
+    for name, backend in backends:
+        seconds = measure(backend, text, args.repeat, args.max_words)
+        print(f"  {name:<22} {seconds * 1000:9.1f} ms   {1 / seconds:8.1f} docs/s")
+
+
+if __name__ == "__main__":
+    main()
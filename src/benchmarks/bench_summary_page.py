@@ -0,0 +1,112 @@
+"""Benchmark: summary read over a loopback HTTP call vs. in-process
+
+The summary page used to fetch the summary from its own API with a new
+httpx.AsyncClient on every view; it now calls read_summary directly. The
+template rendering is the same in both cases and is not measured.
+
+Usage (from the src directory, no database needed):
+    python -m benchmarks.bench_summary_page --requests 500
+"""
+import argparse
+import asyncio
+import logging
+import os
+import socket
+import statistics
+import tempfile
+import time
+import uuid
+
+# Podsumowania w plikach tymczasowych - benchmark nie wymaga bazy danych
+os.environ.setdefault("SUMMARY_STORE", "files")
+os.environ.setdefault("SUMMARIES_DIR", tempfile.mkdtemp(prefix="bench-summaries-"))
+
+import httpx
+import uvicorn
+from starlette.requests import Request
+
+from main import app
+from services.summary_service import read_summary, save_test_summary
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def test_mode_request() -> Request:
+    """Request as seen by the page handler for ?test_mode=true"""
+    return Request({
+        "type": "http",
+        "method": "GET",
+        "path": "/",
+        "headers": [],
+        "query_string": b"test_mode=true",
+    })
+
+
+async def measure(fn, requests: int) -> list:
+    timings = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        await fn()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def report(name: str, timings: list):
+    timings = sorted(timings)
+    p95 = timings[int(len(timings) * 0.95) - 1]
+    print(f"  {name:<24} median {statistics.median(timings) * 1000:7.3f} ms   p95 {p95 * 1000:7.3f} ms")
+
+
+async def run(requests: int):
+    port = free_port()
+    # Lifespan (baza, model) nie jest potrzebny do odczytu podsumowań
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, lifespan="off", log_level="warning"))
+    serve_task = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.01)
+
+    document_id = uuid.uuid4()
+    await save_test_summary(document_id)
+    base_url = f"http://127.0.0.1:{port}"
+
+    async def loopback():
+        # Tak jak dawniej view_summary_page: nowy klient na każde wyświetlenie strony
+        async with httpx.AsyncClient(base_url=base_url, headers={"X-Test-Mode": "true"}) as client:
+            response = await client.get(f"/api/documents/{document_id}/summaries")
+            response.raise_for_status()
+            return response.json()
+
+    async def in_process():
+        return await read_summary(document_id, test_mode_request())
+
+    try:
+        await measure(loopback, 20)
+        await measure(in_process, 20)
+        loopback_timings = await measure(loopback, requests)
+        in_process_timings = await measure(in_process, requests)
+    finally:
+        server.should_exit = True
+        await serve_task
+
+    print(f"{requests} summary reads per variant")
+    report("loopback HTTP (before)", loopback_timings)
+    report("in-process (after)", in_process_timings)
+    saved = statistics.median(loopback_timings) - statistics.median(in_process_timings)
+    print(f"  saved per page view: {saved * 1000:.3f} ms (median)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=500)
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    asyncio.run(run(args.requests))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,7 @@
 import os
 from typing import AsyncGenerator
 import logging
+from sqlalchemy import text
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker
 from fastapi import Depends
@@ -68,10 +69,12 @@ async def init_db():
     
     This should be called during application startup
     """
-    from schemas.base import Base
+    from schemas.base import Base, DB_SCHEMA
     try:
         logger.info("Initializing database tables...")
         async with engine.begin() as conn:
+            # Schemat istnieje po migracjach Supabase; tworzymy go dla czystej bazy
+            await conn.execute(text(f"create schema if not exists {DB_SCHEMA}"))
             # Nie używamy drop_all w środowisku produkcyjnym!
             # await conn.run_sync(Base.metadata.drop_all)
             await conn.run_sync(Base.metadata.create_all)
@@ -5,14 +5,33 @@ from contextlib import asynccontextmanager
 from typing import Union
 
 from fastapi import FastAPI, Request, Response
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from starlette.middleware.base import BaseHTTPMiddleware
 
-from db.database import init_db
-from routers import summary_router, page_router, auth_router
+from db.database import init_db, engine
+from services.extraction_engine import extraction_engine
+from services.model_registry import model_registry
+from services.batching import batch_scheduler
+from services.job_queue import job_queue
+from services.uploads import check_shared_upload_dir
+from services.speculative import speculative_pipeline
+from services.single_flight import document_flights, content_flights
+from services.result_cache import summary_result_cache
+from services.document_metadata import document_metadata
+from services.text_cache import text_cache
+from services.chunking import chunk_summary_cache
+from services.tracing import tracer
+from services.profiling import PROFILE_ID_HEADER, current_profile_id, profile_id_for, request_profiler
+from services.metrics import (CONTENT_TYPE, http_request_duration, http_requests_in_flight,
+                              render_gauges, render_metrics)
+from services.summary_service import run_summary_job
+from routers import summary_router, page_router, auth_router, job_router, profile_router
 from routers.api_auth_router import router as api_auth_router
 from auth.middleware import auth_middleware
+from auth.service import init_auth_service, close_auth_service
+from auth.verifier import token_verifier
+from services.structured_log import get_structured_logger, start_queue_logging, stop_queue_logging
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 import os
@@ -23,6 +42,9 @@ logging.basicConfig(
     format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
 )
 logger = logging.getLogger(__name__)
+log = get_structured_logger(__name__)
+# Wszystkie logi aplikacji zapisywane w wątku w tle, poza pętlą zdarzeń (JSON przy LOG_FORMAT=json)
+start_queue_logging()
 
 
 @asynccontextmanager
@@ -35,11 +57,43 @@ async def lifespan(app: FastAPI):
     logger.info("Initializing database...")
     await init_db()
     
+    # Jeden klient Supabase współdzielony przez middleware i routery
+    init_auth_service()
+    
+    # Klucze do lokalnej weryfikacji tokenów sesji (JWKS, odświeżane w tle)
+    await token_verifier.start()
+    
+    # Uruchomienie puli procesów do ekstrakcji tekstu z PDF
+    await extraction_engine.start()
+    
+    # Jednorazowe załadowanie i rozgrzanie modelu podsumowań
+    await model_registry.load()
+    
+    # Harmonogram grupujący żądania inferencji w paczki
+    model = await model_registry.get_model()
+    await batch_scheduler.start(model)
+    
+    # Wyniki poprzedniej wersji modelu nie są już aktualne
+    await summary_result_cache.invalidate(keep_version=model.version)
+    
+    # Pula workerów generujących podsumowania w tle; kolejka w Postgresie
+    # wymaga katalogu uploadów współdzielonego przez wszystkie węzły
+    check_shared_upload_dir()
+    await job_queue.start(run_summary_job)
+    
     # Zwróć kontrolę do aplikacji
     yield
     
     # Shutdown: operacje czyszczenia
     logger.info("Application shutting down...")
+    await job_queue.stop()
+    await speculative_pipeline.stop()
+    await batch_scheduler.stop()
+    await extraction_engine.shutdown()
+    await token_verifier.stop()
+    close_auth_service()
+    tracer.shutdown()
+    stop_queue_logging()
 
 
 # Inicjalizacja aplikacji FastAPI
@@ -70,25 +124,64 @@ app.add_middleware(
 @app.middleware("http")
 async def log_requests(request: Request, call_next):
     """Middleware to log request details and timing"""
-    start_time = time.time()
-    
-    # Log the request
-    logger.info(f"Request: {request.method} {request.url.path}")
+    start_time = time.perf_counter()
+    status_code = 500
+    http_requests_in_flight.inc(request.method)
+    try:
+        # Process the request
+        response = await call_next(request)
+        status_code = response.status_code
+    finally:
+        http_requests_in_flight.dec(request.method)
+        elapsed = time.perf_counter() - start_time
+        # Szablon ścieżki zamiast URL - liczba serii nie rośnie z liczbą dokumentów
+        route = getattr(request.scope.get("route"), "path", "unmatched")
+        http_request_duration.observe(elapsed, request.method, route, str(status_code))
     
-    # Process the request
-    response = await call_next(request)
-    
-    # Calculate and log the processing time
-    process_time = (time.time() - start_time) * 1000
-    logger.info(f"Response: {response.status_code} (took {process_time:.2f}ms)")
+    # Jedno zdarzenie na żądanie; formatowanie odbywa się w wątku listenera
+    log.info("http.request", method=request.method, path=request.url.path,
+             status=status_code, duration_ms=round(elapsed * 1000, 2))
     
     return response
 
 # Dodanie middleware autentykacji
 app.middleware("http")(auth_middleware)
 
+# Profilowanie wybranych żądań (nagłówek X-Profile-Token lub PROFILE_SAMPLE_RATE)
+@app.middleware("http")
+async def profile_requests(request: Request, call_next):
+    """Middleware selecting requests whose summary and export calls are profiled"""
+    profile_id = profile_id_for(request)
+    if profile_id is None:
+        return await call_next(request)
+    token = current_profile_id.set(profile_id)
+    try:
+        response = await call_next(request)
+    finally:
+        current_profile_id.reset(token)
+    # Pod tym identyfikatorem profil jest dostępny w /api/profiles
+    response.headers[PROFILE_ID_HEADER] = profile_id
+    return response
+
+# Span główny żądania; nagłówek traceparent łączy go z trace klienta
+@app.middleware("http")
+async def trace_requests(request: Request, call_next):
+    """Middleware running each request in a root span (when tracing is enabled)"""
+    if not tracer.enabled:
+        return await call_next(request)
+    with tracer.span("HTTP", traceparent=request.headers.get("traceparent"),
+                     **{"http.method": request.method}) as span:
+        response = await call_next(request)
+        route = getattr(request.scope.get("route"), "path", "unmatched")
+        span.name = f"{request.method} {route}"
+        span.set_attribute("http.route", route)
+        span.set_attribute("http.status_code", response.status_code)
+    return response
+
 # Dodawanie routerów
 app.include_router(summary_router)
+app.include_router(job_router)
+app.include_router(profile_router)
 app.include_router(auth_router)
 app.include_router(api_auth_router)
 app.include_router(page_router)
@@ -96,8 +189,67 @@ app.include_router(page_router)
 # Health check endpoint
 @app.get("/health", tags=["Health"])
 async def health_check():
-    """Health check endpoint to verify the API is running"""
-    return {"status": "ok", "message": "API is running"}
+    """Health check endpoint to verify the API is running and the model is ready"""
+    if not model_registry.ready:
+        return JSONResponse(
+            status_code=503,
+            content={"status": "starting", "message": "Summarization model is not ready",
+                     "model": model_registry.status()}
+        )
+    return {
+        "status": "ok",
+        "message": "API is running",
+        "model": model_registry.status(),
+        "batching": batch_scheduler.stats(),
+        "jobs": job_queue.stats(),
+        "speculative": speculative_pipeline.stats(),
+        "coalescing": {"documents": document_flights.stats(), "content": content_flights.stats()},
+        "result_cache": summary_result_cache.stats(),
+        "document_metadata": document_metadata.stats(),
+        "auth_tokens": token_verifier.stats(),
+        "profiling": request_profiler.stats(),
+    }
+
+
+
+def component_metrics() -> list:
+    """Cache hit ratios, pool sizes and queue depths read from the components' stats()"""
+    jobs = job_queue.stats()
+    batching = batch_scheduler.stats()
+    pool = engine.pool
+    return [
+        render_gauges("docsum_cache_hit_ratio", "Hit ratio of the application caches", "cache", [
+            ("extracted_text", text_cache.stats()["hit_ratio"]),
+            ("chunk_summary", chunk_summary_cache.stats()["hit_ratio"]),
+            ("summary_result", summary_result_cache.stats()["hit_ratio"]),
+            ("document_metadata", document_metadata.stats()["hit_ratio"]),
+            ("auth_tokens", token_verifier.stats()["hit_ratio"]),
+        ]),
+        render_gauges("docsum_pool_size", "Configured size of the worker and connection pools", "pool", [
+            ("extraction_workers", extraction_engine.max_workers),
+            ("job_workers", jobs["workers"]),
+            ("db_connections", pool.size() if hasattr(pool, "size") else 0),
+        ]),
+        render_gauges("docsum_pool_in_use", "Busy workers and checked out connections", "pool", [
+            ("job_workers", jobs["active_jobs"]),
+            ("db_connections", pool.checkedout() if hasattr(pool, "checkedout") else 0),
+        ]),
+        render_gauges("docsum_queue_depth", "Items waiting in the internal queues", "queue", [
+            ("summary_jobs", jobs.get("queue_depth", 0)),
+            ("inference", batching["queue_depth"]),
+        ]),
+        render_gauges("docsum_in_flight", "Coalesced and speculative work in flight", "kind", [
+            ("document_summaries", document_flights.stats()["in_flight"]),
+            ("summary_contents", content_flights.stats()["in_flight"]),
+            ("speculative_runs", speculative_pipeline.stats()["in_flight"]),
+        ]),
+    ]
+
+
+@app.get("/metrics", tags=["Health"], include_in_schema=False)
+async def metrics():
+    """Prometheus metrics: request and pipeline stage latency, caches and pools"""
+    return PlainTextResponse(render_metrics(component_metrics()), media_type=CONTENT_TYPE)
 
 
 if __name__ == "__main__":
@@ -1,7 +1,11 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, field_validator
 from uuid import UUID
 from datetime import datetime
-from typing import Optional
+from typing import List, Literal, Optional
+import json
+
+# Długość podsumowania w słowach dla predefiniowanych wariantów
+SUMMARY_LENGTH_WORDS = {"short": 100, "medium": 250, "long": 500}
 
 
 class SummaryBase(BaseModel):
@@ -26,4 +30,45 @@ class SummaryInDB(SummaryBase):
 class SummaryResponse(SummaryInDB):
     """API response model for summary operations"""
     class Config:
-        from_attributes = True  # Renamed from orm_mode in Pydantic v2 
\ No newline at end of file
+        from_attributes = True  # Renamed from orm_mode in Pydantic v2
+
+
+class SummaryOptions(BaseModel):
+    """Options chosen by the user for a summary (upload and summary forms)"""
+    summary_length: Literal["short", "medium", "long", "custom"] = "medium"
+    custom_length: Optional[int] = Field(None, ge=50, le=2000)
+    focus_areas: List[str] = Field(default_factory=list)
+    include_keypoints: bool = True
+    include_tables: bool = False
+    include_references: bool = False
+
+    @field_validator("focus_areas")
+    @classmethod
+    def normalize_focus_areas(cls, value: List[str]) -> List[str]:
+        # Kolejność i wielkość liter nie zmieniają podsumowania
+        return sorted({area.strip().lower() for area in value if area and area.strip()})
+
+    @classmethod
+    def from_form(cls, summaryLength: str = "medium", customLength: Optional[int] = None,
+                  focusAreas: Optional[List[str]] = None, includeKeypoints: bool = True,
+                  includeTables: bool = False, includeReferences: bool = False) -> "SummaryOptions":
+        """Build options from the camelCase form fields used by the frontend"""
+        return cls(
+            summary_length=summaryLength,
+            custom_length=customLength if summaryLength == "custom" else None,
+            focus_areas=focusAreas or [],
+            include_keypoints=includeKeypoints,
+            include_tables=includeTables,
+            include_references=includeReferences,
+        )
+
+    @property
+    def max_words(self) -> int:
+        """Maximum length of the summary in words"""
+        if self.summary_length == "custom":
+            return self.custom_length or SUMMARY_LENGTH_WORDS["medium"]
+        return SUMMARY_LENGTH_WORDS[self.summary_length]
+
+    def key(self) -> str:
+        """Stable string form of the options, used to compare and key results"""
+        return json.dumps(self.model_dump(), sort_keys=True, separators=(",", ":"))
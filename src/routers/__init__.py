@@ -2,5 +2,7 @@
 from .auth_router import router as auth_router
 from .summary_router import router as summary_router
 from .page_router import router as page_router
+from .job_router import router as job_router
+from .profile_router import router as profile_router
 
-__all__ = ['auth_router', 'summary_router', 'page_router'] 
\ No newline at end of file
+__all__ = ['auth_router', 'summary_router', 'page_router', 'job_router', 'profile_router'] 
\ No newline at end of file
@@ -5,7 +5,7 @@ import logging
 
 from db.database import get_db
 from schemas.auth import LoginSchema
-from auth.service import AuthService
+from auth.service import AuthService, get_auth_service
 from auth.exceptions import AuthenticationError
 
 # Configure logger
@@ -13,13 +13,13 @@ logger = logging.getLogger(__name__)
 
 # Create API router with prefix /api/auth
 router = APIRouter(prefix="/api/auth", tags=["api_auth"])
-auth_service = AuthService()
 
 @router.post("/login")
 async def login_api(
     request: Request,
     login: str = Form(...),
-    password: str = Form(...)
+    password: str = Form(...),
+    auth_service: AuthService = Depends(get_auth_service)
 ):
     """API endpoint for user login
     
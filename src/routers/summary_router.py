@@ -1,19 +1,30 @@
 from fastapi import APIRouter, Depends, HTTPException, status, File, UploadFile, Form, Request
 from fastapi.responses import StreamingResponse, JSONResponse
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Any, List, Optional
 from uuid import UUID
 import logging
 import os
 import shutil
 from pathlib import Path
-import json
 import io
+import time
 from datetime import datetime
 import uuid
 
-from models.summary import SummaryResponse
-from services.summary_service import SummaryService
+from models.summary import SummaryResponse, SummaryOptions
+from services.summary_service import SummaryService, summarize_document, read_summary, save_test_summary
+from services.speculative import speculative_pipeline
+from services.job_queue import job_queue, JobQueueFullError, SUMMARY_JOBS_ENABLED
+from services.uploads import UPLOAD_DIR
+from services.summary_store import summary_store
+from services.document_metadata import document_metadata
+from services.extraction_engine import ExtractionError
+from services.metrics import pipeline_stage, pipeline_stage_duration
+from services.profiling import current_profile_id, profiled
+from services.tracing import tracer, traced
+from services.e2e_events import e2e_events, E2EEvent
 from db.database import get_db
 from auth.jwt import get_current_user, get_current_user_from_cookie
 
@@ -21,12 +32,7 @@ from auth.jwt import get_current_user, get_current_user_from_cookie
 logger = logging.getLogger(__name__)
 
 # Create upload directory if it doesn't exist
-UPLOAD_DIR = Path("uploads")
-UPLOAD_DIR.mkdir(exist_ok=True)
-
-# Create summaries directory if it doesn't exist
-SUMMARIES_DIR = Path("summaries")
-SUMMARIES_DIR.mkdir(exist_ok=True)
+UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
 
 router = APIRouter(prefix="/api/documents", tags=["summaries"])
 
@@ -78,11 +84,12 @@ async def upload_document(
             )
         
         # Create a unique filename
-        document_id = UUID.uuid4()
+        document_id = uuid.uuid4()
         file_path = UPLOAD_DIR / f"{document_id}.pdf"
         
         # Save the file
-        with open(file_path, "wb") as buffer:
+        with tracer.span("upload", document_id=str(document_id)), pipeline_stage("file_save"), \
+                open(file_path, "wb") as buffer:
             shutil.copyfileobj(file.file, buffer)
         
         # Log options
@@ -90,8 +97,24 @@ async def upload_document(
                    f"focusAreas={focusAreas}, includeKeypoints={includeKeypoints}, "
                    f"includeTables={includeTables}, includeReferences={includeReferences}")
         
+        # Metadane PDF odczytywane raz - strona podsumowania i eksport nie otwierają już pliku
+        try:
+            await document_metadata.register(document_id, str(file_path), file.filename,
+                                             user_id=current_user.get("id"), session=db)
+        except ExtractionError as e:
+            logger.warning(f"Could not read metadata of uploaded document {document_id}: {e.message}")
+        
+        # Opcjonalnie: ekstrakcja/podsumowanie startuje od razu po zapisaniu pliku
+        try:
+            options = SummaryOptions.from_form(summaryLength, customLength, focusAreas,
+                                               includeKeypoints, includeTables, includeReferences)
+            speculative_pipeline.start(document_id, str(file_path), options)
+        except ValueError as e:
+            # Niepoprawne opcje zostaną zgłoszone przy żądaniu podsumowania
+            logger.warning(f"Skipping speculative run, invalid summary options: {str(e)}")
+        
         # Dodaj informacje diagnostyczne dla testów E2E
-        logger.info(f"TEST_EVENT: document_uploaded, document_id={document_id}, filename={file.filename}")
+        e2e_events.emit(E2EEvent.DOCUMENT_UPLOADED, document_id=document_id, filename=file.filename)
         
         # Return the document ID
         return {
@@ -118,20 +141,37 @@ async def upload_document(
     summary="Generate a summary for a document",
     description="Processes a PDF document and generates a summary using the SciBert AI model. "
                 "The summary will contain key elements from the document such as methodology, "
-                "results, and conclusions."
+                "results, and conclusions. By default the summary is generated in the background: "
+                "the response is 202 with a job whose status is available at GET /api/jobs/{job_id}.",
+    responses={status.HTTP_202_ACCEPTED: {"description": "Summary job queued"}}
 )
 async def generate_summary(
     document_id: UUID,
-    request: Request
+    request: Request,
+    summaryLength: Optional[str] = Form(None),
+    customLength: Optional[int] = Form(None),
+    focusAreas: Optional[List[str]] = Form(None),
+    includeKeypoints: bool = Form(True),
+    includeTables: bool = Form(False),
+    includeReferences: bool = Form(False),
+    db: AsyncSession = Depends(get_db)
 ) -> Any:
     """Generate a new summary for a document
     
     Args:
         document_id: UUID of the document to summarize
         request: FastAPI request object for cookie extraction
+        summaryLength: Length preference for summary (short, medium, long, custom);
+            when omitted, the options submitted with the upload are used
+        customLength: Custom word count if summaryLength is custom
+        focusAreas: Areas to focus on in the summary
+        includeKeypoints: Whether to include key points
+        includeTables: Whether to include tables and figures
+        includeReferences: Whether to include references
+        db: Database session
         
     Returns:
-        Newly created summary
+        Queued job (202) or, with SUMMARY_JOBS_ENABLED=false, the newly created summary
         
     Raises:
         HTTPException: Various error status codes depending on the specific error
@@ -144,46 +184,63 @@ async def generate_summary(
         # Authenticate user from cookie before proceeding for non-test mode
         current_user = await get_current_user_from_cookie(request)
     
+    options = None
+    if summaryLength is not None:
+        try:
+            options = SummaryOptions.from_form(summaryLength, customLength, focusAreas,
+                                               includeKeypoints, includeTables, includeReferences)
+        except ValueError as e:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail=f"Invalid summary options: {str(e)}"
+            )
+    
     try:
         # In test mode, create a dummy summary immediately without processing
         if is_test_mode:
             logger.info(f"TEST MODE: Creating dummy summary for document: {document_id}")
-            # Create directory if it doesn't exist
-            Path("summaries").mkdir(exist_ok=True)
-            
-            # Create a test summary file
-            summary_id = uuid.uuid4()
-            summary = {
-                "id": str(summary_id),
-                "document_id": str(document_id),
-                "content": "This is a test summary generated in test mode. It contains sample content that would normally be extracted from the document. The summary includes key findings, methodology, and conclusions from the paper.",
-                "type": "test",
-                "created_at": datetime.now().isoformat(),
-                "length": "medium"
-            }
-            
-            # Save to file
-            summary_file = Path("summaries") / f"{document_id}.json"
-            with open(summary_file, "w") as f:
-                json.dump(summary, f)
+            summary = await save_test_summary(document_id, db)
                 
-            logger.info(f"TEST_EVENT: test_summary_generated, document_id={document_id}, summary_id={summary.get('id', 'unknown')}")
+            e2e_events.emit(E2EEvent.TEST_SUMMARY_GENERATED, document_id=document_id, summary_id=summary.get('id', 'unknown'))
             return summary
             
-        # Regular summary generation - use service
-        summary_service = SummaryService(None)
+        if SUMMARY_JOBS_ENABLED and job_queue.running:
+            if not (UPLOAD_DIR / f"{document_id}.pdf").exists():
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail=f"Document file not found: {document_id}"
+                )
+            
+            # Podsumowanie generowane w tle - klient odpytuje o status zadania
+            job = await job_queue.submit(document_id, user_id=current_user.get("id"), options=options,
+                                         profile_id=current_profile_id.get())
+            status_url = f"/api/jobs/{job.id}"
+            e2e_events.emit(E2EEvent.SUMMARY_JOB_QUEUED, document_id=document_id, job_id=job.id)
+            return JSONResponse(
+                status_code=status.HTTP_202_ACCEPTED,
+                content={**job.to_dict(), "status_url": status_url},
+                headers={"Location": status_url}
+            )
         
-        # Generate summary without database connection
-        summary = await summary_service.create_summary(document_id)
+        # Regular summary generation with the shared, preloaded model
+        # (attaches to the speculative run started at upload time, if any)
+        summary = await summarize_document(document_id, options)
         
         # Dodaj informacje diagnostyczne dla testów E2E
-        logger.info(f"TEST_EVENT: summary_generated, document_id={document_id}, summary_id={summary.get('id', 'unknown')}")
+        e2e_events.emit(E2EEvent.SUMMARY_GENERATED, document_id=document_id, summary_id=summary.get('id', 'unknown'))
         
         return summary
         
     except HTTPException as ex:
         # Re-raise HTTP exceptions
         raise
+    
+    except JobQueueFullError:
+        logger.warning("Summary job queue is full, rejecting request")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="The summarization service is busy, please try again shortly"
+        )
         
     except Exception as e:
         # Log unexpected errors
@@ -202,13 +259,15 @@ async def generate_summary(
 )
 async def get_summary(
     document_id: UUID,
-    request: Request
+    request: Request,
+    db: AsyncSession = Depends(get_db)
 ) -> Any:
     """Get the summary for a document
     
     Args:
         document_id: UUID of the document
         request: FastAPI request object for cookie extraction
+        db: Database session
         
     Returns:
         Summary for the document
@@ -216,54 +275,13 @@ async def get_summary(
     Raises:
         HTTPException: Various error status codes depending on the specific error
     """
-    # Check for test mode
-    is_test_mode = (request.headers.get("X-Test-Mode") == "true" or 
-                   request.query_params.get("test_mode") == "true")
-    
-    if not is_test_mode:
-        # Authenticate user from cookie before proceeding for non-test mode
-        current_user = await get_current_user_from_cookie(request)
-    
     try:
-        # In test mode, if file doesn't exist, create a dummy summary on demand
-        summary_file = Path("summaries") / f"{document_id}.json"
-        logger.info(f"Looking for summary file: {summary_file}")
-        
-        if not summary_file.exists() and is_test_mode:
-            logger.info(f"TEST MODE: Creating on-demand dummy summary for document: {document_id}")
-            # Create a test summary file
-            summary_id = uuid.uuid4()
-            summary = {
-                "id": str(summary_id),
-                "document_id": str(document_id),
-                "content": "This is a test summary generated in test mode. It contains sample content that would normally be extracted from the document. The summary includes key findings, methodology, and conclusions from the paper.",
-                "type": "test",
-                "created_at": datetime.now().isoformat(),
-                "length": "medium"
-            }
-            
-            # Save to file
-            Path("summaries").mkdir(exist_ok=True)
-            with open(summary_file, "w") as f:
-                json.dump(summary, f)
-                
-            logger.info(f"TEST_EVENT: test_summary_generated_on_demand, document_id={document_id}, summary_id={summary.get('id', 'unknown')}")
-            return summary
-        
-        if not summary_file.exists():
-            logger.warning(f"Summary file not found: {summary_file}")
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Summary not found"
-            )
-            
-        # Read summary from file
-        with open(summary_file, "r") as f:
-            summary = json.load(f)
-            logger.info(f"Summary loaded successfully for document: {document_id}")
+        # Uwierzytelnienie, tryb testowy i odczyt - wspólne ze stroną podsumowania
+        summary = await read_summary(document_id, request, db)
+        logger.info(f"Summary loaded successfully for document: {document_id}")
             
         # Dodaj informacje diagnostyczne dla testów E2E
-        logger.info(f"TEST_EVENT: summary_retrieved, document_id={document_id}, summary_id={summary.get('id', 'unknown')}")
+        e2e_events.emit(E2EEvent.SUMMARY_RETRIEVED, document_id=document_id, summary_id=summary.get('id', 'unknown'))
             
         return summary
         
@@ -283,15 +301,19 @@ async def get_summary(
     summary="Download summary as PDF",
     description="Generates and downloads a PDF version of the document summary."
 )
+@traced("export")
+@profiled("download_summary_pdf")
 async def download_summary_pdf(
     document_id: UUID,
-    request: Request
+    request: Request,
+    db: AsyncSession = Depends(get_db)
 ) -> Any:
     """Generate and download a PDF of the document summary
     
     Args:
         document_id: UUID of the document
         request: FastAPI request object for cookie extraction
+        db: Database session
         
     Returns:
         PDF file as StreamingResponse
@@ -309,62 +331,33 @@ async def download_summary_pdf(
     
     try:
         # Check if summary exists
-        summary_file = Path("summaries") / f"{document_id}.json"
-        logger.info(f"Looking for summary file for PDF generation: {summary_file}")
+        summary = await summary_store.get_current(document_id, session=db)
         
         # In test mode, create a summary if it doesn't exist
-        if not summary_file.exists() and is_test_mode:
+        if summary is None and is_test_mode:
             logger.info(f"TEST MODE: Creating on-demand dummy summary for PDF generation: {document_id}")
-            # Create a test summary file
-            summary_id = uuid.uuid4()
-            summary = {
-                "id": str(summary_id),
-                "document_id": str(document_id),
-                "content": "This is a test summary generated in test mode. It contains sample content that would normally be extracted from the document. The summary includes key findings, methodology, and conclusions from the paper.",
-                "type": "test",
-                "created_at": datetime.now().isoformat(),
-                "length": "medium"
-            }
-            
-            # Save to file
-            Path("summaries").mkdir(exist_ok=True)
-            with open(summary_file, "w") as f:
-                json.dump(summary, f)
+            summary = await save_test_summary(document_id, db)
                 
-            logger.info(f"TEST_EVENT: test_summary_generated_for_pdf, document_id={document_id}")
+            e2e_events.emit(E2EEvent.TEST_SUMMARY_GENERATED_FOR_PDF, document_id=document_id)
         
-        if not summary_file.exists():
-            logger.warning(f"Summary file not found: {summary_file}")
+        if summary is None:
+            logger.warning(f"Summary not found for document: {document_id}")
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Summary not found"
             )
             
-        # Read summary from file
-        with open(summary_file, "r") as f:
-            summary = json.load(f)
-            
-        # Get document name if available
-        file_path = Path("uploads") / f"{document_id}.pdf"
-        document_name = "Summary"
-        
-        if file_path.exists():
-            try:
-                import fitz  # PyMuPDF
-                doc = fitz.open(file_path)
-                if doc.metadata and doc.metadata.get("title"):
-                    document_name = doc.metadata.get("title")
-                else:
-                    document_name = file_path.name
-                doc.close()
-            except Exception as e:
-                logger.error(f"Error getting document metadata: {str(e)}")
+        # Get document name if available (metadata stored at upload time)
+        document_name = await document_metadata.display_name(document_id, session=db, default="Summary")
         
         # Generate PDF using a very basic approach
         try:
             # Create a simple PDF using PyMuPDF (already a dependency)
             import fitz
             
+            # Czas eksportu (etap pdf_export) mierzony do zapisania PDF w buforze
+            export_start = time.perf_counter()
+            
             # Create a new PDF document
             pdf_document = fitz.open()
             
@@ -465,13 +458,14 @@ async def download_summary_pdf(
             
             # Reset buffer position
             buffer.seek(0)
+            pipeline_stage_duration.observe(time.perf_counter() - export_start, "pdf_export")
             
             # Create filename for download
             safe_name = "".join(c if c.isalnum() else "_" for c in document_name)
             filename = f"Summary_{safe_name}_{document_id}.pdf"
             
             # Dodaj informacje diagnostyczne dla testów E2E
-            logger.info(f"TEST_EVENT: summary_pdf_exported, document_id={document_id}, filename={filename}")
+            e2e_events.emit(E2EEvent.SUMMARY_PDF_EXPORTED, document_id=document_id, filename=filename)
             
             # Return streaming response
             return StreamingResponse(
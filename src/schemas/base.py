@@ -1,3 +1,9 @@
+import os
+
+from sqlalchemy import MetaData
 from sqlalchemy.ext.declarative import declarative_base
 
-Base = declarative_base() 
\ No newline at end of file
+# Tabele aplikacji znajdują się w schemacie tworzonym przez migracje Supabase
+DB_SCHEMA = os.getenv("DB_SCHEMA", "scisummarize")
+
+Base = declarative_base(metadata=MetaData(schema=DB_SCHEMA))
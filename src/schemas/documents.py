@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Integer, ForeignKey, DateTime
+from sqlalchemy import Column, String, Integer, BigInteger, DateTime
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.sql import func
 import uuid
@@ -11,10 +11,16 @@ class Document(Base):
     __tablename__ = "documents"
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    # Bez klucza obcego - użytkownicy pochodzą z Supabase Auth, nie z tabeli users
+    user_id = Column(UUID(as_uuid=True), nullable=False)
     title = Column(String(255), nullable=False)
     file_path = Column(String(255), nullable=False)
     file_size_kb = Column(Integer, nullable=False)
+    # Metadane odczytane z PDF przy przesłaniu pliku
+    author = Column(String(255), nullable=True)
+    page_count = Column(Integer, nullable=True)
+    file_size_bytes = Column(BigInteger, nullable=True)
+    content_hash = Column(String(64), nullable=True)
     upload_timestamp = Column(DateTime, default=func.now(), nullable=False)
     expiration_timestamp = Column(DateTime, default=lambda: datetime.now() + timedelta(hours=24), nullable=False)
     
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Text, Integer, Boolean, ForeignKey, DateTime
+from sqlalchemy import Column, Text, Integer, Boolean, DateTime, String, UniqueConstraint
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.sql import func
 import uuid
@@ -10,11 +10,18 @@ class Summary(Base):
     __tablename__ = "summaries"
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    document_id = Column(UUID(as_uuid=True), ForeignKey("documents.id", ondelete="CASCADE"), nullable=False)
+    # Bez klucza obcego - przesłane pliki nie są jeszcze rejestrowane w tabeli documents
+    document_id = Column(UUID(as_uuid=True), nullable=False)
     content = Column(Text, nullable=False)
     version = Column(Integer, default=1, nullable=False)
     is_current = Column(Boolean, default=True, nullable=False)
+    length = Column(String(16), nullable=True)
     created_at = Column(DateTime, default=func.now(), nullable=False)
     
+    # Współbieżne zapisy tej samej wersji kończą się konfliktem zamiast duplikatem
+    __table_args__ = (
+        UniqueConstraint("document_id", "version", name="summaries_document_id_version_key"),
+    )
+    
     def __repr__(self):
         return f"<Summary(id={self.id}, document_id={self.document_id}, version={self.version}, is_current={self.is_current})>" 
\ No newline at end of file
@@ -0,0 +1,5 @@
+# Summarizer backends package
+from .base import SummarizerBackend
+from .mock import MockSciBertModel
+
+__all__ = ["SummarizerBackend", "MockSciBertModel"]
@@ -0,0 +1,39 @@
+from abc import ABC, abstractmethod
+from typing import List
+
+
+class SummarizerBackend(ABC):
+    """Interface every summarization backend implements
+
+    SummaryService only relies on these members: it chunks input to fit
+    max_input_tokens (measured with count_tokens) and calls generate with
+    batches of texts, usually through the batch scheduler.
+    """
+    # Nazwa i wersja backendu - wersja jest częścią kluczy cache
+    name: str = "base"
+    version: str = "0"
+    # Maksymalna długość wejścia w tokenach
+    max_input_tokens: int = 1024
+
+    def count_tokens(self, text: str) -> int:
+        """Count tokens the way the backend's tokenizer would
+
+        Args:
+            text: Input text
+
+        Returns:
+            Number of tokens (whitespace-separated words by default)
+        """
+        return len(text.split())
+
+    @abstractmethod
+    def generate(self, texts: List[str], max_words: int = 100) -> List[str]:
+        """Summarize a batch of texts
+
+        Args:
+            texts: Input texts
+            max_words: Maximum length of each summary in words
+
+        Returns:
+            One summary per input text
+        """
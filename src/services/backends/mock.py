@@ -0,0 +1,24 @@
+from typing import List
+
+from .base import SummarizerBackend
+
+
+class MockSciBertModel(SummarizerBackend):
+    """Stand-in for the SciBert summarization model
+
+    Returns the leading words of each text as its summary.
+    """
+    name = "scibert_mock"
+    version = "scibert-mock-1"
+    # Odpowiednik max_length=1024 tokenizera
+    max_input_tokens = 1024
+
+    def generate(self, texts: List[str], max_words: int = 100) -> List[str]:
+        summaries = []
+        for text in texts:
+            words = text.split()
+            if len(words) > max_words:
+                summaries.append(" ".join(words[:max_words]) + "...")
+            else:
+                summaries.append(text)
+        return summaries
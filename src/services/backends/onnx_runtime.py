@@ -0,0 +1,98 @@
+import logging
+import os
+import re
+import shutil
+from pathlib import Path
+
+from .seq2seq import Seq2SeqBackend
+
+# Konfiguracja loggera
+logger = logging.getLogger(__name__)
+
+# Katalog z wyeksportowanymi modelami ONNX (eksport wykonywany jest raz)
+ONNX_MODEL_DIR = os.getenv("ONNX_MODEL_DIR", "models/onnx")
+# Wątki intra-op ONNX Runtime (0 = liczba fizycznych rdzeni)
+ONNX_INTRA_OP_THREADS = int(os.getenv("ONNX_INTRA_OP_THREADS", "0"))
+# Dynamiczna kwantyzacja wag do int8
+ONNX_QUANTIZE = os.getenv("ONNX_QUANTIZE", "true").lower() == "true"
+
+
+def export_onnx_model(model_name: str, output_dir: str, quantize: bool = True) -> Path:
+    """Export a seq2seq model to ONNX, optionally with dynamic int8 quantization
+
+    The export is skipped when output_dir already holds a complete export,
+    so it only runs on the first start of a node.
+
+    Args:
+        model_name: Hugging Face model id or local path
+        output_dir: Directory for the exported model
+        quantize: Quantize MatMul/Gemm weights to int8 after export
+
+    Returns:
+        Path of the directory to load the model from
+    """
+    from optimum.onnxruntime import ORTModelForSeq2SeqLM
+
+    target = Path(output_dir) / re.sub(r"[^\w.-]", "_", model_name) / ("int8" if quantize else "fp32")
+    if (target / "config.json").exists():
+        return target
+
+    export_dir = target.with_name("fp32")
+    if not (export_dir / "config.json").exists():
+        logger.info(f"Exporting {model_name} to ONNX in {export_dir}")
+        ORTModelForSeq2SeqLM.from_pretrained(model_name, export=True).save_pretrained(export_dir)
+    if not quantize:
+        return export_dir
+
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    logger.info(f"Quantizing ONNX model to int8 in {target}")
+    tmp_dir = target.with_name("int8.tmp")
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    shutil.copytree(export_dir, tmp_dir, ignore=shutil.ignore_patterns("*.onnx", "*.onnx_data"))
+    for onnx_file in export_dir.glob("*.onnx"):
+        quantize_dynamic(onnx_file, tmp_dir / onnx_file.name, weight_type=QuantType.QInt8)
+    # Zamiana nazwy katalogu jest atomowa - przerwany eksport nie zostawi połowy modelu
+    tmp_dir.rename(target)
+    return target
+
+
+class OnnxSeq2SeqBackend(Seq2SeqBackend):
+    """Seq2seq summarizer running on ONNX Runtime instead of PyTorch eager
+
+    Uses the same tokenizer and generation settings as Seq2SeqBackend, so
+    the two can be swapped with SUMMARIZER_BACKEND and compared directly
+    (see benchmarks/bench_onnx.py).
+    """
+    name = "onnx"
+
+    def __init__(self, *args, model_dir: str = ONNX_MODEL_DIR, quantize: bool = ONNX_QUANTIZE,
+                 intra_op_threads: int = ONNX_INTRA_OP_THREADS, **kwargs):
+        """Export (once) and load the model
+
+        Args:
+            model_dir: Directory for exported models
+            quantize: Use the dynamically int8-quantized export
+            intra_op_threads: ONNX Runtime intra-op thread count, 0 for the default
+            *args, **kwargs: Passed to Seq2SeqBackend
+        """
+        self.model_dir = model_dir
+        self.quantize = quantize
+        self.intra_op_threads = intra_op_threads
+        super().__init__(*args, **kwargs)
+        if quantize:
+            self.version += ":int8"
+
+    def _load_model(self, model_name: str):
+        import onnxruntime
+        from optimum.onnxruntime import ORTModelForSeq2SeqLM
+
+        path = export_onnx_model(model_name, self.model_dir, self.quantize)
+        options = onnxruntime.SessionOptions()
+        options.intra_op_num_threads = self.intra_op_threads
+        # Równoległość między zapytaniami zapewnia batching, nie inter-op
+        options.inter_op_num_threads = 1
+        options.execution_mode = onnxruntime.ExecutionMode.ORT_SEQUENTIAL
+        options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        return ORTModelForSeq2SeqLM.from_pretrained(path, session_options=options,
+                                                    provider="CPUExecutionProvider")
@@ -0,0 +1,71 @@
+import os
+from typing import List
+
+from .base import SummarizerBackend
+
+# Model Hugging Face używany przez backendy "scibert" i "onnx"
+SCIBERT_MODEL_NAME = os.getenv("SCIBERT_MODEL_NAME", "")
+# Limit wejścia niezależny od model_max_length tokenizera (często ustawionego na 1e30)
+SEQ2SEQ_MAX_INPUT_TOKENS = int(os.getenv("SEQ2SEQ_MAX_INPUT_TOKENS", "1024"))
+# Liczba wiązek w beam search
+SEQ2SEQ_NUM_BEAMS = int(os.getenv("SEQ2SEQ_NUM_BEAMS", "1"))
+
+# Przybliżona liczba tokenów na słowo przy ograniczaniu długości generacji
+TOKENS_PER_WORD = 1.5
+
+
+class Seq2SeqBackend(SummarizerBackend):
+    """Abstractive summarizer running a Hugging Face seq2seq model in PyTorch eager mode
+
+    Subclasses only replace _load_model to run the same tokenizer and
+    generation settings on a different runtime.
+    """
+    name = "seq2seq"
+
+    def __init__(self, model_name: str = SCIBERT_MODEL_NAME, max_input_tokens: int = SEQ2SEQ_MAX_INPUT_TOKENS,
+                 num_beams: int = SEQ2SEQ_NUM_BEAMS):
+        """Load the tokenizer and model
+
+        Args:
+            model_name: Hugging Face model id or local path
+            max_input_tokens: Inputs are truncated to this many tokens
+            num_beams: Number of beams used by generate
+
+        Raises:
+            ValueError: If no model name is configured
+            ImportError: If transformers or the runtime is not installed
+        """
+        if not model_name:
+            raise ValueError("SCIBERT_MODEL_NAME is not set")
+        from transformers import AutoTokenizer
+
+        self.model_name = model_name
+        self.num_beams = num_beams
+        self.tokenizer = AutoTokenizer.from_pretrained(model_name)
+        self.max_input_tokens = min(max_input_tokens, self.tokenizer.model_max_length)
+        self.model = self._load_model(model_name)
+        self.version = f"{self.name}:{model_name}"
+
+    def _load_model(self, model_name: str):
+        import torch
+        from transformers import AutoModelForSeq2SeqLM
+
+        torch.set_grad_enabled(False)
+        model = AutoModelForSeq2SeqLM.from_pretrained(model_name)
+        model.eval()
+        return model
+
+    def count_tokens(self, text: str) -> int:
+        return len(self.tokenizer(text, add_special_tokens=True)["input_ids"])
+
+    def generate(self, texts: List[str], max_words: int = 100) -> List[str]:
+        inputs = self.tokenizer(texts, return_tensors="pt", padding=True, truncation=True,
+                                max_length=self.max_input_tokens)
+        output_ids = self.model.generate(
+            **inputs,
+            max_new_tokens=int(max_words * TOKENS_PER_WORD),
+            num_beams=self.num_beams,
+        )
+        summaries = self.tokenizer.batch_decode(output_ids, skip_special_tokens=True)
+        # Limit tokenów jest przybliżeniem - ostateczny limit słów egzekwujemy tutaj
+        return [" ".join(summary.split()[:max_words]) for summary in summaries]
@@ -0,0 +1,217 @@
+import asyncio
+import logging
+import os
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+# Konfiguracja loggera
+logger = logging.getLogger(__name__)
+
+# Parametry dynamicznego grupowania żądań do modelu
+BATCH_MAX_SIZE = int(os.getenv("BATCH_MAX_SIZE", "8"))
+BATCH_MAX_WAIT_MS = float(os.getenv("BATCH_MAX_WAIT_MS", "10"))
+BATCH_MAX_QUEUE = int(os.getenv("BATCH_MAX_QUEUE", "256"))
+
+
+class BatchQueueFullError(Exception):
+    """Raised when the inference queue is at capacity"""
+    def __init__(self, message: str):
+        self.message = message
+        super().__init__(self.message)
+
+
+@dataclass
+class _InferenceRequest:
+    """A single text waiting for inference"""
+    text: str
+    max_words: int
+    future: asyncio.Future
+    enqueued_at: float = field(default_factory=time.perf_counter)
+
+
+class BatchScheduler:
+    """In-process micro-batching scheduler in front of the summarization model
+
+    Callers enqueue texts and await their summaries. A collector task takes
+    the first waiting request, gathers more until the batch is full or the
+    maximum wait time has passed, runs one batched generate call in a thread
+    and resolves every caller's future with its own result. While a batch is
+    being processed new requests accumulate, so batches grow with load.
+    """
+
+    def __init__(self, max_batch_size: int = BATCH_MAX_SIZE, max_wait_ms: float = BATCH_MAX_WAIT_MS,
+                 max_queue_size: int = BATCH_MAX_QUEUE):
+        """Initialize the scheduler
+
+        Args:
+            max_batch_size: Maximum number of texts in one generate call
+            max_wait_ms: Maximum time the first request of a batch waits for more
+            max_queue_size: Maximum number of requests waiting in the queue
+        """
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self.max_queue_size = max_queue_size
+        self.model: Optional[Any] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._collector: Optional[asyncio.Task] = None
+        # Żądania zdjęte z kolejki przez kolektor (zbierana lub przetwarzana paczka)
+        self._in_flight: List[_InferenceRequest] = []
+
+        # Metryki
+        self.requests_total = 0
+        self.batches_total = 0
+        self.rejected_total = 0
+        self.batch_sizes: Counter = Counter()
+        self.max_queue_depth = 0
+        self.wait_ms_total = 0.0
+        self.wait_ms_max = 0.0
+        self.inference_ms_total = 0.0
+
+    @property
+    def running(self) -> bool:
+        return self._collector is not None and not self._collector.done()
+
+    async def start(self, model):
+        """Start the collector task for the given model
+
+        Args:
+            model: Model with a batched generate(texts, max_words) method
+        """
+        if self.running:
+            return
+        self.model = model
+        self._queue = asyncio.Queue(maxsize=self.max_queue_size)
+        self._collector = asyncio.create_task(self._collect())
+        logger.info(f"Batch scheduler started (max_batch_size={self.max_batch_size}, "
+                    f"max_wait_ms={self.max_wait_ms})")
+
+    async def stop(self):
+        """Stop the collector and fail requests that are still waiting
+
+        Requests of the batch being collected or processed are failed as
+        well - they are no longer in the queue, and a cancelled collector
+        would never resolve them.
+        """
+        if self._collector is None:
+            return
+        self._collector.cancel()
+        try:
+            await self._collector
+        except asyncio.CancelledError:
+            pass
+        self._collector = None
+
+        pending, self._in_flight = self._in_flight, []
+        while not self._queue.empty():
+            pending.append(self._queue.get_nowait())
+        for request in pending:
+            if not request.future.done():
+                request.future.set_exception(RuntimeError("Batch scheduler stopped"))
+
+    async def submit(self, text: str, max_words: int = 100) -> str:
+        """Enqueue a text and wait for its summary
+
+        Args:
+            text: Input text
+            max_words: Maximum length of the summary in words
+
+        Returns:
+            Generated summary
+
+        Raises:
+            BatchQueueFullError: If the queue is at capacity
+        """
+        if not self.running:
+            raise RuntimeError("Batch scheduler is not running")
+
+        request = _InferenceRequest(text, max_words, asyncio.get_running_loop().create_future())
+        try:
+            self._queue.put_nowait(request)
+        except asyncio.QueueFull:
+            self.rejected_total += 1
+            raise BatchQueueFullError("Inference queue is full")
+
+        self.requests_total += 1
+        self.max_queue_depth = max(self.max_queue_depth, self._queue.qsize())
+        return await request.future
+
+    async def _next_batch(self) -> List[_InferenceRequest]:
+        """Wait for a request, then gather more until the batch is full or time runs out"""
+        batch = self._in_flight = [await self._queue.get()]
+        deadline = batch[0].enqueued_at + self.max_wait_ms / 1000
+
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                # Czas minął - dobieramy tylko to, co już czeka w kolejce
+                while len(batch) < self.max_batch_size and not self._queue.empty():
+                    batch.append(self._queue.get_nowait())
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout=remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _collect(self):
+        """Collector loop: form batches and run inference one batch at a time"""
+        while True:
+            batch = await self._next_batch()
+            # Pomijamy żądania anulowane w trakcie oczekiwania
+            batch = self._in_flight = [request for request in batch if not request.future.done()]
+            if not batch:
+                continue
+
+            started = time.perf_counter()
+            for request in batch:
+                wait_ms = (started - request.enqueued_at) * 1000
+                self.wait_ms_total += wait_ms
+                self.wait_ms_max = max(self.wait_ms_max, wait_ms)
+            self.batches_total += 1
+            self.batch_sizes[len(batch)] += 1
+
+            # Jedno wywołanie generate na każdą długość podsumowania w paczce
+            groups: Dict[int, List[_InferenceRequest]] = {}
+            for request in batch:
+                groups.setdefault(request.max_words, []).append(request)
+
+            for max_words, requests in groups.items():
+                try:
+                    results = await asyncio.to_thread(
+                        self.model.generate, [request.text for request in requests], max_words
+                    )
+                except Exception as e:
+                    logger.error(f"Batched inference failed: {str(e)}")
+                    for request in requests:
+                        if not request.future.done():
+                            request.future.set_exception(e)
+                    continue
+                for request, result in zip(requests, results):
+                    if not request.future.done():
+                        request.future.set_result(result)
+
+            self.inference_ms_total += (time.perf_counter() - started) * 1000
+            self._in_flight = []
+
+    def stats(self) -> Dict[str, Any]:
+        """Return batch size, queue depth and wait time metrics"""
+        processed = sum(size * count for size, count in self.batch_sizes.items())
+        return {
+            "running": self.running,
+            "requests_total": self.requests_total,
+            "batches_total": self.batches_total,
+            "rejected_total": self.rejected_total,
+            "batch_size_histogram": dict(sorted(self.batch_sizes.items())),
+            "mean_batch_size": processed / self.batches_total if self.batches_total else 0.0,
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "max_queue_depth": self.max_queue_depth,
+            "mean_wait_ms": self.wait_ms_total / processed if processed else 0.0,
+            "max_wait_ms": self.wait_ms_max,
+            "mean_inference_ms": self.inference_ms_total / self.batches_total if self.batches_total else 0.0,
+        }
+
+
+# Współdzielony harmonogram uruchamiany w lifespan aplikacji
+batch_scheduler = BatchScheduler()
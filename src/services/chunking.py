@@ -0,0 +1,176 @@
+import hashlib
+import logging
+import os
+import re
+from collections import OrderedDict
+from typing import AsyncIterable, AsyncIterator, Callable, Dict, Iterator, List, Optional
+
+from services.extraction_engine import PageText
+from services.tracing import tracer
+
+# Konfiguracja loggera
+logger = logging.getLogger(__name__)
+
+# Liczba wpisów w cache podsumowań fragmentów
+CHUNK_CACHE_ENTRIES = int(os.getenv("CHUNK_CACHE_ENTRIES", "4096"))
+
+# Koniec zdania: . ! ? (opcjonalnie z cudzysłowem/nawiasem) i biały znak
+_SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?])[\"')\]]*\s+")
+
+
+def split_sentences(text: str) -> List[str]:
+    """Split text into sentences on terminal punctuation
+
+    Args:
+        text: Input text
+
+    Returns:
+        List of non-empty sentences with normalised whitespace
+    """
+    sentences = []
+    for sentence in _SENTENCE_BOUNDARY.split(text):
+        sentence = " ".join(sentence.split())
+        if sentence:
+            sentences.append(sentence)
+    return sentences
+
+
+def _split_long_sentence(sentence: str, max_tokens: int, count_tokens: Callable[[str], int]) -> List[str]:
+    """Split a sentence that alone exceeds the budget into word windows"""
+    words = sentence.split()
+    # Przybliżenie: liczba słów na token dla tego zdania
+    words_per_piece = max(1, int(len(words) * max_tokens / max(1, count_tokens(sentence))))
+    return [" ".join(words[i:i + words_per_piece]) for i in range(0, len(words), words_per_piece)]
+
+
+class _ChunkBuilder:
+    """Accumulates sentences into chunks that fit a token budget"""
+
+    def __init__(self, max_tokens: int, count_tokens: Callable[[str], int]):
+        self.max_tokens = max_tokens
+        self.count_tokens = count_tokens
+        self._sentences: List[str] = []
+        self._tokens = 0
+
+    def add(self, sentence: str) -> Iterator[str]:
+        """Add a sentence, yielding every chunk that became full"""
+        tokens = self.count_tokens(sentence)
+        if tokens > self.max_tokens:
+            yield from self.flush()
+            for piece in _split_long_sentence(sentence, self.max_tokens, self.count_tokens):
+                yield piece
+            return
+        if self._sentences and self._tokens + tokens > self.max_tokens:
+            yield from self.flush()
+        self._sentences.append(sentence)
+        self._tokens += tokens
+
+    def flush(self) -> Iterator[str]:
+        if self._sentences:
+            yield " ".join(self._sentences)
+        self._sentences = []
+        self._tokens = 0
+
+
+def chunk_text(text: str, max_tokens: int, count_tokens: Callable[[str], int]) -> List[str]:
+    """Split text into sentence-aligned chunks of at most max_tokens tokens
+
+    Args:
+        text: Input text
+        max_tokens: Token budget of a single chunk
+        count_tokens: Function returning the number of tokens in a string
+
+    Returns:
+        List of chunks in document order
+    """
+    with tracer.span("chunking", max_tokens=max_tokens, text_chars=len(text)) as span:
+        builder = _ChunkBuilder(max_tokens, count_tokens)
+        chunks = []
+        for sentence in split_sentences(text):
+            chunks.extend(builder.add(sentence))
+        chunks.extend(builder.flush())
+        span.set_attribute("chunks", len(chunks))
+    return chunks
+
+
+async def iter_chunks(pages: AsyncIterable[PageText], max_tokens: int,
+                      count_tokens: Callable[[str], int]) -> AsyncIterator[str]:
+    """Chunk a stream of pages incrementally
+
+    Only the current chunk and the unfinished sentence at the end of the last
+    page are held in memory, so memory use is bounded by the chunk size.
+
+    Args:
+        pages: Stream of pages, e.g. from SummaryService.iter_text
+        max_tokens: Token budget of a single chunk
+        count_tokens: Function returning the number of tokens in a string
+
+    Yields:
+        Sentence-aligned chunks in document order
+    """
+    builder = _ChunkBuilder(max_tokens, count_tokens)
+    carry = ""
+    async for page in pages:
+        sentences = split_sentences(carry + " " + page.text)
+        # Ostatnie zdanie strony może kontynuować się na następnej
+        carry = sentences.pop() if sentences else ""
+        if count_tokens(carry) > max_tokens:
+            # Tekst bez znaków końca zdania (np. tabele) nie może rosnąć bez końca
+            sentences.append(carry)
+            carry = ""
+        for sentence in sentences:
+            for chunk in builder.add(sentence):
+                yield chunk
+    if carry:
+        for chunk in builder.add(carry):
+            yield chunk
+    for chunk in builder.flush():
+        yield chunk
+
+
+class ChunkSummaryCache:
+    """In-memory LRU of intermediate (map stage) chunk summaries
+
+    Keys include the model version and the per-chunk summary length, but not
+    the final summary length, so re-running a document with different length
+    settings only repeats the final reduce step.
+    """
+
+    def __init__(self, max_entries: int = CHUNK_CACHE_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, str]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(model_version: str, max_words: int, chunk: str) -> str:
+        digest = hashlib.sha256(chunk.encode("utf-8")).hexdigest()
+        return f"{model_version}:{max_words}:{digest}"
+
+    def get(self, key: str) -> Optional[str]:
+        summary = self._entries.get(key)
+        if summary is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return summary
+
+    def put(self, key: str, summary: str):
+        self._entries[key] = summary
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "entries": len(self._entries),
+        }
+
+
+# Współdzielony cache podsumowań fragmentów
+chunk_summary_cache = ChunkSummaryCache()
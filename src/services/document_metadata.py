@@ -0,0 +1,226 @@
+import asyncio
+import logging
+import math
+import os
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, asdict
+from typing import Any, AsyncIterator, Dict, Optional
+from uuid import UUID
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from db.database import async_session_factory
+from schemas.documents import Document
+from services.extraction_engine import ExtractionError, extraction_engine
+from services.summary_store import SUMMARY_STORE
+from services.text_cache import hash_file
+from services import uploads
+
+# Konfiguracja loggera
+logger = logging.getLogger(__name__)
+
+DOCUMENT_METADATA_CACHE_ENTRIES = int(os.getenv("DOCUMENT_METADATA_CACHE_ENTRIES", "1024"))
+# Bez bazy danych (SUMMARY_STORE=files) metadane są trzymane tylko w pamięci
+DOCUMENT_METADATA_PERSIST = os.getenv("DOCUMENT_METADATA_PERSIST", str(SUMMARY_STORE == "database")).lower() == "true"
+
+
+@dataclass
+class DocumentMetadata:
+    """Metadata of an uploaded PDF, read once at upload time"""
+    document_id: UUID
+    title: str
+    author: Optional[str]
+    page_count: Optional[int]
+    file_size_bytes: int
+    content_hash: str
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {**asdict(self), "document_id": str(self.document_id)}
+
+
+def _to_uuid(value: Any) -> Optional[UUID]:
+    try:
+        return value if isinstance(value, UUID) else UUID(str(value))
+    except ValueError:
+        return None
+
+
+class DocumentMetadataCache:
+    """Document metadata in scisummarize.documents with an in-process LRU in front
+
+    Metadata is extracted when the file is uploaded; page views and summary
+    exports read it from here and never open the PDF again. Uploads from
+    before the metadata was stored are read once on first use (load).
+    """
+
+    def __init__(self, max_entries: int = DOCUMENT_METADATA_CACHE_ENTRIES, persist: bool = DOCUMENT_METADATA_PERSIST):
+        """Initialize the cache
+
+        Args:
+            max_entries: Capacity of the in-process LRU
+            persist: Whether metadata is stored in and read from the documents table
+        """
+        self.max_entries = max_entries
+        self.persist = persist
+        self._entries: "OrderedDict[UUID, DocumentMetadata]" = OrderedDict()
+
+        # Metryki
+        self.hits = 0
+        self.misses = 0
+
+    @asynccontextmanager
+    async def _session(self, session: Optional[AsyncSession]) -> AsyncIterator[AsyncSession]:
+        if session is not None:
+            yield session
+            return
+        async with async_session_factory() as new_session:
+            yield new_session
+
+    def _remember(self, metadata: DocumentMetadata):
+        self._entries[metadata.document_id] = metadata
+        self._entries.move_to_end(metadata.document_id)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def register(self, document_id: UUID, file_path: str, filename: str, user_id: Any = None,
+                       session: Optional[AsyncSession] = None) -> DocumentMetadata:
+        """Extract the metadata of a freshly uploaded PDF and store it
+
+        Args:
+            document_id: UUID of the uploaded document
+            file_path: Path of the saved upload
+            filename: Original file name, used as the title when the PDF has none
+            user_id: Id of the uploading user
+            session: Request session from get_db; a new session is used without it
+
+        Returns:
+            Extracted metadata
+
+        Raises:
+            InvalidPDFError: If the file is not a valid PDF
+            ExtractionTimeoutError: If reading the metadata timed out
+        """
+        metadata = await self._read(document_id, file_path, filename)
+        self._remember(metadata)
+
+        owner = _to_uuid(user_id)
+        if self.persist and owner is not None:
+            async with self._session(session) as db:
+                try:
+                    db.add(Document(
+                        id=document_id,
+                        user_id=owner,
+                        title=metadata.title,
+                        file_path=str(file_path),
+                        file_size_kb=math.ceil(metadata.file_size_bytes / 1024),
+                        author=metadata.author,
+                        page_count=metadata.page_count,
+                        file_size_bytes=metadata.file_size_bytes,
+                        content_hash=metadata.content_hash,
+                    ))
+                    await db.commit()
+                except Exception as e:
+                    # Metadane zostają w pamięci; brak wiersza nie blokuje przesłania pliku
+                    await db.rollback()
+                    logger.warning(f"Could not store metadata of document {document_id}: {str(e)}")
+        return metadata
+
+    async def _read(self, document_id: UUID, file_path: str, filename: str) -> DocumentMetadata:
+        content_hash, info, file_size = await asyncio.gather(
+            hash_file(file_path),
+            extraction_engine.extract_metadata(file_path),
+            asyncio.to_thread(os.path.getsize, file_path),
+        )
+        return DocumentMetadata(
+            document_id=document_id,
+            title=(info["title"] or filename)[:255],
+            author=info["author"][:255] if info["author"] else None,
+            page_count=info["page_count"],
+            file_size_bytes=file_size,
+            content_hash=content_hash,
+        )
+
+    async def get(self, document_id: UUID, session: Optional[AsyncSession] = None) -> Optional[DocumentMetadata]:
+        """Return the metadata of a document, or None if it wasn't registered
+
+        Args:
+            document_id: UUID of the document
+            session: Request session from get_db; a new session is used without it
+        """
+        metadata = self._entries.get(document_id)
+        if metadata is not None:
+            self.hits += 1
+            self._entries.move_to_end(document_id)
+            return metadata
+
+        self.misses += 1
+        if not self.persist:
+            return None
+        try:
+            async with self._session(session) as db:
+                document = await db.scalar(select(Document).where(Document.id == document_id))
+        except Exception as e:
+            logger.warning(f"Could not load metadata of document {document_id}: {str(e)}")
+            return None
+        if document is None:
+            return None
+
+        metadata = DocumentMetadata(
+            document_id=document.id,
+            title=document.title,
+            author=document.author,
+            page_count=document.page_count,
+            file_size_bytes=document.file_size_bytes or document.file_size_kb * 1024,
+            content_hash=document.content_hash,
+        )
+        self._remember(metadata)
+        return metadata
+
+    async def load(self, document_id: UUID, session: Optional[AsyncSession] = None) -> Optional[DocumentMetadata]:
+        """Return the metadata of a document, reading it from the upload if it wasn't registered
+
+        Uploads saved before metadata was stored get their metadata read once
+        (title from the PDF, otherwise the upload's file name) and remembered
+        in memory.
+
+        Args:
+            document_id: UUID of the document
+            session: Request session from get_db; a new session is used without it
+
+        Returns:
+            Metadata, or None if the document is unknown and its file is gone or unreadable
+        """
+        metadata = await self.get(document_id, session=session)
+        if metadata is not None:
+            return metadata
+        file_path = uploads.upload_path(document_id)
+        if not file_path.exists():
+            return None
+        try:
+            metadata = await self._read(document_id, str(file_path), file_path.name)
+        except (ExtractionError, OSError) as e:
+            logger.error(f"Error getting document metadata: {str(e)}")
+            return None
+        self._remember(metadata)
+        return metadata
+
+    async def display_name(self, document_id: UUID, session: Optional[AsyncSession] = None,
+                           default: str = "Unknown document") -> str:
+        """Title shown for a document on pages and in exports"""
+        metadata = await self.load(document_id, session=session)
+        return metadata.title if metadata is not None else default
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
+
+
+# Współdzielony cache metadanych dokumentów
+document_metadata = DocumentMetadataCache()
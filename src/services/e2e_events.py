@@ -0,0 +1,62 @@
+import logging
+import os
+from enum import Enum
+
+from services.structured_log import Event, redact
+
+# Znaczniki TEST_EVENT dla testów E2E; na produkcji wyłączone (E2E_EVENTS=false)
+E2E_EVENTS_ENABLED = os.getenv("E2E_EVENTS", "true").lower() == "true"
+
+
+class E2EEvent(str, Enum):
+    """Events the E2E tests look for in the application log"""
+    DOCUMENT_UPLOADED = "document_uploaded"
+    SUMMARY_JOB_QUEUED = "summary_job_queued"
+    SUMMARY_GENERATED = "summary_generated"
+    SUMMARY_RETRIEVED = "summary_retrieved"
+    SUMMARY_PDF_EXPORTED = "summary_pdf_exported"
+    TEST_SUMMARY_GENERATED = "test_summary_generated"
+    TEST_SUMMARY_GENERATED_ON_DEMAND = "test_summary_generated_on_demand"
+    TEST_SUMMARY_GENERATED_FOR_PDF = "test_summary_generated_for_pdf"
+
+
+class E2EEventMessage(Event):
+    """Rendered in the `TEST_EVENT: name, key=value, ...` form the tests match"""
+    __slots__ = ()
+
+    def __str__(self) -> str:
+        return ", ".join([f"TEST_EVENT: {self.name}"] + [f"{key}={value}" for key, value in redact(self.fields).items()])
+
+
+def _discard(event: E2EEvent, **fields):
+    pass
+
+
+class E2EEventEmitter:
+    """Emits typed TEST_EVENT markers, or nothing when disabled
+
+    When disabled, emit is a function that returns immediately - no level
+    check, no record and nothing queued for the log listener.
+    """
+
+    def __init__(self, enabled: bool = E2E_EVENTS_ENABLED, logger_name: str = "e2e_events"):
+        self.logger = logging.getLogger(logger_name)
+        self.set_enabled(enabled)
+
+    def set_enabled(self, enabled: bool):
+        self.enabled = enabled
+        self.emit = self._emit if enabled else _discard
+
+    def _emit(self, event: E2EEvent, **fields):
+        """Log an E2E event
+
+        Args:
+            event: Event type
+            **fields: Event fields, e.g. document_id
+        """
+        self.logger.info(E2EEventMessage(event.value, fields),
+                         extra={"event": f"test_event.{event.value}", "fields": fields})
+
+
+# Współdzielony emiter znaczników TEST_EVENT
+e2e_events = E2EEventEmitter()
@@ -0,0 +1,393 @@
+import asyncio
+import logging
+import math
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import AsyncIterator, Dict, List, NamedTuple, Optional, Tuple
+
+from services.tracing import run_traced, tracer
+
+# Konfiguracja loggera
+logger = logging.getLogger(__name__)
+
+# Wersja ekstraktora - zmiana sposobu ekstrakcji musi unieważnić cache tekstu
+EXTRACTOR_VERSION = "pymupdf-pages-1"
+
+# Liczba procesów roboczych i limit czasu pojedynczego zadania ekstrakcji
+EXTRACTION_WORKERS = int(os.getenv("EXTRACTION_WORKERS", str(max(1, (os.cpu_count() or 2) - 1))))
+EXTRACTION_TIMEOUT_SECONDS = float(os.getenv("EXTRACTION_TIMEOUT_SECONDS", "60"))
+# Dokumenty od tej liczby stron są dzielone na zakresy i przetwarzane równolegle (0 = wyłączone)
+EXTRACTION_PARALLEL_THRESHOLD = int(os.getenv("EXTRACTION_PARALLEL_THRESHOLD", "64"))
+EXTRACTION_MIN_PAGES_PER_RANGE = int(os.getenv("EXTRACTION_MIN_PAGES_PER_RANGE", "16"))
+# Liczba stron w jednej porcji przy strumieniowaniu tekstu
+EXTRACTION_STREAM_PAGES = int(os.getenv("EXTRACTION_STREAM_PAGES", "8"))
+# Sposób uruchamiania workerów: fork kopiowałby wątki i stan pętli zdarzeń procesu aplikacji
+EXTRACTION_START_METHOD = os.getenv("EXTRACTION_START_METHOD", "forkserver")
+
+
+class PageText(NamedTuple):
+    """Text of a single PDF page (page numbers start at 1)"""
+    page_number: int
+    text: str
+
+
+class ExtractionError(Exception):
+    """Base exception for errors raised by the extraction engine"""
+    def __init__(self, message: str):
+        self.message = message
+        super().__init__(self.message)
+
+
+class InvalidPDFError(ExtractionError):
+    """Raised when the file can't be opened as a PDF document"""
+    pass
+
+
+class ExtractionTimeoutError(ExtractionError):
+    """Raised when an extraction job exceeds its deadline"""
+    pass
+
+
+def _mp_context(start_method: str = EXTRACTION_START_METHOD):
+    # forkserver nie jest dostępny na Windows - tam zostaje spawn
+    if start_method not in multiprocessing.get_all_start_methods():
+        start_method = "spawn"
+    return multiprocessing.get_context(start_method)
+
+
+def _warm_up_worker() -> int:
+    """Import PyMuPDF in the worker so the first real job doesn't pay for it"""
+    import fitz  # noqa: F401 - import is the warm-up
+    return os.getpid()
+
+
+def _open_pdf(file_path: str):
+    """Open a PDF with PyMuPDF, translating open errors to InvalidPDFError"""
+    import fitz  # PyMuPDF
+
+    try:
+        return fitz.open(file_path)
+    except fitz.FileDataError as e:
+        raise InvalidPDFError(str(e))
+
+
+def _read_pages(pdf_document, start: int, stop: int, deadline: Optional[float]) -> List[str]:
+    """Read the text of pages [start, stop) from an open document, one entry per page"""
+    pages = []
+    for page_num in range(start, stop):
+        # Sprawdzamy termin między stronami - anulowanie kooperacyjne
+        if deadline is not None and time.time() > deadline:
+            raise ExtractionTimeoutError(f"Extraction deadline exceeded at page {page_num}")
+        pages.append(pdf_document[page_num].get_text())
+    return pages
+
+
+def _extract_pdf_text(file_path: str, parallel_threshold: int = 0,
+                      deadline: Optional[float] = None) -> Tuple[int, Optional[List[str]]]:
+    """Extract the text of a whole PDF in one pass (runs inside a worker process)
+
+    Args:
+        file_path: Path to the PDF file
+        parallel_threshold: Page count from which the text is not extracted here
+            and the caller should switch to page-parallel extraction (0 = never)
+        deadline: Wall-clock time (time.time()) after which the job aborts
+
+    Returns:
+        Tuple of page count and the text of each page (None if the document
+        is large enough for page-parallel extraction)
+    """
+    pdf_document = _open_pdf(file_path)
+    try:
+        page_count = pdf_document.page_count
+        if parallel_threshold and page_count >= parallel_threshold:
+            return page_count, None
+        return page_count, _read_pages(pdf_document, 0, page_count, deadline)
+    finally:
+        pdf_document.close()
+
+
+def _extract_page_range(file_path: str, start: int, stop: int,
+                        deadline: Optional[float] = None) -> List[str]:
+    """Extract the text of pages [start, stop) (runs inside a worker process)
+
+    Each worker opens the file on its own, so ranges can be processed
+    concurrently without sharing any PyMuPDF state between processes.
+    """
+    pdf_document = _open_pdf(file_path)
+    try:
+        return _read_pages(pdf_document, start, min(stop, pdf_document.page_count), deadline)
+    finally:
+        pdf_document.close()
+
+
+def _read_metadata(file_path: str, deadline: Optional[float] = None) -> Dict[str, Optional[object]]:
+    """Read the document information dictionary and page count (runs inside a worker process)"""
+    pdf_document = _open_pdf(file_path)
+    try:
+        metadata = pdf_document.metadata or {}
+        return {
+            "title": (metadata.get("title") or "").strip() or None,
+            "author": (metadata.get("author") or "").strip() or None,
+            "page_count": pdf_document.page_count,
+        }
+    finally:
+        pdf_document.close()
+
+
+def split_page_ranges(page_count: int, parts: int, min_pages: int = 1) -> List[Tuple[int, int]]:
+    """Split pages into at most `parts` contiguous, near-equal [start, stop) ranges
+
+    Args:
+        page_count: Number of pages in the document
+        parts: Maximum number of ranges
+        min_pages: Minimum number of pages in a single range
+
+    Returns:
+        List of (start, stop) tuples covering all pages in order
+    """
+    if page_count <= 0:
+        return []
+    parts = max(1, min(parts, page_count // max(1, min_pages)))
+    size = math.ceil(page_count / parts)
+    return [(start, min(start + size, page_count)) for start in range(0, page_count, size)]
+
+
+class ExtractionEngine:
+    """Runs PyMuPDF text extraction in a bounded pool of worker processes
+
+    The event loop only awaits the result, so a large PDF no longer blocks
+    other requests while it is being parsed. Workers are started with
+    forkserver (or spawn), never forked from the threaded application
+    process; if a worker dies and breaks the pool, the pool is recreated
+    and the job retried once.
+    """
+
+    def __init__(self, max_workers: int = EXTRACTION_WORKERS, timeout: float = EXTRACTION_TIMEOUT_SECONDS,
+                 parallel_threshold: int = EXTRACTION_PARALLEL_THRESHOLD,
+                 min_pages_per_range: int = EXTRACTION_MIN_PAGES_PER_RANGE):
+        """Initialize the engine
+
+        Args:
+            max_workers: Number of worker processes in the pool
+            timeout: Default per-job timeout in seconds
+            parallel_threshold: Page count from which documents are split into
+                page ranges extracted concurrently (0 disables page-parallel mode)
+            min_pages_per_range: Smallest page range handed to a single worker
+        """
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.parallel_threshold = parallel_threshold
+        self.min_pages_per_range = min_pages_per_range
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self.pool_restarts = 0
+
+    @property
+    def started(self) -> bool:
+        return self._executor is not None
+
+    async def start(self, warm: bool = True):
+        """Create the process pool and optionally warm every worker
+
+        Args:
+            warm: Whether to spawn all workers up front and import PyMuPDF in them
+        """
+        if self._executor is not None:
+            return
+
+        logger.info(f"Starting extraction engine with {self.max_workers} worker(s)")
+        self._executor = self._create_executor()
+
+        if warm:
+            loop = asyncio.get_running_loop()
+            pids = await asyncio.gather(*[
+                loop.run_in_executor(self._executor, _warm_up_worker)
+                for _ in range(self.max_workers)
+            ])
+            logger.info(f"Extraction workers warmed up: {sorted(set(pids))}")
+
+    async def shutdown(self):
+        """Stop the pool, cancelling jobs that haven't started yet"""
+        if self._executor is None:
+            return
+        logger.info("Shutting down extraction engine")
+        executor, self._executor = self._executor, None
+        await asyncio.get_running_loop().run_in_executor(
+            None, lambda: executor.shutdown(wait=True, cancel_futures=True)
+        )
+
+    def _create_executor(self) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(max_workers=self.max_workers, mp_context=_mp_context())
+
+    def _replace_broken_executor(self, broken: ProcessPoolExecutor):
+        # Współbieżne zadania z tej samej puli widzą ten sam błąd - pulę odtwarza tylko pierwsze
+        if self._executor is not broken:
+            return
+        logger.warning("Extraction worker process died, recreating the process pool")
+        self._executor = self._create_executor()
+        self.pool_restarts += 1
+        broken.shutdown(wait=False, cancel_futures=True)
+
+    async def _submit(self, deadline: float, fn, *args):
+        """Submit a job to the pool and await it until the deadline
+
+        The job receives the deadline as its last argument so a running worker
+        can stop on its own; a job that is still queued is cancelled outright.
+        A job lost to a dead worker (BrokenProcessPool) is retried once on a
+        new pool.
+        """
+        if self._executor is None:
+            # Leniwy start, np. gdy serwis jest użyty poza aplikacją (testy, skrypty)
+            await self.start(warm=False)
+
+        executor = self._executor
+        try:
+            return await self._run_job(executor, deadline, fn, *args)
+        except BrokenProcessPool:
+            self._replace_broken_executor(executor)
+        executor = self._executor
+        if executor is None:
+            raise ExtractionError("Extraction engine was shut down")
+        try:
+            return await self._run_job(executor, deadline, fn, *args)
+        except BrokenProcessPool:
+            self._replace_broken_executor(executor)
+            raise ExtractionError("Extraction worker process died while processing the document")
+
+    async def _run_job(self, executor: ProcessPoolExecutor, deadline: float, fn, *args):
+        loop = asyncio.get_running_loop()
+        traceparent = tracer.traceparent()
+        if traceparent is not None:
+            # Span workera wraca z wynikiem i jest eksportowany w tym procesie
+            future = loop.run_in_executor(executor, run_traced, traceparent, fn.__name__, fn, *args, deadline)
+        else:
+            future = loop.run_in_executor(executor, fn, *args, deadline)
+        try:
+            result = await asyncio.wait_for(future, timeout=max(0.0, deadline - time.time()))
+        except asyncio.TimeoutError:
+            raise ExtractionTimeoutError("Extraction deadline exceeded while waiting for a worker")
+        if traceparent is not None:
+            result, spans = result
+            tracer.export(spans)
+        return result
+
+    async def extract_pages(self, file_path: str, timeout: Optional[float] = None) -> List[str]:
+        """Extract the text of every page of a PDF in worker processes
+
+        Small documents are read in a single pass by one worker. Documents with
+        at least `parallel_threshold` pages are split into page ranges that are
+        extracted concurrently and joined back in page order.
+
+        Args:
+            file_path: Path to the PDF file
+            timeout: Per-job timeout in seconds, defaults to the engine timeout
+
+        Returns:
+            List with the text of each page, in page order
+
+        Raises:
+            InvalidPDFError: If the file is not a valid PDF
+            ExtractionTimeoutError: If the job exceeded the timeout
+        """
+        file_path = str(file_path)
+        deadline = time.time() + (self.timeout if timeout is None else timeout)
+
+        page_count, pages = await self._submit(deadline, _extract_pdf_text, file_path, self.parallel_threshold)
+        if pages is not None:
+            return pages
+
+        ranges = split_page_ranges(page_count, self.max_workers, self.min_pages_per_range)
+        logger.info(f"Extracting {page_count} pages of {file_path} in {len(ranges)} parallel range(s)")
+        parts = await asyncio.gather(*[
+            self._submit(deadline, _extract_page_range, file_path, start, stop)
+            for start, stop in ranges
+        ])
+        return [page for part in parts for page in part]
+
+    async def extract_metadata(self, file_path: str, timeout: Optional[float] = None) -> Dict[str, Optional[object]]:
+        """Read the title, author and page count of a PDF in a worker process
+
+        Args:
+            file_path: Path to the PDF file
+            timeout: Job timeout in seconds, defaults to the engine timeout
+
+        Returns:
+            Dict with "title" and "author" (None when missing) and "page_count"
+
+        Raises:
+            InvalidPDFError: If the file is not a valid PDF
+            ExtractionTimeoutError: If the job exceeded the timeout
+        """
+        deadline = time.time() + (self.timeout if timeout is None else timeout)
+        return await self._submit(deadline, _read_metadata, str(file_path))
+
+    async def extract_text(self, file_path: str, timeout: Optional[float] = None) -> str:
+        """Extract the full text of a PDF in worker processes
+
+        Args:
+            file_path: Path to the PDF file
+            timeout: Per-job timeout in seconds, defaults to the engine timeout
+
+        Returns:
+            Extracted text as string
+        """
+        return "".join(await self.extract_pages(file_path, timeout))
+
+    async def iter_pages(self, file_path: str, timeout: Optional[float] = None,
+                         pages_per_batch: int = EXTRACTION_STREAM_PAGES) -> AsyncIterator[PageText]:
+        """Stream the text of a PDF page by page, in page order
+
+        Large documents are extracted in small page batches with at most
+        `max_workers` batches in flight, so memory held by the consumer is
+        bounded by the batch size rather than by the document size. Closing
+        the iterator early cancels batches that haven't started yet.
+
+        Args:
+            file_path: Path to the PDF file
+            timeout: Timeout in seconds for the whole document
+            pages_per_batch: Number of pages extracted by one worker job
+
+        Yields:
+            PageText for every page of the document
+
+        Raises:
+            InvalidPDFError: If the file is not a valid PDF
+            ExtractionTimeoutError: If the job exceeded the timeout
+        """
+        file_path = str(file_path)
+        deadline = time.time() + (self.timeout if timeout is None else timeout)
+
+        page_count, pages = await self._submit(deadline, _extract_pdf_text, file_path, self.parallel_threshold)
+        if pages is not None:
+            for page_num, text in enumerate(pages, start=1):
+                yield PageText(page_num, text)
+            return
+
+        batches = [(start, min(start + pages_per_batch, page_count))
+                   for start in range(0, page_count, pages_per_batch)]
+        pending = []
+        try:
+            for start, stop in batches:
+                pending.append((start, asyncio.ensure_future(
+                    self._submit(deadline, _extract_page_range, file_path, start, stop)
+                )))
+                # Ograniczamy liczbę porcji w locie do liczby procesów
+                if len(pending) < self.max_workers:
+                    continue
+                batch_start, task = pending.pop(0)
+                for offset, text in enumerate(await task):
+                    yield PageText(batch_start + offset + 1, text)
+
+            while pending:
+                batch_start, task = pending.pop(0)
+                for offset, text in enumerate(await task):
+                    yield PageText(batch_start + offset + 1, text)
+        finally:
+            for _, task in pending:
+                task.cancel()
+
+
+# Współdzielona instancja uruchamiana w lifespan aplikacji
+extraction_engine = ExtractionEngine()
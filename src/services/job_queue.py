@@ -0,0 +1,267 @@
+import asyncio
+import logging
+import os
+import uuid
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from datetime import datetime
+from enum import Enum
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from uuid import UUID
+
+from fastapi import HTTPException
+
+from models.summary import SummaryOptions
+from services.tracing import tracer
+
+# Konfiguracja loggera
+logger = logging.getLogger(__name__)
+
+# Podsumowania generowane w tle; "false" przywraca synchroniczne POST
+SUMMARY_JOBS_ENABLED = os.getenv("SUMMARY_JOBS_ENABLED", "true").lower() == "true"
+# Liczba równoległych zadań podsumowania
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "4"))
+# Maksymalna liczba zadań oczekujących w kolejce
+JOB_MAX_QUEUE = int(os.getenv("JOB_MAX_QUEUE", "1000"))
+# Liczba zakończonych zadań przechowywanych do odpytywania o status
+JOB_RETENTION = int(os.getenv("JOB_RETENTION", "1000"))
+# Implementacja kolejki: "memory" (jeden proces) albo "postgres" (trwała, wiele węzłów)
+JOB_QUEUE_BACKEND = os.getenv("JOB_QUEUE_BACKEND", "memory")
+
+
+class JobQueueFullError(Exception):
+    """Raised when the job queue is at capacity"""
+    def __init__(self, message: str):
+        self.message = message
+        super().__init__(self.message)
+
+
+class JobState(str, Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+    # Wyczerpane ponowienia (tylko kolejka Postgres)
+    DEAD = "dead"
+
+
+@dataclass
+class SummaryJob:
+    """State of one background summarization job"""
+    document_id: UUID
+    user_id: Optional[str] = None
+    options: Optional[SummaryOptions] = None
+    id: UUID = field(default_factory=uuid.uuid4)
+    state: JobState = JobState.QUEUED
+    stage: str = "queued"
+    progress: float = 0.0
+    attempts: int = 0
+    created_at: datetime = field(default_factory=datetime.now)
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    summary_id: Optional[str] = None
+    error: Optional[str] = None
+    status_code: Optional[int] = None
+    # Profil zadania (services.profiling); nie jest zapisywany w kolejce Postgres
+    profile_id: Optional[str] = None
+    # Kontekst W3C trace żądania, które zleciło zadanie (services.tracing)
+    traceparent: Optional[str] = None
+
+    @property
+    def finished(self) -> bool:
+        return self.state in (JobState.SUCCEEDED, JobState.FAILED, JobState.DEAD)
+
+    def update_progress(self, stage: str, fraction: float):
+        """Progress callback passed to SummaryService.create_summary
+
+        Progress never goes backwards, even if a stage reports a lower
+        estimate (e.g. when more chunks arrive from a streamed document).
+        """
+        self.stage = stage
+        self.progress = max(self.progress, min(1.0, fraction))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": str(self.id),
+            "document_id": str(self.document_id),
+            "options": self.options.model_dump() if self.options else None,
+            "state": self.state.value,
+            "stage": self.stage,
+            "progress": round(self.progress, 3),
+            "attempts": self.attempts,
+            "created_at": self.created_at.isoformat(),
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+            "summary_id": self.summary_id,
+            "error": self.error,
+            "status_code": self.status_code,
+        }
+
+
+class JobQueue:
+    """In-process queue of summarization jobs drained by a pool of worker tasks
+
+    POST handlers enqueue a job and return immediately; clients poll
+    GET /api/jobs/{id}. Job state lives in memory, so it is lost on restart
+    and is only visible on the node that accepted the job.
+    """
+
+    def __init__(self, workers: int = JOB_WORKERS, max_queue_size: int = JOB_MAX_QUEUE,
+                 retention: int = JOB_RETENTION):
+        """Initialize the queue
+
+        Args:
+            workers: Number of jobs processed concurrently
+            max_queue_size: Maximum number of jobs waiting in the queue
+            retention: Number of finished jobs kept for status polling
+        """
+        self.workers = workers
+        self.max_queue_size = max_queue_size
+        self.retention = retention
+        self._handler: Optional[Callable[[SummaryJob], Awaitable[Any]]] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._jobs: "OrderedDict[UUID, SummaryJob]" = OrderedDict()
+        self._finished: deque = deque()
+
+        # Metryki
+        self.submitted_total = 0
+        self.succeeded_total = 0
+        self.failed_total = 0
+        self.rejected_total = 0
+
+    @property
+    def running(self) -> bool:
+        return any(not task.done() for task in self._tasks)
+
+    async def start(self, handler: Callable[[SummaryJob], Awaitable[Any]]):
+        """Start the worker pool
+
+        Args:
+            handler: Coroutine function processing one job; it returns the
+                created summary and reports progress through job.update_progress
+        """
+        if self.running:
+            return
+        self._handler = handler
+        self._queue = asyncio.Queue(maxsize=self.max_queue_size)
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        logger.info(f"Job queue started with {self.workers} workers")
+
+    async def stop(self):
+        """Stop the workers; jobs still queued or running are marked failed"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        for job in self._jobs.values():
+            if not job.finished:
+                self._fail(job, 503, "The server shut down before the job finished")
+
+    async def submit(self, document_id: UUID, user_id: Optional[str] = None,
+                     options: Optional[SummaryOptions] = None, profile_id: Optional[str] = None) -> SummaryJob:
+        """Enqueue a summarization job
+
+        Args:
+            document_id: UUID of the document to summarize
+            user_id: Owner of the job, only they can read its status
+            options: Summary options; None means the options submitted with the upload
+            profile_id: Profile ID if the submitting request is being profiled
+
+        Returns:
+            The queued job
+
+        Raises:
+            JobQueueFullError: If the queue is at capacity
+        """
+        if not self.running:
+            raise RuntimeError("Job queue is not running")
+        job = SummaryJob(document_id=document_id, user_id=user_id, options=options, profile_id=profile_id,
+                         traceparent=tracer.traceparent())
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            self.rejected_total += 1
+            raise JobQueueFullError("Summary job queue is full")
+        self._jobs[job.id] = job
+        self.submitted_total += 1
+        logger.info(f"Queued summary job {job.id} for document {document_id}")
+        return job
+
+    async def get(self, job_id: UUID) -> Optional[SummaryJob]:
+        return self._jobs.get(job_id)
+
+    async def _worker(self):
+        while True:
+            job = await self._queue.get()
+            try:
+                await self._run(job)
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job: SummaryJob):
+        job.state = JobState.RUNNING
+        job.attempts += 1
+        job.started_at = datetime.now()
+        job.update_progress("starting", 0.0)
+        try:
+            summary = await self._handler(job)
+        except HTTPException as e:
+            self._fail(job, e.status_code, str(e.detail))
+            return
+        except Exception as e:
+            logger.error(f"Summary job {job.id} failed: {str(e)}")
+            self._fail(job, 500, "An unexpected error occurred while generating the summary")
+            return
+
+        job.summary_id = str(summary["id"])
+        job.state = JobState.SUCCEEDED
+        job.update_progress("done", 1.0)
+        job.finished_at = datetime.now()
+        self.succeeded_total += 1
+        self._retire(job)
+        logger.info(f"Summary job {job.id} finished in "
+                    f"{(job.finished_at - job.started_at).total_seconds():.2f}s")
+
+    def _fail(self, job: SummaryJob, status_code: int, error: str):
+        job.state = JobState.FAILED
+        job.stage = "failed"
+        job.status_code = status_code
+        job.error = error
+        job.finished_at = datetime.now()
+        self.failed_total += 1
+        self._retire(job)
+
+    def _retire(self, job: SummaryJob):
+        """Keep only the most recent finished jobs"""
+        self._finished.append(job.id)
+        while len(self._finished) > self.retention:
+            self._jobs.pop(self._finished.popleft(), None)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return queue depth and job counters"""
+        return {
+            "running": self.running,
+            "backend": "memory",
+            "workers": self.workers,
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "active_jobs": sum(1 for job in self._jobs.values() if job.state == JobState.RUNNING),
+            "submitted_total": self.submitted_total,
+            "succeeded_total": self.succeeded_total,
+            "failed_total": self.failed_total,
+            "rejected_total": self.rejected_total,
+        }
+
+
+def create_job_queue(backend: str = JOB_QUEUE_BACKEND):
+    """Create the job queue implementation selected by JOB_QUEUE_BACKEND"""
+    if backend == "postgres":
+        from services.pg_job_queue import PostgresJobQueue
+        return PostgresJobQueue()
+    if backend != "memory":
+        raise ValueError(f"Unknown job queue backend: {backend}")
+    return JobQueue()
+
+
+# Współdzielona kolejka zadań podsumowania uruchamiana w lifespan aplikacji
+job_queue = create_job_queue()
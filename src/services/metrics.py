@@ -0,0 +1,156 @@
+import bisect
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+# Granice kubełków w sekundach - od plików statycznych po długie podsumowania
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Gauge:
+    """Value that goes up and down, e.g. requests in flight"""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, amount: float = 1):
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def dec(self, *labels: str, amount: float = 1):
+        self.inc(*labels, amount=-amount)
+
+    def set(self, value: float, *labels: str):
+        self._values[labels] = value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} gauge"]
+        for labels, value in sorted(self._values.items()):
+            lines.append(f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}")
+        return lines
+
+
+class Histogram:
+    """Cumulative latency histogram in the Prometheus exposition format
+
+    Observations are counted in the first bucket whose bound is not
+    smaller than the value; cumulative counts are computed on render,
+    so an observation costs one bisect and two additions.
+    """
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> (liczniki kubełków z +Inf na końcu, suma)
+        self._series: Dict[Tuple[str, ...], Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, *labels: str):
+        """Record one observation (in seconds) for the given label values"""
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = ([0] * (len(self.buckets) + 1), [0.0])
+        counts, total = series
+        counts[bisect.bisect_left(self.buckets, value)] += 1
+        total[0] += value
+
+    def count(self, *labels: str) -> int:
+        series = self._series.get(labels)
+        return sum(series[0]) if series else 0
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        for labels, (counts, total) in sorted(self._series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = _format_labels(self.labelnames, labels, f'le="{_format_value(bound)}"')
+                lines.append(f"{self.name}_bucket{le} {cumulative}")
+            label_text = _format_labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{label_text} {_format_value(total[0])}")
+            lines.append(f"{self.name}_count{label_text} {cumulative}")
+        return lines
+
+
+def render_gauges(name: str, documentation: str, labelname: Optional[str],
+                  samples: Iterable[Tuple[Optional[str], float]]) -> List[str]:
+    """Render values read from component stats() as one gauge family
+
+    Args:
+        name: Metric name
+        documentation: HELP text
+        labelname: Name of the label distinguishing the samples, None for a single sample
+        samples: (label value, value) pairs
+    """
+    gauge = Gauge(name, documentation, (labelname,) if labelname else ())
+    for label, value in samples:
+        if labelname:
+            gauge.set(value, label)
+        else:
+            gauge.set(value)
+    return gauge.render()
+
+
+# Metryki HTTP, aktualizowane przez middleware log_requests
+http_request_duration = Histogram(
+    "docsum_http_request_duration_seconds", "HTTP request latency by route template",
+    ("method", "route", "status"),
+)
+http_requests_in_flight = Gauge(
+    "docsum_http_requests_in_flight", "HTTP requests being processed", ("method",),
+)
+
+# Etapy pipeline'u podsumowań
+pipeline_stage_duration = Histogram(
+    "docsum_pipeline_stage_duration_seconds", "Duration of summary pipeline stages", ("stage",),
+)
+pipeline_stages_in_flight = Gauge(
+    "docsum_pipeline_stages_in_flight", "Summary pipeline stages currently running", ("stage",),
+)
+
+
+@contextmanager
+def pipeline_stage(stage: str) -> Iterator[None]:
+    """Time a summary pipeline stage and count it as in flight while it runs
+
+    Args:
+        stage: file_save, extract_text, generate_summary, persistence or pdf_export
+    """
+    pipeline_stages_in_flight.inc(stage)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        pipeline_stage_duration.observe(time.perf_counter() - start, stage)
+        pipeline_stages_in_flight.dec(stage)
+
+
+def render_metrics(extra: Iterable[List[str]] = ()) -> str:
+    """Exposition text of the module metrics followed by extra metric families"""
+    families = [http_request_duration.render(), http_requests_in_flight.render(),
+                pipeline_stage_duration.render(), pipeline_stages_in_flight.render()]
+    families.extend(extra)
+    return "\n".join(line for family in families for line in family) + "\n"
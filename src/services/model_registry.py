@@ -0,0 +1,136 @@
+import asyncio
+import logging
+import os
+import time
+from typing import Any, Dict, Optional
+
+from services.backends import MockSciBertModel
+
+# Konfiguracja loggera
+logger = logging.getLogger(__name__)
+
+# Wybór backendu podsumowań: "mock", "textrank" (ekstrakcyjny, CPU), "scibert" lub "onnx"
+SUMMARIZER_BACKEND = os.getenv("SUMMARIZER_BACKEND", "mock")
+
+# Tekst używany do rozgrzania modelu po załadowaniu
+WARM_UP_TEXT = (
+    "We propose a new method for summarizing scientific papers. "
+    "Experiments on three datasets show consistent improvements over strong baselines."
+)
+
+
+class ModelRegistry:
+    """Process-wide holder of the summarization model
+
+    The model is loaded and warmed up once in the application lifespan and
+    then shared by every SummaryService instance, so requests never pay the
+    load cost.
+    """
+
+    def __init__(self, backend: str = SUMMARIZER_BACKEND):
+        self.backend = backend
+        self._model: Optional[Any] = None
+        self._lock = asyncio.Lock()
+        self.load_seconds: Optional[float] = None
+        self.error: Optional[str] = None
+
+    @property
+    def ready(self) -> bool:
+        return self._model is not None
+
+    def _load_scibert_model(self):
+        """Load the SciBert model for text summarization
+
+        Runs the seq2seq model named by SCIBERT_MODEL_NAME in PyTorch eager
+        mode. Without a configured model the mock is used, as before.
+        """
+        from services.backends.seq2seq import SCIBERT_MODEL_NAME, Seq2SeqBackend
+        if not SCIBERT_MODEL_NAME:
+            # Tymczasowo zwracamy mock
+            logger.info("SCIBERT_MODEL_NAME not set, using mock SciBert model")
+            return MockSciBertModel()
+        logger.info(f"Loading SciBert model {SCIBERT_MODEL_NAME}")
+        return Seq2SeqBackend(SCIBERT_MODEL_NAME)
+
+    def _load_onnx_model(self):
+        """Load the SciBert model exported to ONNX (int8) and run it on ONNX Runtime"""
+        from services.backends.onnx_runtime import OnnxSeq2SeqBackend
+        from services.backends.seq2seq import SCIBERT_MODEL_NAME
+        logger.info(f"Loading ONNX Runtime model {SCIBERT_MODEL_NAME}")
+        return OnnxSeq2SeqBackend(SCIBERT_MODEL_NAME)
+
+    def _load_textrank_model(self):
+        """Load the NumPy/SciPy extractive backend"""
+        from services.backends.textrank import TextRankBackend
+        return TextRankBackend()
+
+    def _load_backend(self):
+        """Load the configured summarization backend
+
+        Falls back to the mock model when the backend's optional
+        dependencies are not installed or no model is configured.
+        """
+        loaders = {
+            "textrank": self._load_textrank_model,
+            "scibert": self._load_scibert_model,
+            "onnx": self._load_onnx_model,
+            "mock": MockSciBertModel,
+        }
+        if self.backend not in loaders:
+            raise ValueError(f"Unknown summarizer backend: {self.backend}")
+        try:
+            return loaders[self.backend]()
+        except (ImportError, ValueError) as e:
+            logger.warning(f"Summarizer backend '{self.backend}' unavailable ({str(e)}), using mock model")
+            return MockSciBertModel()
+
+    def _warm_up(self, model):
+        """Run one inference so lazy initialisation happens before the first request"""
+        model.generate([WARM_UP_TEXT], max_words=10)
+
+    async def load(self):
+        """Load and warm up the model (idempotent)
+
+        Loading runs in a thread so the event loop keeps serving requests
+        (e.g. health checks) while a large model is being read from disk.
+        """
+        async with self._lock:
+            if self._model is not None:
+                return
+            start = time.perf_counter()
+            try:
+                model = await asyncio.to_thread(self._load_backend)
+                await asyncio.to_thread(self._warm_up, model)
+            except Exception as e:
+                self.error = str(e)
+                logger.error(f"Error loading summarization model: {str(e)}")
+                raise
+            self._model = model
+            self.error = None
+            self.load_seconds = time.perf_counter() - start
+            logger.info(f"Summarization model {model.name} ready in {self.load_seconds:.2f}s")
+
+    async def get_model(self):
+        """Return the loaded model, loading it first if the lifespan hook didn't
+
+        Returns:
+            The shared model instance
+        """
+        if self._model is None:
+            logger.warning("Summarization model requested before startup load - loading now")
+            await self.load()
+        return self._model
+
+    def status(self) -> Dict[str, Any]:
+        """Return model readiness information for the health check"""
+        return {
+            "ready": self.ready,
+            "name": getattr(self._model, "name", None),
+            "version": getattr(self._model, "version", None),
+            "load_seconds": self.load_seconds,
+            "error": self.error,
+        }
+
+
+# Współdzielony rejestr modelu ładowany w lifespan aplikacji
+model_registry = ModelRegistry()
@@ -0,0 +1,376 @@
+import asyncio
+import json
+import logging
+import os
+import random
+import socket
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from uuid import UUID
+
+from fastapi import HTTPException
+from sqlalchemy import text
+
+from db.database import engine
+from models.summary import SummaryOptions
+from services.job_queue import JOB_WORKERS, JobState, SummaryJob
+from services.tracing import tracer
+
+# Konfiguracja loggera
+logger = logging.getLogger(__name__)
+
+# Czas dzierżawy zadania - po jego upływie bez heartbeatu zadanie wraca do kolejki
+JOB_LEASE_SECONDS = float(os.getenv("JOB_LEASE_SECONDS", "60"))
+# Co ile sekund worker przedłuża dzierżawę i zapisuje postęp
+JOB_HEARTBEAT_SECONDS = float(os.getenv("JOB_HEARTBEAT_SECONDS", "10"))
+# Przerwa między zapytaniami o nowe zadania, gdy kolejka jest pusta
+JOB_POLL_SECONDS = float(os.getenv("JOB_POLL_SECONDS", "1"))
+# Liczba prób przed przeniesieniem zadania do stanu "dead"
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "5"))
+# Wykładniczy backoff ponowień: podstawa i górny limit w sekundach
+JOB_RETRY_BASE_SECONDS = float(os.getenv("JOB_RETRY_BASE_SECONDS", "5"))
+JOB_RETRY_MAX_SECONDS = float(os.getenv("JOB_RETRY_MAX_SECONDS", "600"))
+
+_COLUMNS = ("id, document_id, user_id, options, state, stage, progress, attempts, created_at, "
+            "started_at, finished_at, summary_id, error, status_code, traceparent, profile_id")
+
+_INSERT = text(f"""
+    insert into scisummarize.summary_jobs (document_id, user_id, options, max_attempts, traceparent, profile_id)
+    values (:document_id, :user_id, cast(:options as jsonb), :max_attempts, :traceparent, :profile_id)
+    returning {_COLUMNS}
+""")
+
+_SELECT = text(f"select {_COLUMNS} from scisummarize.summary_jobs where id = :id")
+
+# Najstarsze gotowe zadanie; SKIP LOCKED pomija wiersze, które właśnie przejmuje inny worker
+_CLAIM = text(f"""
+    update scisummarize.summary_jobs
+    set state = 'running', stage = 'starting', attempts = attempts + 1, locked_by = :worker,
+        lease_expires_at = now() + make_interval(secs => :lease), heartbeat_at = now(),
+        started_at = coalesce(started_at, now())
+    where id = (
+        select id from scisummarize.summary_jobs
+        where state = 'queued' and run_after <= now()
+        order by run_after
+        for update skip locked
+        limit 1
+    )
+    returning {_COLUMNS}
+""")
+
+_HEARTBEAT = text("""
+    update scisummarize.summary_jobs
+    set lease_expires_at = now() + make_interval(secs => :lease), heartbeat_at = now(),
+        stage = :stage, progress = :progress
+    where id = :id and locked_by = :worker and state = 'running'
+""")
+
+_SUCCEED = text("""
+    update scisummarize.summary_jobs
+    set state = 'succeeded', stage = 'done', progress = 1, summary_id = :summary_id,
+        error = null, status_code = null, locked_by = null, lease_expires_at = null, finished_at = now()
+    where id = :id and locked_by = :worker
+""")
+
+# Błąd: ponowienie z opóźnieniem albo stan końcowy ("failed" dla błędów klienta, "dead" po wyczerpaniu prób)
+_FAIL = text("""
+    update scisummarize.summary_jobs
+    set state = case when :retry and attempts < max_attempts then 'queued'
+                     when :retry then 'dead' else 'failed' end,
+        stage = case when :retry and attempts < max_attempts then 'retrying' else 'failed' end,
+        run_after = now() + make_interval(secs => :delay),
+        error = :error, status_code = :status_code, locked_by = null, lease_expires_at = null,
+        finished_at = case when :retry and attempts < max_attempts then null else now() end
+    where id = :id and locked_by = :worker
+    returning state
+""")
+
+# Zadania workerów, które przestały wysyłać heartbeat (awaria, restart węzła)
+_REAP = text("""
+    update scisummarize.summary_jobs
+    set state = case when attempts < max_attempts then 'queued' else 'dead' end,
+        stage = case when attempts < max_attempts then 'retrying' else 'failed' end,
+        error = 'Worker lease expired', locked_by = null, lease_expires_at = null,
+        finished_at = case when attempts < max_attempts then null else now() end
+    where state = 'running' and lease_expires_at < now()
+    returning id, state
+""")
+
+# Przy zatrzymaniu węzła zadania w toku wracają od razu do kolejki, bez zużycia próby
+_RELEASE = text("""
+    update scisummarize.summary_jobs
+    set state = 'queued', stage = 'queued', attempts = greatest(attempts - 1, 0),
+        locked_by = null, lease_expires_at = null, run_after = now()
+    where state = 'running' and locked_by = any(:workers)
+""")
+
+
+def retry_delay(attempt: int, base: float = JOB_RETRY_BASE_SECONDS, cap: float = JOB_RETRY_MAX_SECONDS) -> float:
+    """Exponential backoff with full jitter
+
+    Args:
+        attempt: Number of the attempt that just failed (1-based)
+        base: Delay after the first failure
+        cap: Maximum delay
+
+    Returns:
+        Delay in seconds before the job becomes claimable again
+    """
+    return random.uniform(0, min(cap, base * 2 ** (attempt - 1)))
+
+
+def _is_retryable(status_code: int) -> bool:
+    # Błędy klienta (np. uszkodzony PDF) nie znikną po ponowieniu
+    return status_code >= 500
+
+
+def _options_from_column(value) -> Optional[SummaryOptions]:
+    # asyncpg zwraca jsonb jako tekst, jeśli nie zarejestrowano kodeka
+    if value is None:
+        return None
+    if isinstance(value, str):
+        return SummaryOptions.model_validate_json(value)
+    return SummaryOptions.model_validate(value)
+
+
+def _job_from_row(row) -> SummaryJob:
+    return SummaryJob(
+        id=row.id,
+        document_id=row.document_id,
+        user_id=row.user_id,
+        options=_options_from_column(row.options),
+        state=JobState(row.state),
+        stage=row.stage,
+        progress=row.progress,
+        attempts=row.attempts,
+        created_at=row.created_at,
+        started_at=row.started_at,
+        finished_at=row.finished_at,
+        summary_id=str(row.summary_id) if row.summary_id else None,
+        error=row.error,
+        status_code=row.status_code,
+        traceparent=row.traceparent,
+        profile_id=row.profile_id,
+    )
+
+
+class PostgresJobQueue:
+    """Durable job queue in the scisummarize.summary_jobs table
+
+    Same interface as JobQueue, but jobs survive restarts and any number of
+    processes on any number of nodes can drain the queue. Workers claim jobs
+    with SELECT ... FOR UPDATE SKIP LOCKED, so a job is never handed to two
+    workers; a claimed job carries a lease that the worker extends with
+    heartbeats. Jobs whose lease expires (crashed worker) are put back in
+    the queue, failed attempts are retried with exponential backoff and jobs
+    that run out of attempts end up in the "dead" state for inspection.
+    """
+
+    def __init__(self, workers: int = JOB_WORKERS, lease_seconds: float = JOB_LEASE_SECONDS,
+                 heartbeat_seconds: float = JOB_HEARTBEAT_SECONDS, poll_seconds: float = JOB_POLL_SECONDS,
+                 max_attempts: int = JOB_MAX_ATTEMPTS):
+        """Initialize the queue
+
+        Args:
+            workers: Number of jobs this process runs concurrently (0 = enqueue only)
+            lease_seconds: Lease length of a claimed job
+            heartbeat_seconds: Interval of lease renewals and progress writes
+            poll_seconds: Sleep between claim attempts when the queue is empty
+            max_attempts: Attempts before a job is dead-lettered
+        """
+        self.workers = workers
+        self.lease_seconds = lease_seconds
+        self.heartbeat_seconds = heartbeat_seconds
+        self.poll_seconds = poll_seconds
+        self.max_attempts = max_attempts
+        self._handler: Optional[Callable[[SummaryJob], Awaitable[Any]]] = None
+        self._tasks: List[asyncio.Task] = []
+        self._worker_ids: List[str] = []
+        self._started = False
+        self._active = 0
+
+        # Metryki
+        self.submitted_total = 0
+        self.claimed_total = 0
+        self.succeeded_total = 0
+        self.failed_total = 0
+        self.retried_total = 0
+        self.dead_total = 0
+        self.lease_lost_total = 0
+        self.reaped_total = 0
+
+    @property
+    def running(self) -> bool:
+        # Węzeł bez workerów nadal przyjmuje zadania - wykonają je inne procesy
+        return self._started
+
+    async def start(self, handler: Callable[[SummaryJob], Awaitable[Any]]):
+        """Start the worker loops
+
+        Args:
+            handler: Coroutine function processing one job; it returns the
+                created summary and reports progress through job.update_progress
+        """
+        if self._started:
+            return
+        self._handler = handler
+        prefix = f"{socket.gethostname()}:{os.getpid()}"
+        self._worker_ids = [f"{prefix}:{n}" for n in range(self.workers)]
+        self._tasks = [asyncio.create_task(self._worker(worker_id)) for worker_id in self._worker_ids]
+        self._started = True
+        logger.info(f"Postgres job queue started with {self.workers} workers")
+
+    async def stop(self):
+        """Stop the workers and hand their running jobs back to the queue"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._started = False
+        if self._worker_ids:
+            try:
+                async with engine.begin() as conn:
+                    await conn.execute(_RELEASE, {"workers": self._worker_ids})
+            except Exception as e:
+                logger.error(f"Error releasing summary jobs: {str(e)}")
+
+    async def submit(self, document_id: UUID, user_id: Optional[str] = None,
+                     options: Optional[SummaryOptions] = None, profile_id: Optional[str] = None) -> SummaryJob:
+        """Insert a queued summarization job
+
+        Args:
+            document_id: UUID of the document to summarize
+            user_id: Owner of the job, only they can read its status
+            options: Summary options; None means the options submitted with the upload
+            profile_id: Profile ID if the submitting request is being profiled
+
+        Returns:
+            The queued job
+        """
+        async with engine.begin() as conn:
+            result = await conn.execute(_INSERT, {
+                "document_id": document_id, "user_id": user_id, "max_attempts": self.max_attempts,
+                "options": json.dumps(options.model_dump()) if options else None,
+                "traceparent": tracer.traceparent(), "profile_id": profile_id,
+            })
+            job = _job_from_row(result.one())
+        self.submitted_total += 1
+        logger.info(f"Queued summary job {job.id} for document {document_id}")
+        return job
+
+    async def get(self, job_id: UUID) -> Optional[SummaryJob]:
+        async with engine.connect() as conn:
+            row = (await conn.execute(_SELECT, {"id": job_id})).one_or_none()
+        return _job_from_row(row) if row is not None else None
+
+    async def _claim(self, worker_id: str) -> Optional[SummaryJob]:
+        async with engine.begin() as conn:
+            for job_id, state in (await conn.execute(_REAP)).all():
+                self.reaped_total += 1
+                logger.warning(f"Summary job {job_id} lease expired, moved to {state}")
+            row = (await conn.execute(_CLAIM, {"worker": worker_id, "lease": self.lease_seconds})).one_or_none()
+        return _job_from_row(row) if row is not None else None
+
+    async def _worker(self, worker_id: str):
+        while True:
+            try:
+                job = await self._claim(worker_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Error claiming summary job: {str(e)}")
+                job = None
+            if job is None:
+                await asyncio.sleep(self.poll_seconds)
+                continue
+
+            self.claimed_total += 1
+            self._active += 1
+            try:
+                await self._run(worker_id, job)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Błąd zapisu stanu - dzierżawa wygaśnie i zadanie wróci do kolejki
+                logger.error(f"Error finishing summary job {job.id}: {str(e)}")
+            finally:
+                self._active -= 1
+
+    async def _heartbeat(self, worker_id: str, job: SummaryJob, task: asyncio.Task):
+        """Extend the lease and store progress until the job task finishes"""
+        while not task.done():
+            await asyncio.sleep(self.heartbeat_seconds)
+            try:
+                async with engine.begin() as conn:
+                    result = await conn.execute(_HEARTBEAT, {
+                        "id": job.id, "worker": worker_id, "lease": self.lease_seconds,
+                        "stage": job.stage, "progress": job.progress,
+                    })
+            except Exception as e:
+                logger.error(f"Heartbeat of summary job {job.id} failed: {str(e)}")
+                continue
+            if result.rowcount == 0:
+                # Dzierżawę przejął ktoś inny - przerywamy, żeby nie liczyć zadania dwa razy
+                self.lease_lost_total += 1
+                logger.warning(f"Lost the lease of summary job {job.id}, cancelling it")
+                task.cancel()
+                return
+
+    async def _run(self, worker_id: str, job: SummaryJob):
+        task = asyncio.create_task(self._handler(job))
+        heartbeat = asyncio.create_task(self._heartbeat(worker_id, job, task))
+        try:
+            summary = await task
+        except asyncio.CancelledError:
+            if heartbeat.done():
+                # Anulowane przez utratę dzierżawy, nie przez zatrzymanie workera
+                return
+            task.cancel()
+            raise
+        except HTTPException as e:
+            await self._fail(worker_id, job, e.status_code, str(e.detail))
+            return
+        except Exception as e:
+            logger.error(f"Summary job {job.id} failed: {str(e)}")
+            await self._fail(worker_id, job, 500, "An unexpected error occurred while generating the summary")
+            return
+        finally:
+            heartbeat.cancel()
+
+        async with engine.begin() as conn:
+            await conn.execute(_SUCCEED, {"id": job.id, "worker": worker_id, "summary_id": summary["id"]})
+        self.succeeded_total += 1
+        logger.info(f"Summary job {job.id} finished (attempt {job.attempts})")
+
+    async def _fail(self, worker_id: str, job: SummaryJob, status_code: int, error: str):
+        retry = _is_retryable(status_code)
+        async with engine.begin() as conn:
+            row = (await conn.execute(_FAIL, {
+                "id": job.id, "worker": worker_id, "retry": retry, "error": error, "status_code": status_code,
+                "delay": retry_delay(job.attempts) if retry else 0.0,
+            })).one_or_none()
+        state = row.state if row is not None else None
+        if state == JobState.QUEUED.value:
+            self.retried_total += 1
+            logger.warning(f"Summary job {job.id} failed (attempt {job.attempts}), retrying: {error}")
+        elif state == JobState.DEAD.value:
+            self.dead_total += 1
+            logger.error(f"Summary job {job.id} dead-lettered after {job.attempts} attempts: {error}")
+        else:
+            self.failed_total += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Return this process's worker counters"""
+        return {
+            "running": self.running,
+            "backend": "postgres",
+            "workers": self.workers,
+            "active_jobs": self._active,
+            "submitted_total": self.submitted_total,
+            "claimed_total": self.claimed_total,
+            "succeeded_total": self.succeeded_total,
+            "failed_total": self.failed_total,
+            "retried_total": self.retried_total,
+            "dead_total": self.dead_total,
+            "lease_lost_total": self.lease_lost_total,
+            "reaped_total": self.reaped_total,
+        }
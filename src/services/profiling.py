@@ -0,0 +1,199 @@
+import asyncio
+import contextvars
+import functools
+import hmac
+import logging
+import os
+import random
+import re
+import uuid
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from fastapi import Request
+
+# Konfiguracja loggera
+logger = logging.getLogger(__name__)
+
+# Sekret nagłówka X-Profile-Token; bez niego profilowanie na żądanie jest wyłączone
+PROFILE_ADMIN_TOKEN = os.getenv("PROFILE_ADMIN_TOKEN")
+# Odsetek żądań profilowanych bez nagłówka
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+# Najstarsze profile są usuwane po przekroczeniu limitu
+PROFILE_MAX_FILES = int(os.getenv("PROFILE_MAX_FILES", "50"))
+# Interwał próbkowania pyinstrument
+PROFILE_INTERVAL_SECONDS = float(os.getenv("PROFILE_INTERVAL_SECONDS", "0.001"))
+
+PROFILE_TOKEN_HEADER = "X-Profile-Token"
+PROFILE_ID_HEADER = "X-Profile-Id"
+
+# Identyfikator profilu bieżącego żądania (lub zadania w tle); None - bez profilowania
+current_profile_id: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("current_profile_id", default=None)
+
+_REQUEST_ID = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+
+def is_profile_admin(request: Request) -> bool:
+    """Whether the request carries the profiling admin token"""
+    token = request.headers.get(PROFILE_TOKEN_HEADER)
+    return bool(PROFILE_ADMIN_TOKEN and token and hmac.compare_digest(token, PROFILE_ADMIN_TOKEN))
+
+
+def profile_id_for(request: Request, sample_rate: float = PROFILE_SAMPLE_RATE) -> Optional[str]:
+    """Profile ID for a request selected for profiling, None otherwise
+
+    A request is profiled when it carries the admin token or is picked by
+    PROFILE_SAMPLE_RATE. For admin requests the ID is their X-Request-ID, if
+    that is a safe file name; every other request gets a new random ID.
+    """
+    admin = is_profile_admin(request)
+    if not admin and not (sample_rate and random.random() < sample_rate):
+        return None
+    # Klient wybrany losowo nie może wybrać nazwy pliku ani nadpisać cudzego profilu
+    request_id = request.headers.get("X-Request-ID", "") if admin else ""
+    return request_id if _REQUEST_ID.match(request_id) else uuid.uuid4().hex
+
+
+class RequestProfiler:
+    """Profiles selected calls and keeps the output in a bounded directory
+
+    With pyinstrument installed, calls are sampled in async mode (only the
+    profiled task is attributed) and saved as an HTML flame view. Without
+    it, cProfile is used and saved as .pstats; cProfile traces the whole
+    thread, so other requests running meanwhile appear in the profile and
+    only one cProfile run can be active at a time.
+    """
+
+    def __init__(self, directory: str = PROFILE_DIR, max_files: int = PROFILE_MAX_FILES,
+                 interval: float = PROFILE_INTERVAL_SECONDS):
+        """Initialize the profiler
+
+        Args:
+            directory: Directory holding the profile files
+            max_files: Maximum number of profile files kept
+            interval: Sampling interval of pyinstrument in seconds
+        """
+        self.directory = Path(directory)
+        self.max_files = max_files
+        self.interval = interval
+        self._cprofile_active = False
+
+        # Metryki
+        self.profiles_written = 0
+        self.skipped = 0
+
+    @staticmethod
+    def _pyinstrument():
+        try:
+            import pyinstrument
+            return pyinstrument
+        except ImportError:
+            return None
+
+    @asynccontextmanager
+    async def profile(self, profile_id: str, name: str) -> AsyncIterator[None]:
+        """Profile the enclosed block and save the result as `<profile_id>.<name>.<ext>`"""
+        pyinstrument = self._pyinstrument()
+        if pyinstrument is not None:
+            profiler = pyinstrument.Profiler(interval=self.interval, async_mode="enabled")
+            profiler.start()
+            try:
+                yield
+            finally:
+                profiler.stop()
+                await self._save(f"{profile_id}.{name}.html", profiler.output_html)
+            return
+
+        if self._cprofile_active:
+            # cProfile nie obsługuje równoległych sesji w jednym wątku
+            self.skipped += 1
+            yield
+            return
+
+        import cProfile
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Inne narzędzie (np. coverage) używa już hooka profilującego
+            self.skipped += 1
+            yield
+            return
+        self._cprofile_active = True
+        try:
+            yield
+        finally:
+            profiler.disable()
+            self._cprofile_active = False
+            await self._save(f"{profile_id}.{name}.pstats", lambda: profiler)
+
+    async def _save(self, filename: str, render):
+        # Zapis i przycinanie katalogu poza pętlą zdarzeń
+        try:
+            await asyncio.to_thread(self._write, filename, render)
+            self.profiles_written += 1
+            logger.info(f"Saved profile {filename}")
+        except Exception as e:
+            logger.warning(f"Could not save profile {filename}: {str(e)}")
+
+    def _write(self, filename: str, render):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self.directory / filename
+        output = render()
+        if isinstance(output, str):
+            path.write_text(output, encoding="utf-8")
+        else:
+            output.dump_stats(str(path))
+        self._prune()
+
+    def _prune(self):
+        files = sorted(self.directory.iterdir(), key=lambda f: f.stat().st_mtime)
+        for old in files[:max(0, len(files) - self.max_files)]:
+            old.unlink(missing_ok=True)
+
+    def list_profiles(self) -> List[Dict[str, Any]]:
+        """Saved profiles, newest first"""
+        if not self.directory.exists():
+            return []
+        files = sorted(self.directory.iterdir(), key=lambda f: f.stat().st_mtime, reverse=True)
+        return [{"filename": f.name, "profile_id": f.name.split(".", 1)[0], "size_bytes": f.stat().st_size}
+                for f in files]
+
+    def get_path(self, filename: str) -> Optional[Path]:
+        """Path of a saved profile, None if there is no such file in the directory"""
+        if not self.directory.exists():
+            return None
+        for f in self.directory.iterdir():
+            if f.name == filename:
+                return f
+        return None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": "pyinstrument" if self._pyinstrument() is not None else "cProfile",
+            "profiles_written": self.profiles_written,
+            "skipped": self.skipped,
+        }
+
+
+def profiled(name: str):
+    """Decorator profiling an async function when the current request or job was selected
+
+    Without a profile ID in the context the call costs one ContextVar lookup.
+    """
+    def decorator(fn):
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            profile_id = current_profile_id.get()
+            if profile_id is None:
+                return await fn(*args, **kwargs)
+            async with request_profiler.profile(profile_id, name):
+                return await fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+# Współdzielony profiler żądań
+request_profiler = RequestProfiler()
@@ -0,0 +1,302 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import re
+import shutil
+import time
+import uuid
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from models.summary import SummaryOptions
+
+# Konfiguracja loggera
+logger = logging.getLogger(__name__)
+
+# Warstwy cache wyników, od najszybszej: "memory", "disk", "postgres"
+RESULT_CACHE_TIERS = os.getenv("RESULT_CACHE_TIERS", "memory,disk")
+# Czas życia wpisu - zgodny z 24-godzinnym wygasaniem dokumentów
+RESULT_CACHE_TTL_SECONDS = float(os.getenv("RESULT_CACHE_TTL_SECONDS", str(24 * 3600)))
+RESULT_CACHE_DIR = os.getenv("RESULT_CACHE_DIR", "cache/summaries")
+RESULT_CACHE_MEMORY_ENTRIES = int(os.getenv("RESULT_CACHE_MEMORY_ENTRIES", "2048"))
+
+# Treść podsumowania i czas wygaśnięcia (epoch)
+CacheEntry = Tuple[str, float]
+
+
+class ResultCacheTier(ABC):
+    """Storage tier of the summary result cache
+
+    Entries are grouped by model version so a model change can drop every
+    entry of the previous model at once.
+    """
+    name: str = "base"
+
+    @abstractmethod
+    async def get(self, model_version: str, key: str) -> Optional[CacheEntry]:
+        """Return the entry if present and not expired"""
+
+    @abstractmethod
+    async def put(self, model_version: str, key: str, content: str, expires_at: float):
+        """Store an entry"""
+
+    @abstractmethod
+    async def invalidate(self, keep_version: Optional[str] = None) -> int:
+        """Remove expired entries and entries of every model version except keep_version
+
+        Returns:
+            Number of removed entries (or version groups for the disk tier)
+        """
+
+
+class MemoryResultTier(ResultCacheTier):
+    """Bounded in-process LRU"""
+    name = "memory"
+
+    def __init__(self, max_entries: int = RESULT_CACHE_MEMORY_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[str, str], CacheEntry]" = OrderedDict()
+
+    async def get(self, model_version: str, key: str) -> Optional[CacheEntry]:
+        entry = self._entries.get((model_version, key))
+        if entry is None:
+            return None
+        if entry[1] <= time.time():
+            del self._entries[(model_version, key)]
+            return None
+        self._entries.move_to_end((model_version, key))
+        return entry
+
+    async def put(self, model_version: str, key: str, content: str, expires_at: float):
+        self._entries[(model_version, key)] = (content, expires_at)
+        self._entries.move_to_end((model_version, key))
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def invalidate(self, keep_version: Optional[str] = None) -> int:
+        now = time.time()
+        stale = [k for k, (_, expires_at) in self._entries.items() if k[0] != keep_version or expires_at <= now]
+        for k in stale:
+            del self._entries[k]
+        return len(stale)
+
+
+class DiskResultTier(ResultCacheTier):
+    """JSON files under <directory>/<model version>/<key[:2]>/<key>.json"""
+    name = "disk"
+
+    def __init__(self, directory: str = RESULT_CACHE_DIR):
+        self.directory = Path(directory)
+
+    def _version_dir(self, model_version: str) -> Path:
+        return self.directory / re.sub(r"[^\w.-]", "_", model_version)
+
+    def _path(self, model_version: str, key: str) -> Path:
+        return self._version_dir(model_version) / key[:2] / f"{key}.json"
+
+    def _get_sync(self, model_version: str, key: str) -> Optional[CacheEntry]:
+        path = self._path(model_version, key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"Dropping unreadable summary cache entry {path}: {str(e)}")
+            path.unlink(missing_ok=True)
+            return None
+        if data["expires_at"] <= time.time():
+            path.unlink(missing_ok=True)
+            return None
+        return data["content"], data["expires_at"]
+
+    def _put_sync(self, model_version: str, key: str, content: str, expires_at: float):
+        path = self._path(model_version, key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Zapis do pliku tymczasowego i atomowa podmiana
+        tmp_path = path.with_name(f".{path.name}.{uuid.uuid4().hex}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"content": content, "expires_at": expires_at}, f)
+        os.replace(tmp_path, path)
+
+    def _invalidate_sync(self, keep_version: Optional[str]) -> int:
+        if not self.directory.exists():
+            return 0
+        keep = self._version_dir(keep_version) if keep_version is not None else None
+        removed = 0
+        for version_dir in self.directory.iterdir():
+            if version_dir != keep:
+                shutil.rmtree(version_dir, ignore_errors=True)
+                removed += 1
+        if keep is not None and keep.exists():
+            now = time.time()
+            # Wpisy ważne dłużej niż TTL nie istnieją - wystarczy mtime
+            for entry in keep.glob("*/*.json"):
+                if entry.stat().st_mtime + RESULT_CACHE_TTL_SECONDS <= now:
+                    entry.unlink(missing_ok=True)
+        return removed
+
+    async def get(self, model_version: str, key: str) -> Optional[CacheEntry]:
+        return await asyncio.to_thread(self._get_sync, model_version, key)
+
+    async def put(self, model_version: str, key: str, content: str, expires_at: float):
+        await asyncio.to_thread(self._put_sync, model_version, key, content, expires_at)
+
+    async def invalidate(self, keep_version: Optional[str] = None) -> int:
+        return await asyncio.to_thread(self._invalidate_sync, keep_version)
+
+
+class PostgresResultTier(ResultCacheTier):
+    """Shared tier in scisummarize.summary_result_cache, visible to every node"""
+    name = "postgres"
+
+    async def get(self, model_version: str, key: str) -> Optional[CacheEntry]:
+        from sqlalchemy import text
+        from db.database import engine
+
+        async with engine.connect() as conn:
+            row = (await conn.execute(text("""
+                select content, extract(epoch from expires_at) as expires_at
+                from scisummarize.summary_result_cache
+                where model_version = :model_version and cache_key = :key and expires_at > now()
+            """), {"model_version": model_version, "key": key})).one_or_none()
+        return (row.content, float(row.expires_at)) if row is not None else None
+
+    async def put(self, model_version: str, key: str, content: str, expires_at: float):
+        from sqlalchemy import text
+        from db.database import engine
+
+        async with engine.begin() as conn:
+            await conn.execute(text("""
+                insert into scisummarize.summary_result_cache (model_version, cache_key, content, expires_at)
+                values (:model_version, :key, :content, to_timestamp(:expires_at))
+                on conflict (model_version, cache_key)
+                do update set content = excluded.content, expires_at = excluded.expires_at
+            """), {"model_version": model_version, "key": key, "content": content, "expires_at": expires_at})
+
+    async def invalidate(self, keep_version: Optional[str] = None) -> int:
+        from sqlalchemy import text
+        from db.database import engine
+
+        async with engine.begin() as conn:
+            result = await conn.execute(text("""
+                delete from scisummarize.summary_result_cache
+                where model_version is distinct from :keep_version or expires_at <= now()
+            """), {"keep_version": keep_version})
+        return result.rowcount
+
+
+_TIER_TYPES = {tier.name: tier for tier in (MemoryResultTier, DiskResultTier, PostgresResultTier)}
+
+
+class SummaryResultCache:
+    """Cache of final summaries keyed by document content, model version and options
+
+    Identical papers uploaded under different document IDs share one entry,
+    so only the first upload runs the pipeline. Lookups go through the
+    tiers in order and a hit in a slower tier is copied into the faster
+    ones. Tier errors are logged and treated as misses.
+    """
+
+    def __init__(self, tiers: List[ResultCacheTier], ttl_seconds: float = RESULT_CACHE_TTL_SECONDS):
+        """Initialize the cache
+
+        Args:
+            tiers: Storage tiers, fastest first
+            ttl_seconds: Lifetime of an entry
+        """
+        self.tiers = tiers
+        self.ttl_seconds = ttl_seconds
+        self.hits: Dict[str, int] = {tier.name: 0 for tier in tiers}
+        self.misses = 0
+        self.errors = 0
+
+    @classmethod
+    def from_config(cls, tiers: str = RESULT_CACHE_TIERS) -> "SummaryResultCache":
+        """Create the cache with the tiers listed in RESULT_CACHE_TIERS"""
+        names = [name.strip() for name in tiers.split(",") if name.strip()]
+        unknown = [name for name in names if name not in _TIER_TYPES]
+        if unknown:
+            raise ValueError(f"Unknown result cache tiers: {', '.join(unknown)}")
+        return cls([_TIER_TYPES[name]() for name in names])
+
+    @staticmethod
+    def key(content_hash: str, options: SummaryOptions) -> str:
+        """Cache key of a document's summary for the given (normalized) options"""
+        return hashlib.sha256(f"{content_hash}:{options.key()}".encode("utf-8")).hexdigest()
+
+    async def get(self, content_hash: str, model_version: str, options: SummaryOptions) -> Optional[str]:
+        """Look up a summary
+
+        Args:
+            content_hash: SHA-256 of the PDF file bytes
+            model_version: Version of the summarization model
+            options: Summary options
+
+        Returns:
+            Summary text, or None on a miss
+        """
+        key = self.key(content_hash, options)
+        for index, tier in enumerate(self.tiers):
+            try:
+                entry = await tier.get(model_version, key)
+            except Exception as e:
+                self.errors += 1
+                logger.warning(f"Summary cache tier {tier.name} failed on read: {str(e)}")
+                continue
+            if entry is not None:
+                self.hits[tier.name] += 1
+                for faster in self.tiers[:index]:
+                    await self._put_tier(faster, model_version, key, *entry)
+                return entry[0]
+        self.misses += 1
+        return None
+
+    async def put(self, content_hash: str, model_version: str, options: SummaryOptions, content: str):
+        """Store a summary in every tier"""
+        key = self.key(content_hash, options)
+        expires_at = time.time() + self.ttl_seconds
+        for tier in self.tiers:
+            await self._put_tier(tier, model_version, key, content, expires_at)
+
+    async def _put_tier(self, tier: ResultCacheTier, model_version: str, key: str, content: str, expires_at: float):
+        try:
+            await tier.put(model_version, key, content, expires_at)
+        except Exception as e:
+            # Cache jest tylko optymalizacją - błąd zapisu nie przerywa przetwarzania
+            self.errors += 1
+            logger.warning(f"Summary cache tier {tier.name} failed on write: {str(e)}")
+
+    async def invalidate(self, keep_version: Optional[str] = None):
+        """Drop expired entries and entries of other model versions
+
+        Called at startup with the loaded model's version; without a version
+        every entry is dropped.
+        """
+        for tier in self.tiers:
+            try:
+                removed = await tier.invalidate(keep_version)
+            except Exception as e:
+                self.errors += 1
+                logger.warning(f"Summary cache tier {tier.name} failed to invalidate: {str(e)}")
+                continue
+            if removed:
+                logger.info(f"Summary cache tier {tier.name}: invalidated {removed} stale entries")
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = sum(self.hits.values()) + self.misses
+        return {
+            "tiers": [tier.name for tier in self.tiers],
+            "hits": dict(self.hits),
+            "misses": self.misses,
+            "hit_ratio": sum(self.hits.values()) / lookups if lookups else 0.0,
+            "errors": self.errors,
+        }
+
+
+# Współdzielony cache wyników podsumowań
+summary_result_cache = SummaryResultCache.from_config()
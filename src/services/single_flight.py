@@ -0,0 +1,62 @@
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+# Konfiguracja loggera
+logger = logging.getLogger(__name__)
+
+
+class SingleFlight:
+    """Coalesces concurrent calls with the same key into one execution
+
+    The first caller (the leader) starts the work as a separate task; callers
+    arriving while it runs await the same task. The task is shielded, so a
+    caller that disconnects doesn't cancel the work for the others. Results
+    are not kept after the task finishes - that is the job of the caches.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._in_flight: Dict[Hashable, asyncio.Task] = {}
+
+        # Metryki
+        self.leaders_total = 0
+        self.coalesced_total = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]],
+                 on_join: Optional[Callable[[], None]] = None) -> Any:
+        """Run fn once for all concurrent callers with the same key
+
+        Args:
+            key: Identity of the work
+            fn: Coroutine function doing the work, called only by the leader
+            on_join: Called when this caller joins work already in flight
+
+        Returns:
+            Result of fn (exceptions are propagated to every caller)
+        """
+        task = self._in_flight.get(key)
+        if task is None:
+            self.leaders_total += 1
+            task = asyncio.create_task(fn())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        else:
+            self.coalesced_total += 1
+            logger.info(f"Coalesced duplicate {self.name} request")
+            if on_join is not None:
+                on_join()
+        return await asyncio.shield(task)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "in_flight": len(self._in_flight),
+            "leaders_total": self.leaders_total,
+            "coalesced_total": self.coalesced_total,
+        }
+
+
+# Jedno podsumowanie zapisywane na dokument i opcje
+document_flights = SingleFlight("document summary")
+# Jedno generowanie treści na (hash treści PDF, wersja modelu, opcje)
+content_flights = SingleFlight("summary content")
@@ -0,0 +1,181 @@
+import asyncio
+import logging
+import os
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+from uuid import UUID
+
+from models.summary import SummaryOptions
+
+# Konfiguracja loggera
+logger = logging.getLogger(__name__)
+
+# Praca rozpoczynana zaraz po zapisaniu uploadu: "off", "extract" (tylko ekstrakcja
+# tekstu do cache) albo "summarize" (ekstrakcja i podsumowanie z opcjami z formularza)
+SPECULATIVE_MODE = os.getenv("SPECULATIVE_MODE", "off")
+# Liczba dokumentów przetwarzanych spekulatywnie jednocześnie
+SPECULATIVE_CONCURRENCY = int(os.getenv("SPECULATIVE_CONCURRENCY", "2"))
+# Jak długo wynik czeka na żądanie podsumowania
+SPECULATIVE_TTL_SECONDS = float(os.getenv("SPECULATIVE_TTL_SECONDS", "3600"))
+SPECULATIVE_MAX_ENTRIES = int(os.getenv("SPECULATIVE_MAX_ENTRIES", "256"))
+
+
+@dataclass
+class _SpeculativeRun:
+    """Background work started for one uploaded document"""
+    options: SummaryOptions
+    task: asyncio.Task
+    started_at: float
+    attached: bool = False
+
+
+class SpeculativePipeline:
+    """Starts extraction (and optionally summarization) as soon as an upload is saved
+
+    The later summary request attaches to the in-flight run instead of
+    starting over; a finished run is handed to the first request after the
+    upload only, and only while its summary is still the document's
+    current one - later requests create a new summary. With mode "extract" the run only fills the
+    extracted text cache, which the summary request then reads. Runs are
+    per process: a request served by another node runs the pipeline itself.
+    """
+
+    def __init__(self, mode: str = SPECULATIVE_MODE, concurrency: int = SPECULATIVE_CONCURRENCY,
+                 ttl_seconds: float = SPECULATIVE_TTL_SECONDS, max_entries: int = SPECULATIVE_MAX_ENTRIES):
+        """Initialize the pipeline
+
+        Args:
+            mode: "off", "extract" or "summarize"
+            concurrency: Maximum number of documents processed at once
+            ttl_seconds: Runs older than this are forgotten
+            max_entries: Maximum number of remembered runs
+        """
+        if mode not in ("off", "extract", "summarize"):
+            raise ValueError(f"Unknown speculative pipeline mode: {mode}")
+        self.mode = mode
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._runs: "OrderedDict[UUID, _SpeculativeRun]" = OrderedDict()
+
+        # Metryki
+        self.started_total = 0
+        self.attached_total = 0
+        self.failed_total = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.mode != "off"
+
+    def start(self, document_id: UUID, file_path: str, options: SummaryOptions):
+        """Schedule background work for a freshly saved upload
+
+        Args:
+            document_id: UUID of the uploaded document
+            file_path: Path of the saved PDF
+            options: Summary options submitted with the upload
+        """
+        if not self.enabled:
+            return
+        self._expire()
+        task = asyncio.create_task(self._run(document_id, file_path, options))
+        task.add_done_callback(self._log_failure)
+        self._runs[document_id] = _SpeculativeRun(options, task, time.monotonic())
+        self.started_total += 1
+        logger.info(f"Speculative {self.mode} started for document {document_id}")
+
+    async def _run(self, document_id: UUID, file_path: str, options: SummaryOptions) -> Optional[Dict[str, Any]]:
+        from services.model_registry import model_registry
+        from services.summary_service import SummaryService
+
+        async with self._semaphore:
+            if self.mode == "extract":
+                # Wypełnia cache tekstu - późniejsze żądanie nie czeka na ekstrakcję
+                await SummaryService().extract_text(file_path)
+                return None
+            service = SummaryService(None, model=await model_registry.get_model())
+            return await service.create_summary(document_id, options)
+
+    def _log_failure(self, task: asyncio.Task):
+        if task.cancelled():
+            return
+        error = task.exception()
+        if error is not None:
+            # Błąd zostanie zgłoszony przez zwykłe żądanie, które przetworzy dokument od nowa
+            self.failed_total += 1
+            logger.warning(f"Speculative run failed: {str(error)}")
+
+    def _expire(self):
+        now = time.monotonic()
+        while self._runs:
+            document_id, run = next(iter(self._runs.items()))
+            if len(self._runs) < self.max_entries and now - run.started_at < self.ttl_seconds:
+                break
+            del self._runs[document_id]
+            if not run.task.done():
+                run.task.cancel()
+
+    def options_for(self, document_id: UUID) -> Optional[SummaryOptions]:
+        """Return the options submitted with the upload, if it started a run"""
+        run = self._runs.get(document_id)
+        return run.options if run is not None else None
+
+    async def _current_summary_id(self, document_id: UUID) -> Optional[str]:
+        from services.summary_store import summary_store
+
+        current = await summary_store.get_current(document_id)
+        return current.get("id") if current else None
+
+    async def attach(self, document_id: UUID, options: SummaryOptions) -> Optional[asyncio.Task]:
+        """Return the speculative summary task for these options, if one is usable
+
+        Args:
+            document_id: UUID of the document
+            options: Options of the summary request
+
+        Returns:
+            Task resolving to the created summary, or None when the request
+            has to run the pipeline itself (no run, different options, the
+            run only extracted text, it failed, its result was already
+            handed out or a newer summary has been saved since)
+        """
+        self._expire()
+        run = self._runs.get(document_id)
+        if run is None or self.mode != "summarize" or run.options != options:
+            return None
+        task = run.task
+        if task.done():
+            # Zakończony przebieg jest zużywany - kolejne żądanie tworzy nową wersję
+            del self._runs[document_id]
+            if run.attached or task.cancelled() or task.exception() is not None:
+                return None
+            summary_id = task.result().get("id")
+            if summary_id is None or await self._current_summary_id(document_id) != summary_id:
+                return None
+        run.attached = True
+        self.attached_total += 1
+        logger.info(f"Attached summary request for document {document_id} to its speculative run")
+        return task
+
+    async def stop(self):
+        """Cancel runs that are still in progress"""
+        for run in self._runs.values():
+            if not run.task.done():
+                run.task.cancel()
+        await asyncio.gather(*(run.task for run in self._runs.values()), return_exceptions=True)
+        self._runs.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "mode": self.mode,
+            "in_flight": sum(1 for run in self._runs.values() if not run.task.done()),
+            "started_total": self.started_total,
+            "attached_total": self.attached_total,
+            "failed_total": self.failed_total,
+        }
+
+
+# Współdzielony pipeline spekulatywny uruchamiany przez endpointy uploadu
+speculative_pipeline = SpeculativePipeline()
@@ -0,0 +1,187 @@
+import atexit
+import json
+import logging
+import os
+import queue
+import random
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Dict, List, Optional, Tuple
+
+# Odsetek zapisywanych zdarzeń z gorących ścieżek (wywołania z sampled=True)
+LOG_SAMPLE_RATE = float(os.getenv("LOG_SAMPLE_RATE", "0.01"))
+# Format rekordów zapisywanych przez listener: "text" (formattery handlerów) lub "json" (jeden obiekt na linię)
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text").lower()
+
+# Pola, których wartości nigdy nie trafiają do logów
+_REDACTED_FIELDS = {"token", "session_token", "access_token", "refresh_token", "cookie", "cookies", "password"}
+
+
+def redact(fields: Dict[str, Any]) -> Dict[str, Any]:
+    """Copy of event fields with secret values replaced"""
+    return {key: "[redacted]" if key in _REDACTED_FIELDS else value for key, value in fields.items()}
+
+
+class Event:
+    """Log message of a structured event, rendered as `event key=value ...`
+
+    Rendering happens in str(), i.e. when a handler formats the record -
+    with the queue sink that is the listener thread, not the event loop.
+    """
+    __slots__ = ("name", "fields")
+
+    def __init__(self, name: str, fields: Dict[str, Any]):
+        self.name = name
+        self.fields = fields
+
+    def __str__(self) -> str:
+        parts = [self.name]
+        parts.extend(f"{key}={value}" for key, value in redact(self.fields).items())
+        return " ".join(parts)
+
+
+class StructuredLogger:
+    """Level-gated, optionally sampled structured events on top of a stdlib logger
+
+    A disabled level costs one isEnabledFor() check; a sampled event that
+    isn't selected costs one random() call. Field values are only turned
+    into text when the record is formatted.
+    """
+
+    def __init__(self, name: str, sample_rate: float = LOG_SAMPLE_RATE):
+        self.logger = logging.getLogger(name)
+        self.sample_rate = sample_rate
+
+    def log(self, level: int, event: str, sampled: bool = False, **fields):
+        """Log an event
+
+        Args:
+            level: Logging level
+            event: Event name, e.g. "auth.session_invalid"
+            sampled: Whether only LOG_SAMPLE_RATE of these events is kept
+            **fields: Event fields; token, cookie and password fields are redacted
+        """
+        if not self.logger.isEnabledFor(level):
+            return
+        if sampled:
+            if random.random() >= self.sample_rate:
+                return
+            fields["sample_rate"] = self.sample_rate
+        self.logger.log(level, Event(event, fields), extra={"event": event, "fields": fields})
+
+    def debug(self, event: str, sampled: bool = False, **fields):
+        self.log(logging.DEBUG, event, sampled, **fields)
+
+    def info(self, event: str, sampled: bool = False, **fields):
+        self.log(logging.INFO, event, sampled, **fields)
+
+    def warning(self, event: str, sampled: bool = False, **fields):
+        self.log(logging.WARNING, event, sampled, **fields)
+
+
+def get_structured_logger(name: str) -> StructuredLogger:
+    return StructuredLogger(name)
+
+
+class JsonFormatter(logging.Formatter):
+    """Formats a record as one JSON object per line
+
+    Every record keeps its rendered message (for TEST_EVENT markers that is
+    the line the E2E tests look for); structured events additionally get
+    their name and (redacted) fields as top-level keys.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload: Dict[str, Any] = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        event = getattr(record, "event", None)
+        if event is not None:
+            payload["event"] = event
+            for key, value in redact(getattr(record, "fields", {})).items():
+                payload.setdefault(key, value)
+        if record.exc_info:
+            payload["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(payload, default=str, ensure_ascii=False)
+
+
+class DeferredQueueHandler(QueueHandler):
+    """QueueHandler that leaves all formatting to the listener thread
+
+    The stock handler formats the message in the calling thread; records
+    here stay in-process, so they can be queued as they are.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+_listener: Optional[QueueListener] = None
+_queued_logger: Optional[logging.Logger] = None
+_queue_handler: Optional[QueueHandler] = None
+# handler -> (formatter sprzed przełączenia na kolejkę, czy był podpięty do loggera)
+_moved_handlers: Dict[logging.Handler, Tuple[Optional[logging.Formatter], bool]] = {}
+
+
+def start_queue_logging(logger_name: str = "", handlers: Optional[List[logging.Handler]] = None,
+                        log_format: str = LOG_FORMAT) -> QueueListener:
+    """Route a logger (the root logger by default) through a queue drained by a background thread
+
+    The logger keeps only a queue handler, so a log call on the event loop
+    just enqueues the record; formatting and writing happen in the
+    listener thread.
+
+    Args:
+        logger_name: Logger to route through the queue, "" for the whole application
+        handlers: Handlers writing the records, by default the handlers of the logger
+        log_format: "json" to switch the handlers to JsonFormatter, "text" to keep their formatters
+
+    Returns:
+        The running listener (stopped at exit or with stop_queue_logging)
+    """
+    global _listener, _queued_logger, _queue_handler
+    if _listener is not None:
+        return _listener
+
+    _queued_logger = logging.getLogger(logger_name)
+    if handlers is None:
+        handlers = list(_queued_logger.handlers)
+    for handler in handlers:
+        _moved_handlers[handler] = (handler.formatter, handler in _queued_logger.handlers)
+        _queued_logger.removeHandler(handler)
+        if log_format == "json":
+            handler.setFormatter(JsonFormatter())
+
+    log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+    _queue_handler = DeferredQueueHandler(log_queue)
+    _queued_logger.addHandler(_queue_handler)
+    if logger_name:
+        # Rekordy nie są już obsługiwane synchronicznie przez handlery roota
+        _queued_logger.propagate = False
+
+    _listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    atexit.register(stop_queue_logging)
+    return _listener
+
+
+def stop_queue_logging():
+    """Flush the queued records, stop the listener thread and restore the logger"""
+    global _listener, _queued_logger, _queue_handler
+    listener, _listener = _listener, None
+    if listener is None:
+        return
+    listener.stop()
+    _queued_logger.removeHandler(_queue_handler)
+    for handler, (formatter, attached) in _moved_handlers.items():
+        handler.setFormatter(formatter)
+        if attached:
+            _queued_logger.addHandler(handler)
+    if _queued_logger is not logging.getLogger():
+        _queued_logger.propagate = True
+    _moved_handlers.clear()
+    _queued_logger = None
+    _queue_handler = None
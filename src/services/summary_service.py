@@ -1,52 +1,84 @@
 from uuid import UUID
-import fitz  # PyMuPDF
+from typing import AsyncIterable, AsyncIterator, Callable, Iterable, List, Optional, Union
 import os
+import asyncio
+import time
 import logging
-from fastapi import HTTPException, status
+from fastapi import HTTPException, Request, status
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from pathlib import Path
 from datetime import datetime
 import uuid
 import json
 
-from models.summary import SummaryCreate, SummaryInDB
+from models.summary import SummaryCreate, SummaryInDB, SummaryOptions
 from schemas.summary import Summary
 from schemas.documents import Document  # Zakładam, że istnieje schemat dokumentu
+from services.extraction_engine import extraction_engine, InvalidPDFError, ExtractionTimeoutError, PageText
+from services.text_cache import text_cache, hash_file
+from services.model_registry import model_registry
+from services.batching import batch_scheduler, BatchQueueFullError
+from services.chunking import chunk_text, iter_chunks, chunk_summary_cache, ChunkSummaryCache
+from services.speculative import speculative_pipeline
+from services.single_flight import document_flights, content_flights
+from services.result_cache import summary_result_cache
+from services.summary_store import summary_store
+from services.e2e_events import e2e_events, E2EEvent
+from services.metrics import pipeline_stage, pipeline_stage_duration
+from services.profiling import current_profile_id, profiled
+from services.tracing import tracer, traced
+from services.uploads import upload_path
+from services.document_metadata import document_metadata
+from auth.jwt import get_current_user_from_cookie
+from auth.context import is_test_mode
 
 # Konfiguracja loggera
 logger = logging.getLogger(__name__)
 
+# Parametry hierarchicznego (map-reduce) podsumowywania długich dokumentów
+CHUNK_SUMMARY_WORDS = int(os.getenv("CHUNK_SUMMARY_WORDS", "80"))
+MAP_CONCURRENCY = int(os.getenv("MAP_CONCURRENCY", "16"))
+MAX_REDUCE_ROUNDS = int(os.getenv("MAX_REDUCE_ROUNDS", "4"))
+
+TEST_SUMMARY_CONTENT = "This is a test summary generated in test mode. It contains sample content that would normally be extracted from the document. The summary includes key findings, methodology, and conclusions from the paper."
+
+# Funkcja raportująca postęp: (etap, ułamek 0-1)
+ProgressCallback = Callable[[str, float], None]
+
+
+def _no_progress(stage: str, fraction: float):
+    pass
+
+
+async def _iterate(items: Iterable[str]) -> AsyncIterator[str]:
+    """Expose a list of chunks as an async iterator"""
+    for item in items:
+        yield item
+
+
+async def _chain(head: List[str], tail: AsyncIterable[str]) -> AsyncIterator[str]:
+    """Yield already consumed chunks followed by the rest of the stream"""
+    for item in head:
+        yield item
+    async for item in tail:
+        yield item
+
 
 class SummaryService:
     """Service for managing document summaries"""
     
-    def __init__(self, db_session: Session = None):
-        """Initialize the service with database session
+    def __init__(self, db_session: Session = None, model=None):
+        """Initialize the service with database session and summarization model
         
         Args:
             db_session: SQLAlchemy database session, can be None for file-based operations
+            model: Loaded summarization model, normally taken from model_registry
         """
         self.db = db_session
-        # W rzeczywistej implementacji załadowalibyśmy model SciBert tutaj
-        # self.scibert_model = self._load_scibert_model()
-    
-    def _load_scibert_model(self):
-        """Load the SciBert model for text summarization
-        
-        This is a placeholder - in a real implementation, this would load 
-        the actual AI model with proper error handling
-        """
-        # Tutaj w rzeczywistej implementacji ładowalibyśmy model NLP
-        logger.info("Loading SciBert model")
-        # Przykład:
-        # from transformers import AutoTokenizer, AutoModelForSeq2SeqLM
-        # tokenizer = AutoTokenizer.from_pretrained("allenai/scibert_scivocab_uncased")
-        # model = AutoModelForSeq2SeqLM.from_pretrained("allenai/scibert_scivocab_uncased")
-        # return {"model": model, "tokenizer": tokenizer}
-        
-        # Tymczasowo zwracamy mock
-        return {"model": "scibert_mock", "tokenizer": "scibert_tokenizer_mock"}
+        # Model ładowany jest raz przy starcie aplikacji (model_registry)
+        self.model = model
     
     async def get_document(self, document_id: UUID):
         """Fetch document from database and verify access
@@ -106,18 +138,19 @@ class SummaryService:
                     detail="Document file not found on server"
                 )
                 
-            # Otwórz dokument PDF przy użyciu PyMuPDF
-            pdf_document = fitz.open(safe_path)
-            
-            # Wyodrębnij tekst ze wszystkich stron
-            text = ""
-            for page_num in range(len(pdf_document)):
-                page = pdf_document[page_num]
-                text += page.get_text()
-                
-            # Zamknij dokument PDF
-            pdf_document.close()
+            # Tekst tego samego pliku mógł już zostać wyodrębniony (cache po hashu treści)
+            content_hash = await hash_file(safe_path)
+            pages = await text_cache.get(content_hash)
             
+            if pages is None:
+                # Ekstrakcja w osobnym procesie - nie blokujemy pętli zdarzeń
+                with pipeline_stage("extract_text"), tracer.span("extract_text") as span:
+                    pages = await extraction_engine.extract_pages(str(safe_path))
+                    span.set_attribute("page_count", len(pages))
+                if any(page.strip() for page in pages):
+                    await text_cache.put(content_hash, pages)
+            
+            text = "".join(pages)
             if not text.strip():
                 raise HTTPException(
                     status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
@@ -126,51 +159,232 @@ class SummaryService:
                 
             return text
             
-        except fitz.FileDataError:
+        except HTTPException:
+            raise
+        except InvalidPDFError:
+            logger.error(f"Invalid PDF file: {file_path}")
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail="The file is not a valid PDF document"
+            )
+        except ExtractionTimeoutError:
+            logger.error(f"Text extraction timed out: {file_path}")
+            raise HTTPException(
+                status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+                detail="Processing the document took too long"
+            )
+        except Exception as e:
+            logger.error(f"Error extracting text from PDF: {str(e)}")
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="An error occurred while processing the document"
+            )
+    
+    async def iter_text(self, file_path: str, content_hash: Optional[str] = None) -> AsyncIterator[PageText]:
+        """Stream text from PDF document page by page
+        
+        Args:
+            file_path: Path to the PDF file
+            content_hash: sha256 of the file, if the caller already computed it
+            
+        Yields:
+            PageText with the page number and text of each page
+            
+        Raises:
+            HTTPException: 422 if document can't be processed
+        """
+        if not os.path.exists(file_path):
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail="Document file not found on server"
+            )
+        
+        content_hash = content_hash or await hash_file(file_path)
+        cached_pages = await text_cache.get(content_hash)
+        if cached_pages is not None:
+            for page_num, text in enumerate(cached_pages, start=1):
+                yield PageText(page_num, text)
+            return
+        
+        # Strony trafiają do cache na bieżąco; jeśli konsument przerwie
+        # strumień wcześniej, niekompletny wpis jest usuwany
+        cache_entry = text_cache.writer(content_hash)
+        page_count = 0
+        has_text = False
+        completed = False
+        # Do etapu extract_text liczony jest tylko czas oczekiwania na strony, bez czasu konsumenta
+        extraction_seconds = 0.0
+        # Span nie jest bieżący - między stronami wykonuje się kod konsumenta (fragmenty, inferencja)
+        span = tracer.start_span("extract_text", streamed=True)
+        try:
+            started = time.perf_counter()
+            async for page in extraction_engine.iter_pages(str(file_path)):
+                extraction_seconds += time.perf_counter() - started
+                has_text = has_text or bool(page.text.strip())
+                page_count += 1
+                await cache_entry.add(page.text)
+                yield page
+                started = time.perf_counter()
+            completed = True
+        except InvalidPDFError:
             logger.error(f"Invalid PDF file: {file_path}")
             raise HTTPException(
                 status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
                 detail="The file is not a valid PDF document"
             )
+        except ExtractionTimeoutError:
+            logger.error(f"Text extraction timed out: {file_path}")
+            raise HTTPException(
+                status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+                detail="Processing the document took too long"
+            )
         except Exception as e:
             logger.error(f"Error extracting text from PDF: {str(e)}")
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail="An error occurred while processing the document"
             )
+        finally:
+            if not completed:
+                cache_entry.abort()
+            if span is not None:
+                span.set_attribute("page_count", page_count)
+                span.set_attribute("extraction_seconds", extraction_seconds)
+            tracer.end_span(span)
+        
+        pipeline_stage_duration.observe(extraction_seconds, "extract_text")
+        if not has_text:
+            cache_entry.abort()
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail="No text could be extracted from the document"
+            )
+        
+        await cache_entry.commit()
+    
+    async def _infer(self, model, text: str, max_words: int) -> str:
+        """Run one inference, through the shared batch scheduler when it is running"""
+        # Współbieżne żądania trafiają do wspólnych paczek inferencji;
+        # bez harmonogramu (skrypty, testy) inferencja idzie prosto w wątku
+        with tracer.span("inference", input_chars=len(text), max_words=max_words,
+                         batched=batch_scheduler.running and batch_scheduler.model is model):
+            if batch_scheduler.running and batch_scheduler.model is model:
+                return await batch_scheduler.submit(text, max_words)
+            summaries = await asyncio.to_thread(model.generate, [text], max_words)
+            return summaries[0]
+    
+    async def _summarize_chunk(self, model, chunk: str) -> str:
+        """Summarize a single chunk (map stage), reusing cached results"""
+        key = ChunkSummaryCache.key(model.version, CHUNK_SUMMARY_WORDS, chunk)
+        summary = chunk_summary_cache.get(key)
+        if summary is None:
+            summary = await self._infer(model, chunk, CHUNK_SUMMARY_WORDS)
+            chunk_summary_cache.put(key, summary)
+        return summary
     
-    async def generate_summary(self, text: str):
+    async def _map_chunks(self, model, chunks: AsyncIterable[str],
+                          on_chunk_done: Optional[Callable[[int, int], None]] = None) -> List[str]:
+        """Summarize chunks concurrently as they are produced, keeping document order
+        
+        At most MAP_CONCURRENCY chunks are in flight, so a long stream doesn't
+        pile up in memory; the batch scheduler groups them into batched calls.
+        on_chunk_done is called with (finished, submitted) after every chunk.
+        """
+        semaphore = asyncio.Semaphore(MAP_CONCURRENCY)
+        tasks = []
+        finished = 0
+        
+        async def run(chunk: str) -> str:
+            nonlocal finished
+            try:
+                summary = await self._summarize_chunk(model, chunk)
+                finished += 1
+                if on_chunk_done is not None:
+                    on_chunk_done(finished, len(tasks))
+                return summary
+            finally:
+                semaphore.release()
+        
+        try:
+            async for chunk in chunks:
+                await semaphore.acquire()
+                tasks.append(asyncio.create_task(run(chunk)))
+            return list(await asyncio.gather(*tasks))
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            raise
+    
+    async def generate_summary(self, text: Union[str, AsyncIterable[PageText]], max_words: int = 100,
+                               progress: ProgressCallback = _no_progress):
         """Generate summary from text using SciBert model
         
+        Text longer than the model context is summarized hierarchically:
+        it is split into token-budgeted, sentence-aligned chunks, the chunks
+        are summarized in parallel (map), and the concatenated partial
+        summaries are summarized again until they fit the context (reduce).
+        
         Args:
-            text: Input text to summarize
+            text: Input text to summarize, either a whole string or a stream
+                of pages from iter_text (consumed incrementally)
+            max_words: Maximum length of the final summary in words
+            progress: Called with (stage, fraction) as the work advances
             
         Returns:
             Generated summary text
         """
         try:
-            # W rzeczywistej implementacji, używalibyśmy modelu SciBert
-            # do generowania podsumowania. Tutaj symulujemy to przez 
-            # zwrócenie pierwszych 500 znaków jako podsumowanie.
-            
-            logger.info("Generating summary using SciBert model")
-            
-            # Symulacja przetwarzania - w rzeczywistej implementacji
-            # użylibyśmy modelu AI
-            # Przykład:
-            # inputs = self.scibert_model["tokenizer"](text, max_length=1024, truncation=True, return_tensors="pt")
-            # summary_ids = self.scibert_model["model"].generate(inputs["input_ids"], max_length=150)
-            # summary = self.scibert_model["tokenizer"].decode(summary_ids[0], skip_special_tokens=True)
-            
-            # Tymczasowe podsumowanie jako przykład
-            words = text.split()
-            if len(words) > 100:
-                summary = " ".join(words[:100]) + "..."
+            model = self.model or await model_registry.get_model()
+            budget = model.max_input_tokens
+            logger.info(f"Generating summary using {model.name} model")
+            progress("extracting", 0.05)
+            
+            if isinstance(text, str):
+                chunks = _iterate(chunk_text(text, budget, model.count_tokens))
             else:
-                summary = text
-                
-            return summary
+                chunks = iter_chunks(text, budget, model.count_tokens)
+            
+            # Tekst mieszczący się w jednym fragmencie - pojedyncze przejście
+            first = await anext(chunks, None)
+            second = await anext(chunks, None) if first is not None else None
+            if second is None:
+                progress("summarizing", 0.1)
+                return await self._infer(model, first or "", max_words)
+            
+            # Map: podsumowania fragmentów (liczba fragmentów strumienia nie jest znana z góry)
+            partials = await self._map_chunks(
+                model, _chain([first, second], chunks),
+                lambda done, submitted: progress("summarizing", 0.1 + 0.7 * done / submitted),
+            )
+            progress("reducing", 0.8)
+            logger.info(f"Summarized {len(partials)} chunks, reducing")
             
+            # Reduce: łączymy częściowe podsumowania, aż zmieszczą się w kontekście modelu
+            combined = "\n\n".join(partials)
+            for _ in range(MAX_REDUCE_ROUNDS):
+                if model.count_tokens(combined) <= budget:
+                    break
+                partials = await self._map_chunks(
+                    model, _iterate(chunk_text(combined, budget, model.count_tokens))
+                )
+                combined = "\n\n".join(partials)
+            
+            if model.count_tokens(combined) > budget:
+                # Zabezpieczenie przed brakiem zbieżności - obcinamy do rozmiaru kontekstu
+                combined = chunk_text(combined, budget, model.count_tokens)[0]
+            
+            return await self._infer(model, combined, max_words)
+            
+        except HTTPException:
+            raise
+        
+        except BatchQueueFullError:
+            logger.warning("Inference queue is full, rejecting summary request")
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="The summarization service is busy, please try again shortly"
+            )
+        
         except Exception as e:
             logger.error(f"Error generating summary: {str(e)}")
             raise HTTPException(
@@ -178,11 +392,16 @@ class SummaryService:
                 detail="An error occurred while generating the summary"
             )
     
-    async def create_summary(self, document_id: UUID):
+    @traced("create_summary")
+    @profiled("create_summary")
+    async def create_summary(self, document_id: UUID, options: Optional[SummaryOptions] = None,
+                             progress: ProgressCallback = _no_progress):
         """End-to-end process of creating a summary
         
         Args:
             document_id: UUID of the document to summarize
+            options: Summary options, defaults to a medium-length summary
+            progress: Called with (stage, fraction) as the work advances
             
         Returns:
             Created summary object
@@ -190,9 +409,10 @@ class SummaryService:
         Raises:
             HTTPException: Various error codes based on the specific error
         """
+        options = options or SummaryOptions()
         try:
             # Define file path directly (since we're not using database records yet)
-            file_path = Path("uploads") / f"{document_id}.pdf"
+            file_path = upload_path(document_id)
             
             if not file_path.exists():
                 raise HTTPException(
@@ -200,39 +420,37 @@ class SummaryService:
                     detail=f"Document file not found: {document_id}"
                 )
             
-            # 1. Extract text from the PDF
-            text = await self.extract_text(str(file_path))
-            
-            # 2. Generate summary
-            summary_content = await self.generate_summary(text)
-            
-            # 3. Create summary object
-            summary = {
-                "id": uuid.uuid4(),
-                "document_id": document_id,
-                "content": summary_content,
-                "version": 1,
-                "is_current": True,
-                "created_at": datetime.now()
-            }
-            
-            # 4. In production, we would save to database
-            # For now, we'll save to a JSON file to maintain state
-            summaries_dir = Path("summaries")
-            summaries_dir.mkdir(exist_ok=True)
-            
-            summary_file = summaries_dir / f"{document_id}.json"
-            with open(summary_file, "w") as f:
-                # Convert UUID to string for JSON serialization
-                json_summary = {
-                    "id": str(summary["id"]),
-                    "document_id": str(summary["document_id"]),
-                    "content": summary["content"],
-                    "version": summary["version"],
-                    "is_current": summary["is_current"],
-                    "created_at": summary["created_at"].isoformat()
-                }
-                json.dump(json_summary, f, indent=2)
+            # 1-2. Stream text from the PDF straight into summary generation;
+            # równoczesne żądania dla tej samej treści i opcji liczą podsumowanie raz
+            model = self.model or await model_registry.get_model()
+            # Skrót treści zapisany przy uploadzie - plik nie jest czytany drugi raz
+            metadata = await document_metadata.load(document_id, session=self.db)
+            content_hash = metadata.content_hash if metadata and metadata.content_hash else await hash_file(file_path)
+            
+            async def produce() -> str:
+                # Ta sama treść PDF z tymi samymi opcjami była już podsumowana
+                cached = await summary_result_cache.get(content_hash, model.version, options)
+                if cached is not None:
+                    progress("cached", 0.9)
+                    return cached
+                with pipeline_stage("generate_summary"), tracer.span("generate_summary", model_version=model.version):
+                    content = await self.generate_summary(
+                        self.iter_text(str(file_path), content_hash), max_words=options.max_words, progress=progress
+                    )
+                await summary_result_cache.put(content_hash, model.version, options, content)
+                return content
+            
+            summary_content = await content_flights.do(
+                (content_hash, model.version, options.key()), produce,
+                on_join=lambda: progress("summarizing", 0.5),
+            )
+            progress("saving", 0.95)
+            
+            # 3. Persist the summary as the document's current version
+            with pipeline_stage("persistence"), tracer.span("persistence", document_id=str(document_id)):
+                summary = await summary_store.save(
+                    document_id, summary_content, options.summary_length, session=self.db
+                )
             
             logger.info(f"Summary created for document: {document_id}")
             return summary
@@ -246,4 +464,115 @@ class SummaryService:
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail=f"An error occurred while creating the summary: {str(e)}"
-            ) 
\ No newline at end of file
+            )
+
+
+async def summarize_document(document_id: UUID, options: Optional[SummaryOptions] = None,
+                             progress: ProgressCallback = _no_progress) -> dict:
+    """Create a document summary, reusing the speculative run started at upload time
+
+    Args:
+        document_id: UUID of the document to summarize
+        options: Summary options; None means the options submitted with the upload
+        progress: Called with (stage, fraction) as the work advances
+
+    Returns:
+        Created summary object
+    """
+    options = options or speculative_pipeline.options_for(document_id) or SummaryOptions()
+    speculative = await speculative_pipeline.attach(document_id, options)
+    if speculative is not None:
+        progress("summarizing", 0.5)
+        # shield: anulowanie żądania nie przerywa wspólnego przebiegu
+        return await asyncio.shield(speculative)
+    
+    # Podwójne kliknięcia i ponowienia dostają to samo podsumowanie, zapisane raz
+    summary_service = SummaryService(None, model=await model_registry.get_model())
+    return await document_flights.do(
+        (document_id, options.key()),
+        lambda: summary_service.create_summary(document_id, options, progress),
+        on_join=lambda: progress("summarizing", 0.5),
+    )
+
+
+async def run_summary_job(job) -> dict:
+    """Job queue handler: create the summary for a queued SummaryJob
+
+    Args:
+        job: SummaryJob from services.job_queue
+
+    Returns:
+        Created summary object
+    """
+    if not upload_path(job.document_id).exists():
+        # Plik mógł jeszcze nie dotrzeć na współdzielony wolumen albo węzeł go nie widzi -
+        # 503 jest ponawiany przez kolejkę, 404 oznaczałby trwały błąd zadania
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"Document file not available on this worker: {job.document_id}"
+        )
+    
+    # Zadanie zlecone przez profilowane żądanie jest profilowane w workerze
+    token = current_profile_id.set(job.profile_id)
+    try:
+        # Span zadania kontynuuje trace żądania, które je zleciło
+        with tracer.span("summary_job", traceparent=job.traceparent, job_id=str(job.id),
+                         document_id=str(job.document_id)):
+            summary = await summarize_document(job.document_id, job.options, job.update_progress)
+    finally:
+        current_profile_id.reset(token)
+    e2e_events.emit(E2EEvent.SUMMARY_GENERATED, document_id=job.document_id, summary_id=summary.get('id', 'unknown'))
+    return summary
+
+
+async def save_test_summary(document_id: UUID, db: Optional[AsyncSession] = None) -> dict:
+    """Store the dummy summary used by the E2E tests in test mode
+    
+    Args:
+        document_id: UUID of the document
+        db: Database session, None when called outside a request
+        
+    Returns:
+        Stored summary marked with type "test"
+    """
+    summary = await summary_store.save(document_id, TEST_SUMMARY_CONTENT, "medium", session=db)
+    return {**summary, "type": "test"}
+
+
+async def read_summary(document_id: UUID, request: Request, db: Optional[AsyncSession] = None) -> dict:
+    """Read the current summary of a document on behalf of a request
+    
+    Shared by the JSON endpoint and the summary page, so the page doesn't
+    call the API over HTTP. Outside test mode the user must be logged in
+    (session cookie); in test mode a missing summary is created on demand.
+    
+    Args:
+        document_id: UUID of the document
+        request: Incoming request, used for test mode and the session cookie
+        db: Database session from get_db
+        
+    Returns:
+        Current summary of the document
+        
+    Raises:
+        HTTPException: 401 if not authenticated, 404 if the summary doesn't exist
+    """
+    test_mode = is_test_mode(request)
+    if not test_mode:
+        await get_current_user_from_cookie(request)
+    
+    summary = await summary_store.get_current(document_id, session=db)
+    
+    if summary is None and test_mode:
+        logger.info(f"TEST MODE: Creating on-demand dummy summary for document: {document_id}")
+        summary = await save_test_summary(document_id, db)
+        e2e_events.emit(E2EEvent.TEST_SUMMARY_GENERATED_ON_DEMAND, document_id=document_id, summary_id=summary.get('id', 'unknown'))
+    
+    if summary is None:
+        logger.warning(f"Summary not found for document: {document_id}")
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Summary not found"
+        )
+    
+    return summary
@@ -0,0 +1,195 @@
+import asyncio
+import json
+import logging
+import os
+import uuid
+from abc import ABC, abstractmethod
+from contextlib import asynccontextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, Optional
+from uuid import UUID
+
+from sqlalchemy import func, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from db.database import async_session_factory
+from schemas.summary import Summary
+
+# Konfiguracja loggera
+logger = logging.getLogger(__name__)
+
+# Miejsce zapisu podsumowań: "database" (tabela summaries) albo "files" (pliki JSON, np. testy E2E bez bazy)
+SUMMARY_STORE = os.getenv("SUMMARY_STORE", "database")
+SUMMARIES_DIR = os.getenv("SUMMARIES_DIR", "summaries")
+# Liczba prób zapisu, gdy równoległy zapis zajął ten sam numer wersji
+SUMMARY_SAVE_ATTEMPTS = int(os.getenv("SUMMARY_SAVE_ATTEMPTS", "5"))
+
+_VERSION_CONSTRAINT = "summaries_document_id_version_key"
+
+
+def summary_to_dict(summary: Summary) -> Dict[str, Any]:
+    """Convert a Summary row to the JSON shape returned by the API"""
+    return {
+        "id": str(summary.id),
+        "document_id": str(summary.document_id),
+        "content": summary.content,
+        "version": summary.version,
+        "is_current": summary.is_current,
+        "length": summary.length,
+        "created_at": summary.created_at.isoformat(),
+    }
+
+
+class SummaryStore(ABC):
+    """Persistence of generated summaries"""
+
+    @abstractmethod
+    async def save(self, document_id: UUID, content: str, length: Optional[str] = None,
+                   session: Optional[AsyncSession] = None) -> Dict[str, Any]:
+        """Store a new current summary version of a document
+
+        Args:
+            document_id: UUID of the summarized document
+            content: Summary text
+            length: Summary length option
+            session: Request session from get_db; a new session is used without it
+
+        Returns:
+            Stored summary in API shape
+        """
+
+    @abstractmethod
+    async def get_current(self, document_id: UUID, session: Optional[AsyncSession] = None) -> Optional[Dict[str, Any]]:
+        """Return the current summary of a document, or None if there is none"""
+
+
+class DatabaseSummaryStore(SummaryStore):
+    """Summaries in scisummarize.summaries through the Summary model
+
+    The next version is max(version) + 1; two concurrent saves can pick the
+    same number, so the unique (document_id, version) constraint rejects
+    the second insert and the save is retried with a fresh number.
+    """
+
+    def __init__(self, max_attempts: int = SUMMARY_SAVE_ATTEMPTS):
+        self.max_attempts = max_attempts
+
+    @asynccontextmanager
+    async def _session(self, session: Optional[AsyncSession]) -> AsyncIterator[AsyncSession]:
+        if session is not None:
+            yield session
+            return
+        # Zadania w tle nie mają sesji żądania
+        async with async_session_factory() as new_session:
+            yield new_session
+
+    async def save(self, document_id: UUID, content: str, length: Optional[str] = None,
+                   session: Optional[AsyncSession] = None) -> Dict[str, Any]:
+        async with self._session(session) as db:
+            for attempt in range(1, self.max_attempts + 1):
+                try:
+                    return await self._insert_version(db, document_id, content, length)
+                except IntegrityError as e:
+                    await db.rollback()
+                    if _VERSION_CONSTRAINT not in str(e.orig) or attempt == self.max_attempts:
+                        raise
+                    logger.info(f"Summary version conflict for document {document_id}, retrying (attempt {attempt})")
+                except Exception:
+                    await db.rollback()
+                    raise
+
+    async def _insert_version(self, db: AsyncSession, document_id: UUID, content: str,
+                              length: Optional[str]) -> Dict[str, Any]:
+        latest = await db.scalar(
+            select(func.max(Summary.version)).where(Summary.document_id == document_id)
+        )
+        # Trigger manage_summary_versions robi to samo; jawna aktualizacja
+        # działa też na bazie utworzonej przez init_db
+        await db.execute(
+            update(Summary).where(Summary.document_id == document_id, Summary.is_current.is_(True))
+            .values(is_current=False)
+        )
+        summary = Summary(
+            id=uuid.uuid4(),
+            document_id=document_id,
+            content=content,
+            version=(latest or 0) + 1,
+            is_current=True,
+            length=length,
+            created_at=datetime.now(),
+        )
+        db.add(summary)
+        await db.commit()
+        return summary_to_dict(summary)
+
+    async def get_current(self, document_id: UUID, session: Optional[AsyncSession] = None) -> Optional[Dict[str, Any]]:
+        async with self._session(session) as db:
+            summary = await db.scalar(
+                select(Summary)
+                .where(Summary.document_id == document_id, Summary.is_current.is_(True))
+                .order_by(Summary.version.desc())
+                .limit(1)
+            )
+            return summary_to_dict(summary) if summary is not None else None
+
+
+class FileSummaryStore(SummaryStore):
+    """Legacy storage in <directory>/<document_id>.json, one summary per document
+
+    File I/O runs in a thread so it never blocks the event loop.
+    """
+
+    def __init__(self, directory: str = SUMMARIES_DIR):
+        self.directory = Path(directory)
+
+    def _path(self, document_id: UUID) -> Path:
+        return self.directory / f"{document_id}.json"
+
+    def _write(self, document_id: UUID, summary: Dict[str, Any]):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self._path(document_id)
+        # Zapis do pliku tymczasowego i atomowa podmiana
+        tmp_path = path.with_name(f".{path.name}.{uuid.uuid4().hex}.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(summary, f, indent=2)
+        os.replace(tmp_path, path)
+
+    def _read(self, document_id: UUID) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self._path(document_id), "r") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    async def save(self, document_id: UUID, content: str, length: Optional[str] = None,
+                   session: Optional[AsyncSession] = None) -> Dict[str, Any]:
+        previous = await asyncio.to_thread(self._read, document_id)
+        summary = {
+            "id": str(uuid.uuid4()),
+            "document_id": str(document_id),
+            "content": content,
+            "version": (previous or {}).get("version", 0) + 1,
+            "is_current": True,
+            "length": length,
+            "created_at": datetime.now().isoformat(),
+        }
+        await asyncio.to_thread(self._write, document_id, summary)
+        return summary
+
+    async def get_current(self, document_id: UUID, session: Optional[AsyncSession] = None) -> Optional[Dict[str, Any]]:
+        return await asyncio.to_thread(self._read, document_id)
+
+
+def create_summary_store(backend: str = SUMMARY_STORE) -> SummaryStore:
+    """Create the summary store selected by SUMMARY_STORE"""
+    if backend == "database":
+        return DatabaseSummaryStore()
+    if backend == "files":
+        return FileSummaryStore()
+    raise ValueError(f"Unknown summary store: {backend}")
+
+
+# Współdzielony magazyn podsumowań
+summary_store = create_summary_store()
@@ -0,0 +1,331 @@
+import asyncio
+import gzip
+import hashlib
+import json
+import logging
+import os
+import threading
+import uuid
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from services.extraction_engine import EXTRACTOR_VERSION
+
+# Konfiguracja loggera
+logger = logging.getLogger(__name__)
+
+# Konfiguracja cache tekstu wyodrębnionego z PDF
+TEXT_CACHE_DIR = os.getenv("TEXT_CACHE_DIR", "cache/extracted")
+TEXT_CACHE_MEMORY_MB = float(os.getenv("TEXT_CACHE_MEMORY_MB", "64"))
+TEXT_CACHE_DISK_MB = float(os.getenv("TEXT_CACHE_DISK_MB", "1024"))
+# Większe dokumenty zapisywane strumieniowo trafiają tylko na dysk, bez kopii w pamięci
+TEXT_CACHE_MEMORY_ENTRY_MB = float(os.getenv("TEXT_CACHE_MEMORY_ENTRY_MB", "4"))
+
+_HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def _hash_file_sync(file_path: str) -> str:
+    sha256 = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(_HASH_CHUNK_SIZE), b""):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+
+async def hash_file(file_path: str) -> str:
+    """Compute the SHA-256 of a file without blocking the event loop
+
+    Args:
+        file_path: Path to the file
+
+    Returns:
+        Hex digest of the file contents
+    """
+    return await asyncio.to_thread(_hash_file_sync, str(file_path))
+
+
+class CacheEntryWriter:
+    """Writes one cache entry page by page, while the pages are extracted
+
+    Pages go straight into a compressed temporary file, so a streamed
+    document is never held in memory in full; a copy for the memory tier is
+    kept only while the entry stays under the per-entry limit. The entry
+    becomes visible on commit(); abort() (e.g. the consumer stopped the
+    stream early) drops the incomplete file.
+    """
+
+    def __init__(self, cache: "ExtractedTextCache", key: str):
+        self.cache = cache
+        self.key = key
+        self.path = cache._path(key)
+        self.tmp_path = self.path.with_name(f".{self.path.name}.{uuid.uuid4().hex}.tmp")
+        self._file = None
+        self._pages: Optional[List[str]] = []
+        self._size = 0
+        self._failed = False
+        self._closed = False
+
+    def _write(self, text: Optional[str]):
+        if self._file is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = gzip.open(self.tmp_path, "wt", encoding="utf-8")
+            self._file.write("[")
+            separator = ""
+        else:
+            separator = ", "
+        # Ten sam format co json.dump listy stron
+        if text is not None:
+            self._file.write(separator + json.dumps(text))
+
+    def _finish(self):
+        self._write(None)
+        self._file.write("]")
+        self._file.close()
+        os.replace(self.tmp_path, self.path)
+        self.cache._disk_added(self.path)
+
+    async def add(self, text: str):
+        """Append the next page
+
+        Args:
+            text: Text of the page, in page order
+        """
+        self._size += len(text)
+        if self._pages is not None:
+            if self._size <= self.cache.memory_entry_max_bytes:
+                self._pages.append(text)
+            else:
+                self._pages = None
+        if self._failed or self._closed:
+            return
+        try:
+            await asyncio.to_thread(self._write, text)
+        except OSError as e:
+            # Cache jest tylko optymalizacją - błąd zapisu nie przerywa przetwarzania
+            logger.warning(f"Could not write text cache entry {self.key}: {str(e)}")
+            self._failed = True
+            self.abort()
+
+    async def commit(self):
+        """Publish the complete entry"""
+        if self._closed:
+            return
+        if self._pages is not None:
+            self.cache._memory_put(self.key, self._pages)
+        if self._failed:
+            return
+        try:
+            await asyncio.to_thread(self._finish)
+        except OSError as e:
+            logger.warning(f"Could not write text cache entry {self.key}: {str(e)}")
+            self.abort()
+        self._closed = True
+
+    def abort(self):
+        """Drop the incomplete entry (idempotent)"""
+        self._closed = True
+        self._pages = None
+        if self._file is not None:
+            try:
+                self._file.close()
+            except OSError:
+                pass
+            self._file = None
+        self.tmp_path.unlink(missing_ok=True)
+
+
+class ExtractedTextCache:
+    """Content-addressed cache of text extracted from PDF files
+
+    Entries are keyed by the SHA-256 of the file bytes and the extractor
+    version, so the same paper uploaded under another document ID (or
+    summarized again) never goes through PyMuPDF twice. A bounded in-memory
+    LRU sits in front of gzip-compressed files on disk; the disk tier is
+    evicted least-recently-used first once it grows past its size limit.
+    """
+
+    def __init__(self, directory: str = TEXT_CACHE_DIR,
+                 memory_max_bytes: int = int(TEXT_CACHE_MEMORY_MB * 1024 * 1024),
+                 disk_max_bytes: int = int(TEXT_CACHE_DISK_MB * 1024 * 1024),
+                 memory_entry_max_bytes: int = int(TEXT_CACHE_MEMORY_ENTRY_MB * 1024 * 1024),
+                 version: str = EXTRACTOR_VERSION):
+        """Initialize the cache
+
+        Args:
+            directory: Directory for compressed cache files
+            memory_max_bytes: Size limit of the in-memory tier (characters of text)
+            disk_max_bytes: Size limit of the on-disk tier (compressed bytes)
+            memory_entry_max_bytes: Largest streamed entry copied into the memory tier
+            version: Extractor version mixed into every key
+        """
+        self.directory = Path(directory)
+        self.memory_max_bytes = memory_max_bytes
+        self.disk_max_bytes = disk_max_bytes
+        self.memory_entry_max_bytes = memory_entry_max_bytes
+        self.version = version
+
+        self._memory: "OrderedDict[str, List[str]]" = OrderedDict()
+        self._memory_bytes = 0
+        self._disk_bytes: Optional[int] = None
+        self._disk_lock = threading.Lock()
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _key(self, content_hash: str) -> str:
+        return f"{content_hash}-{self.version}"
+
+    def _path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}.json.gz"
+
+    # Warstwa pamięci (LRU)
+
+    def _memory_get(self, key: str) -> Optional[List[str]]:
+        pages = self._memory.get(key)
+        if pages is not None:
+            self._memory.move_to_end(key)
+        return pages
+
+    def _memory_put(self, key: str, pages: List[str]):
+        size = sum(len(page) for page in pages)
+        if size > self.memory_max_bytes:
+            return
+        if key in self._memory:
+            self._memory_bytes -= sum(len(page) for page in self._memory.pop(key))
+        self._memory[key] = pages
+        self._memory_bytes += size
+        while self._memory_bytes > self.memory_max_bytes:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= sum(len(page) for page in evicted)
+
+    # Warstwa dyskowa (wywoływana w wątku)
+
+    def _disk_get(self, key: str) -> Optional[List[str]]:
+        path = self._path(key)
+        try:
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                pages = json.load(f)
+            # Aktualizacja mtime - eksmisja usuwa najdawniej używane pliki
+            os.utime(path)
+            return pages
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"Dropping unreadable text cache entry {path}: {str(e)}")
+            path.unlink(missing_ok=True)
+            return None
+
+    def _disk_put(self, key: str, pages: List[str]):
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Zapis do pliku tymczasowego i atomowa podmiana
+        tmp_path = path.with_name(f".{path.name}.{uuid.uuid4().hex}.tmp")
+        with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+            json.dump(pages, f)
+        os.replace(tmp_path, path)
+        self._disk_added(path)
+
+    def _disk_added(self, path: Path):
+        with self._disk_lock:
+            if self._disk_bytes is None:
+                self._disk_bytes = self._scan_disk_bytes()
+            else:
+                self._disk_bytes += path.stat().st_size
+            if self._disk_bytes > self.disk_max_bytes:
+                self._evict_disk()
+
+    def _scan_disk_bytes(self) -> int:
+        return sum(entry.stat().st_size for entry in self.directory.glob("*/*.json.gz"))
+
+    def _evict_disk(self):
+        """Remove least recently used files until the disk tier fits its limit"""
+        entries = []
+        for entry in self.directory.glob("*/*.json.gz"):
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry))
+        entries.sort()
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, entry in entries:
+            if total <= self.disk_max_bytes:
+                break
+            entry.unlink(missing_ok=True)
+            total -= size
+            self.evictions += 1
+        self._disk_bytes = total
+
+    # Publiczne API
+
+    async def get(self, content_hash: str) -> Optional[List[str]]:
+        """Look up the extracted pages of a document
+
+        Args:
+            content_hash: SHA-256 of the PDF file bytes
+
+        Returns:
+            List with the text of each page, or None on a cache miss
+        """
+        key = self._key(content_hash)
+        pages = self._memory_get(key)
+        if pages is not None:
+            self.memory_hits += 1
+            return pages
+
+        pages = await asyncio.to_thread(self._disk_get, key)
+        if pages is not None:
+            self.disk_hits += 1
+            self._memory_put(key, pages)
+            return pages
+
+        self.misses += 1
+        return None
+
+    async def put(self, content_hash: str, pages: List[str]):
+        """Store the extracted pages of a document
+
+        Args:
+            content_hash: SHA-256 of the PDF file bytes
+            pages: Text of each page, in page order
+        """
+        key = self._key(content_hash)
+        self._memory_put(key, pages)
+        try:
+            await asyncio.to_thread(self._disk_put, key, pages)
+        except OSError as e:
+            # Cache jest tylko optymalizacją - błąd zapisu nie przerywa przetwarzania
+            logger.warning(f"Could not write text cache entry {key}: {str(e)}")
+
+    def writer(self, content_hash: str) -> CacheEntryWriter:
+        """Start an entry that is written page by page
+
+        Args:
+            content_hash: SHA-256 of the PDF file bytes
+
+        Returns:
+            Writer to add() pages to and then commit() or abort()
+        """
+        return CacheEntryWriter(self, self._key(content_hash))
+
+    def stats(self) -> Dict[str, float]:
+        """Return hit/miss counters and tier sizes"""
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        return {
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_ratio": (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "memory_entries": len(self._memory),
+            "memory_bytes": self._memory_bytes,
+            "disk_bytes": self._disk_bytes or 0,
+        }
+
+
+# Współdzielona instancja cache
+text_cache = ExtractedTextCache()
@@ -0,0 +1,279 @@
+import atexit
+import contextvars
+import functools
+import json
+import logging
+import os
+import queue
+import re
+import secrets
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+# Konfiguracja loggera
+logger = logging.getLogger(__name__)
+
+# Plik OTLP/JSON (jeden ExportTraceServiceRequest na linię); brak ścieżki wyłącza tracing
+TRACE_EXPORT_PATH = os.getenv("TRACE_EXPORT_PATH")
+TRACE_SERVICE_NAME = os.getenv("TRACE_SERVICE_NAME", "document-summarizer")
+# Maksymalna liczba spanów zapisywanych w jednej linii pliku
+TRACE_EXPORT_BATCH = int(os.getenv("TRACE_EXPORT_BATCH", "256"))
+
+_TRACEPARENT = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-[0-9a-f]{2}$")
+
+
+class Span:
+    """One timed operation of a trace, in the shape of an OpenTelemetry span"""
+    __slots__ = ("name", "trace_id", "span_id", "parent_span_id", "start_ns", "end_ns", "attributes", "error")
+
+    def __init__(self, name: str, trace_id: str, parent_span_id: Optional[str] = None,
+                 attributes: Optional[Dict[str, Any]] = None):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = secrets.token_hex(8)
+        self.parent_span_id = parent_span_id
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.attributes = dict(attributes or {})
+        self.attributes.setdefault("process.pid", os.getpid())
+        self.error: Optional[str] = None
+
+    def set_attribute(self, key: str, value: Any):
+        self.attributes[key] = value
+
+    def end(self):
+        if self.end_ns is None:
+            self.end_ns = time.time_ns()
+
+    @property
+    def traceparent(self) -> str:
+        """W3C trace context of this span, passed to jobs and worker processes"""
+        return f"00-{self.trace_id}-{self.span_id}-01"
+
+    def to_otlp(self) -> Dict[str, Any]:
+        span = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": 1,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns or time.time_ns()),
+            "attributes": [{"key": key, "value": _otlp_value(value)} for key, value in self.attributes.items()],
+            "status": {"code": 2, "message": self.error} if self.error else {"code": 1},
+        }
+        if self.parent_span_id:
+            span["parentSpanId"] = self.parent_span_id
+        return span
+
+
+class _NoopSpan:
+    """Span returned when tracing is disabled"""
+    traceparent = None
+
+    def set_attribute(self, key: str, value: Any):
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def parse_traceparent(traceparent: Optional[str]) -> Optional[Tuple[str, str]]:
+    """(trace_id, parent span_id) of a W3C traceparent header, None if it's missing or invalid"""
+    match = _TRACEPARENT.match(traceparent or "")
+    return (match.group(1), match.group(2)) if match else None
+
+
+class FileSpanExporter:
+    """Writes finished spans as OTLP/JSON lines from a background thread
+
+    Each line is an ExportTraceServiceRequest, the format of the
+    OpenTelemetry Collector file exporter, so the file can be replayed
+    into a collector (otlpjsonfile receiver) or read by tools.trace_report.
+    """
+
+    def __init__(self, path: str, service_name: str = TRACE_SERVICE_NAME, batch_size: int = TRACE_EXPORT_BATCH):
+        self.path = path
+        self.service_name = service_name
+        self.batch_size = batch_size
+        self._queue: "queue.SimpleQueue[Optional[Dict[str, Any]]]" = queue.SimpleQueue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+        # Metryki
+        self.exported_total = 0
+
+    def export(self, spans: List[Dict[str, Any]]):
+        """Queue OTLP span dicts for writing"""
+        if self._thread is None:
+            self._start()
+        for span in spans:
+            self._queue.put(span)
+
+    def _start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="span-exporter", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            span = self._queue.get()
+            batch = [span]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            stop = None in batch
+            batch = [span for span in batch if span is not None]
+            if batch:
+                self._write(batch)
+            if stop:
+                return
+
+    def _write(self, spans: List[Dict[str, Any]]):
+        request = {"resourceSpans": [{
+            "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": self.service_name}}]},
+            "scopeSpans": [{"scope": {"name": "docsum"}, "spans": spans}],
+        }]}
+        try:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(request) + "\n")
+            self.exported_total += len(spans)
+        except OSError as e:
+            logger.warning(f"Could not write {len(spans)} span(s) to {self.path}: {str(e)}")
+
+    def shutdown(self):
+        """Write the queued spans and stop the writer thread"""
+        thread, self._thread = self._thread, None
+        if thread is not None:
+            self._queue.put(None)
+            thread.join(timeout=5)
+
+
+# Aktywny span bieżącego żądania, zadania lub workera
+_current_span: contextvars.ContextVar[Optional[Span]] = contextvars.ContextVar("current_span", default=None)
+
+
+class Tracer:
+    """Creates spans around pipeline stages and hands finished spans to the exporter
+
+    Without an exporter every span is the shared no-op span, so
+    instrumented code costs one attribute check per stage.
+    """
+
+    def __init__(self, exporter: Optional[FileSpanExporter] = None):
+        self.exporter = exporter
+
+    @property
+    def enabled(self) -> bool:
+        return self.exporter is not None
+
+    @contextmanager
+    def span(self, name: str, traceparent: Optional[str] = None, **attributes) -> Iterator[Any]:
+        """Run the enclosed block in a new span, a child of the current span
+
+        Args:
+            name: Span name, e.g. "extract_text"
+            traceparent: W3C parent from another request, job or process;
+                used when there is no current span
+            **attributes: Span attributes
+        """
+        if self.exporter is None:
+            yield _NOOP_SPAN
+            return
+        span = self.start_span(name, traceparent, **attributes)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            _current_span.reset(token)
+            self.end_span(span)
+
+    def start_span(self, name: str, traceparent: Optional[str] = None, **attributes) -> Optional[Span]:
+        """Start a span without making it current (e.g. spanning an async generator)"""
+        if self.exporter is None:
+            return None
+        parent = _current_span.get()
+        if parent is not None:
+            return Span(name, parent.trace_id, parent.span_id, attributes)
+        remote = parse_traceparent(traceparent)
+        if remote is not None:
+            return Span(name, remote[0], remote[1], attributes)
+        return Span(name, secrets.token_hex(16), None, attributes)
+
+    def end_span(self, span: Optional[Span]):
+        if span is None or self.exporter is None:
+            return
+        span.end()
+        self.exporter.export([span.to_otlp()])
+
+    def export(self, spans: List[Dict[str, Any]]):
+        """Export spans recorded elsewhere, e.g. in a worker process"""
+        if self.exporter is not None and spans:
+            self.exporter.export(spans)
+
+    def traceparent(self) -> Optional[str]:
+        """W3C traceparent of the current span, None without one"""
+        span = _current_span.get()
+        return span.traceparent if span is not None else None
+
+    def shutdown(self):
+        if self.exporter is not None:
+            self.exporter.shutdown()
+
+
+def traced(name: str):
+    """Decorator running an async function in a span"""
+    def decorator(fn):
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            with tracer.span(name):
+                return await fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def run_traced(traceparent: str, name: str, fn: Callable, *args) -> Tuple[Any, List[Dict[str, Any]]]:
+    """Run fn in a span continuing traceparent; used inside process pool workers
+
+    The worker has no exporter, so the span is returned with the result
+    and exported by the parent process. A call that raises returns no
+    span; the error is recorded on the parent's span.
+
+    Returns:
+        (result of fn, [OTLP span dict])
+    """
+    trace_id, parent_span_id = parse_traceparent(traceparent)
+    span = Span(name, trace_id, parent_span_id)
+    result = fn(*args)
+    span.end()
+    return result, [span.to_otlp()]
+
+
+def create_tracer(path: Optional[str] = TRACE_EXPORT_PATH) -> Tracer:
+    """Create the tracer, exporting to TRACE_EXPORT_PATH when it is set"""
+    if not path:
+        return Tracer()
+    exporter = FileSpanExporter(path)
+    atexit.register(exporter.shutdown)
+    return Tracer(exporter)
+
+
+# Współdzielony tracer pipeline'u dokumentów
+tracer = create_tracer()
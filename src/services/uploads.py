@@ -0,0 +1,42 @@
+import os
+from pathlib import Path
+from typing import Optional
+from uuid import UUID
+
+from services.job_queue import JOB_QUEUE_BACKEND
+
+# Katalog przesłanych plików PDF. Przy kolejce "postgres" zadanie może przejąć
+# worker na innym węźle, więc katalog musi być współdzielony (NFS, EFS, wolumen
+# klastra) i zamontowany pod tą samą ścieżką bezwzględną na każdym węźle
+UPLOAD_DIR_SETTING = os.getenv("UPLOAD_DIR")
+UPLOAD_DIR = Path(UPLOAD_DIR_SETTING or "uploads")
+
+
+def upload_path(document_id: UUID) -> Path:
+    """Path of the uploaded PDF of a document"""
+    return UPLOAD_DIR / f"{document_id}.pdf"
+
+
+def check_shared_upload_dir(backend: str = JOB_QUEUE_BACKEND, setting: Optional[str] = UPLOAD_DIR_SETTING):
+    """Refuse to run the Postgres job queue on a node-local upload directory
+
+    Without an explicit shared directory, a job enqueued on one node and
+    claimed on another would look for the PDF on the wrong disk.
+
+    Args:
+        backend: Job queue backend (JOB_QUEUE_BACKEND)
+        setting: Configured UPLOAD_DIR, None if not set
+
+    Raises:
+        RuntimeError: If the Postgres queue is used without an absolute,
+            existing UPLOAD_DIR
+    """
+    if backend != "postgres":
+        return
+    if not setting or not Path(setting).is_absolute():
+        raise RuntimeError(
+            "JOB_QUEUE_BACKEND=postgres requires UPLOAD_DIR to be set to an absolute path "
+            "on storage shared by all web and worker nodes"
+        )
+    if not Path(setting).is_dir():
+        raise RuntimeError(f"UPLOAD_DIR {setting} does not exist - is the shared volume mounted?")
@@ -0,0 +1,70 @@
+import time
+
+import jwt
+import pytest
+from fastapi import HTTPException
+from starlette.requests import Request
+from starlette.responses import Response
+
+import auth.context as context_module
+from auth.context import TEST_USER, get_auth_context
+from auth.dependencies import require_auth
+from auth.jwt import get_current_user_from_cookie, get_current_user_optional
+from auth.middleware import auth_middleware
+from auth.verifier import TokenVerifier
+
+SECRET = "test-secret-test-secret-test-secret"
+
+
+def _request(token=None, query=b""):
+    headers = [(b"cookie", f"session_token={token}".encode())] if token else []
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": headers, "query_string": query})
+
+
+async def _call_next(request):
+    return Response("ok")
+
+
+class TestAuthContext:
+    """Tests for the request-scoped auth context filled by auth_middleware"""
+
+    @pytest.fixture(autouse=True)
+    def verifier(self, monkeypatch):
+        verifier = TokenVerifier(secret=SECRET, jwks_url=None)
+        monkeypatch.setattr(context_module, "token_verifier", verifier)
+        return verifier
+
+    @pytest.mark.asyncio
+    async def test_token_is_verified_once_per_request(self, verifier):
+        token = jwt.encode({"sub": "user-1", "aud": "authenticated", "exp": int(time.time()) + 60,
+                            "user_metadata": {"login": "tester"}}, SECRET, algorithm="HS256")
+        request = _request(token)
+
+        await auth_middleware(request, _call_next)
+        user = {"id": "user-1", "login": "tester"}
+        assert request.state.user == user
+        assert await get_current_user_optional(request) == user
+        assert await get_current_user_from_cookie(request) == user
+        assert await require_auth(request) == user
+        assert verifier.hits + verifier.misses == 1
+
+    @pytest.mark.asyncio
+    async def test_missing_or_invalid_cookie(self):
+        for request, detail in ((_request(), "Not authenticated"),
+                                (_request("not-a-token"), "Could not validate credentials")):
+            await auth_middleware(request, _call_next)
+            assert request.state.authenticated is False
+            assert await get_current_user_optional(request) is None
+            with pytest.raises(HTTPException) as exc_info:
+                await get_current_user_from_cookie(request)
+            assert (exc_info.value.status_code, exc_info.value.detail) == (401, detail)
+
+    @pytest.mark.asyncio
+    async def test_test_mode_user(self):
+        request = _request(query=b"test_mode=true")
+        context = await get_auth_context(request)
+
+        assert context.test_mode and context.user == TEST_USER
+        assert await require_auth(request) == TEST_USER
+        # Opcjonalne uwierzytelnienie nie podstawia użytkownika testowego bez ciasteczka
+        assert await get_current_user_optional(request) is None
@@ -0,0 +1,87 @@
+import asyncio
+from types import SimpleNamespace
+
+import jwt
+import pytest
+
+from auth import service
+
+
+class TestSharedAuthService:
+    """Tests for the application-wide Supabase client"""
+
+    @pytest.fixture(autouse=True)
+    def supabase_config(self, monkeypatch):
+        monkeypatch.setenv("SUPABASE_URL", "http://127.0.0.1:54321")
+        monkeypatch.setenv("SUPABASE_KEY", jwt.encode({"role": "anon"}, "test-secret-test-secret-test-secret", algorithm="HS256"))
+        service.close_auth_service()
+        yield
+        service.close_auth_service()
+
+    def test_dependency_returns_one_shared_instance(self):
+        first = service.get_auth_service()
+
+        assert service.get_auth_service() is first
+        assert service.init_auth_service() is first
+
+        service.close_auth_service()
+        assert service.get_auth_service() is not first
+
+    def test_missing_configuration(self, monkeypatch):
+        monkeypatch.delenv("SUPABASE_KEY")
+        with pytest.raises(ValueError):
+            service.get_auth_service()
+
+
+class FakeAuth:
+    """Stand-in for the GoTrue client keeping a session like the real one"""
+
+    def __init__(self, calls):
+        self.calls = calls
+        self.session = None
+        self.admin = self
+
+    def sign_in_with_password(self, credentials):
+        token = f"token-of-{credentials['email']}"
+        self.session = token
+        user = SimpleNamespace(id=credentials["email"], user_metadata={})
+        return SimpleNamespace(user=user, session=SimpleNamespace(access_token=token, refresh_token="r", expires_at=0))
+
+    def sign_out(self, jwt=None, scope="global"):
+        self.calls.append(("sign_out", jwt if jwt is not None else self.session))
+
+    def set_session(self, access_token, refresh_token):
+        self.session = access_token
+
+    def update_user(self, attributes, options=None):
+        self.calls.append(("update_user", self.session))
+
+
+class TestSessionIsolation:
+    """The shared client must never act on the session of another user"""
+
+    @pytest.fixture
+    def calls(self):
+        return []
+
+    @pytest.fixture
+    def auth_service(self, calls):
+        return service.AuthService(client_factory=lambda: SimpleNamespace(auth=FakeAuth(calls)))
+
+    def test_logout_revokes_only_the_callers_session(self, auth_service, calls):
+        asyncio.run(auth_service.login("alice", "pw"))
+        asyncio.run(auth_service.login("bob", "pw"))
+
+        asyncio.run(auth_service.logout("token-of-alice@example.com"))
+        # Wylogowanie bez ciasteczka niczego nie unieważnia
+        asyncio.run(auth_service.logout(None))
+
+        assert calls == [("sign_out", "token-of-alice@example.com")]
+
+    def test_set_new_password_uses_the_reset_token(self, auth_service, calls):
+        asyncio.run(auth_service.login("alice", "pw"))
+        asyncio.run(auth_service.login("bob", "pw"))
+
+        asyncio.run(auth_service.set_new_password("reset-token-of-alice", "new-password"))
+
+        assert calls == [("update_user", "reset-token-of-alice")]
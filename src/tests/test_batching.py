@@ -0,0 +1,90 @@
+import asyncio
+import time
+
+import pytest
+
+from services.batching import BatchScheduler, BatchQueueFullError
+
+
+class RecordingModel:
+    """Fake model that records the size of every generate call"""
+
+    def __init__(self):
+        self.calls = []
+
+    def generate(self, texts, max_words=100):
+        self.calls.append(len(texts))
+        return [text.upper()[:max_words] for text in texts]
+
+
+class SlowModel(RecordingModel):
+    """Fake model whose generate call blocks for a while"""
+
+    def generate(self, texts, max_words=100):
+        time.sleep(0.2)
+        return super().generate(texts, max_words)
+
+
+class TestBatchScheduler:
+    """Tests for the micro-batching inference scheduler"""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_requests_share_a_batch(self):
+        """Requests arriving within the wait window run in one generate call"""
+        model = RecordingModel()
+        scheduler = BatchScheduler(max_batch_size=8, max_wait_ms=50)
+        await scheduler.start(model)
+        try:
+            results = await asyncio.gather(*[scheduler.submit(f"text {i}") for i in range(5)])
+        finally:
+            await scheduler.stop()
+
+        assert results == [f"TEXT {i}" for i in range(5)]
+        assert model.calls == [5]
+        assert scheduler.stats()["mean_batch_size"] == 5
+
+    @pytest.mark.asyncio
+    async def test_batch_size_limit(self):
+        """Batches never exceed max_batch_size"""
+        model = RecordingModel()
+        scheduler = BatchScheduler(max_batch_size=2, max_wait_ms=50)
+        await scheduler.start(model)
+        try:
+            await asyncio.gather(*[scheduler.submit(f"text {i}") for i in range(5)])
+        finally:
+            await scheduler.stop()
+
+        assert max(model.calls) <= 2
+        assert sum(model.calls) == 5
+
+    @pytest.mark.asyncio
+    async def test_queue_full(self):
+        """Submitting past the queue capacity is rejected"""
+        scheduler = BatchScheduler(max_batch_size=1, max_wait_ms=0, max_queue_size=1)
+        await scheduler.start(RecordingModel())
+        # Zatrzymujemy kolektor, żeby kolejka się nie opróżniała
+        scheduler._collector.cancel()
+        scheduler._collector = asyncio.create_task(asyncio.sleep(3600))
+        try:
+            first = asyncio.create_task(scheduler.submit("first"))
+            await asyncio.sleep(0)
+            with pytest.raises(BatchQueueFullError):
+                await scheduler.submit("second")
+            first.cancel()
+        finally:
+            await scheduler.stop()
+
+    @pytest.mark.asyncio
+    async def test_stop_fails_in_flight_batch(self):
+        """Stopping mid-batch fails the requests of that batch and those still queued"""
+        scheduler = BatchScheduler(max_batch_size=2, max_wait_ms=0)
+        await scheduler.start(SlowModel())
+        requests = [asyncio.create_task(scheduler.submit(f"text {i}")) for i in range(4)]
+        await asyncio.sleep(0.05)
+        assert scheduler._in_flight
+
+        await scheduler.stop()
+
+        results = await asyncio.wait_for(asyncio.gather(*requests, return_exceptions=True), timeout=1)
+        assert all(isinstance(result, RuntimeError) for result in results)
+        assert scheduler._in_flight == []
@@ -0,0 +1,57 @@
+import pytest
+
+from services.chunking import ChunkSummaryCache, chunk_text, iter_chunks, split_sentences
+from services.extraction_engine import PageText
+
+
+def count_words(text):
+    return len(text.split())
+
+
+async def _pages(texts):
+    for number, text in enumerate(texts, start=1):
+        yield PageText(number, text)
+
+
+class TestChunking:
+    """Tests for sentence-aligned, token-budgeted chunking"""
+
+    def test_split_sentences(self):
+        """Sentences are split on terminal punctuation and whitespace is normalised"""
+        text = "First sentence. Second one!  Third\n(line) here? Last"
+        assert split_sentences(text) == ["First sentence.", "Second one!", "Third (line) here?", "Last"]
+
+    def test_chunks_respect_budget_and_sentences(self):
+        """Chunks fit the budget and never cut a sentence that fits on its own"""
+        text = " ".join(f"Sentence number {i} has six words." for i in range(20))
+        chunks = chunk_text(text, max_tokens=20, count_tokens=count_words)
+
+        assert all(count_words(chunk) <= 20 for chunk in chunks)
+        assert all(chunk.endswith(".") for chunk in chunks)
+        assert " ".join(chunks) == " ".join(split_sentences(text))
+
+    def test_long_sentence_is_split(self):
+        """A sentence longer than the budget is split into word windows"""
+        chunks = chunk_text("word " * 25, max_tokens=10, count_tokens=count_words)
+        assert [count_words(chunk) for chunk in chunks] == [10, 10, 5]
+
+    @pytest.mark.asyncio
+    async def test_iter_chunks_joins_sentences_across_pages(self):
+        """A sentence broken by a page boundary ends up in one piece"""
+        pages = _pages(["Intro sentence. This sentence continues", "on the next page. Done."])
+        chunks = [chunk async for chunk in iter_chunks(pages, max_tokens=100, count_tokens=count_words)]
+
+        assert chunks == ["Intro sentence. This sentence continues on the next page. Done."]
+
+    def test_chunk_summary_cache(self):
+        """Cached chunk summaries are keyed by model version and chunk length"""
+        cache = ChunkSummaryCache(max_entries=1)
+        key = ChunkSummaryCache.key("v1", 80, "chunk")
+
+        assert cache.get(key) is None
+        cache.put(key, "summary")
+        assert cache.get(key) == "summary"
+        assert cache.get(ChunkSummaryCache.key("v2", 80, "chunk")) is None
+
+        cache.put(ChunkSummaryCache.key("v1", 80, "other"), "other summary")
+        assert cache.get(key) is None
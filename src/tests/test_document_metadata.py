@@ -0,0 +1,124 @@
+import uuid
+
+import fitz  # PyMuPDF
+import pytest
+
+import services.document_metadata as document_metadata_module
+from services.document_metadata import DocumentMetadataCache
+from services.extraction_engine import ExtractionEngine
+from services.text_cache import hash_file
+
+
+def _make_pdf(path, pages, title=None):
+    doc = fitz.open()
+    for i in range(pages):
+        doc.new_page().insert_text((72, 72), f"Page number {i + 1}")
+    if title:
+        doc.set_metadata({"title": title, "author": "A. Author"})
+    doc.save(path)
+    doc.close()
+
+
+class TestDocumentMetadataCache:
+    """Tests for PDF metadata extracted at upload time"""
+
+    @pytest.fixture
+    def engine(self, monkeypatch):
+        engine = ExtractionEngine(max_workers=1)
+        monkeypatch.setattr(document_metadata_module, "extraction_engine", engine)
+        return engine
+
+    @pytest.mark.asyncio
+    async def test_register_reads_metadata_once(self, tmp_path, engine):
+        """Registered metadata is served from memory, even after the file is gone"""
+        pdf_path = tmp_path / "upload.pdf"
+        _make_pdf(pdf_path, 3, title="Attention Is All You Need")
+        cache = DocumentMetadataCache(persist=False)
+        document_id = uuid.uuid4()
+
+        try:
+            metadata = await cache.register(document_id, str(pdf_path), "paper.pdf", user_id="test-user-id")
+        finally:
+            await engine.shutdown()
+
+        assert metadata.title == "Attention Is All You Need"
+        assert metadata.author == "A. Author"
+        assert metadata.page_count == 3
+        assert metadata.file_size_bytes == pdf_path.stat().st_size
+        assert metadata.content_hash == await hash_file(pdf_path)
+
+        pdf_path.unlink()
+        assert await cache.get(document_id) == metadata
+        assert await cache.display_name(uuid.uuid4()) == "Unknown document"
+        assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+    @pytest.mark.asyncio
+    async def test_untitled_pdf_uses_file_name_and_lru_is_bounded(self, tmp_path, engine):
+        pdf_path = tmp_path / "upload.pdf"
+        _make_pdf(pdf_path, 1)
+        cache = DocumentMetadataCache(max_entries=1, persist=False)
+        first, second = uuid.uuid4(), uuid.uuid4()
+
+        try:
+            metadata = await cache.register(first, str(pdf_path), "paper.pdf")
+            await cache.register(second, str(pdf_path), "other.pdf")
+        finally:
+            await engine.shutdown()
+
+        assert metadata.title == "paper.pdf" and metadata.author is None
+        assert await cache.get(first) is None
+        assert await cache.display_name(second) == "other.pdf"
+
+    @pytest.mark.asyncio
+    async def test_unregistered_upload_is_read_once(self, tmp_path, engine, monkeypatch):
+        """Uploads from before metadata was stored fall back to the file's title or name"""
+        monkeypatch.setattr(document_metadata_module.uploads, "UPLOAD_DIR", tmp_path)
+        titled, untitled = uuid.uuid4(), uuid.uuid4()
+        _make_pdf(tmp_path / f"{titled}.pdf", 1, title="Legacy Paper")
+        _make_pdf(tmp_path / f"{untitled}.pdf", 1)
+        cache = DocumentMetadataCache(persist=False)
+
+        try:
+            assert await cache.display_name(titled) == "Legacy Paper"
+            assert await cache.display_name(untitled) == f"{untitled}.pdf"
+        finally:
+            await engine.shutdown()
+
+        (tmp_path / f"{titled}.pdf").unlink()
+        assert await cache.display_name(titled) == "Legacy Paper"
+        assert (await cache.load(untitled)).content_hash == await hash_file(tmp_path / f"{untitled}.pdf")
+
+
+class TestStoredContentHash:
+    """create_summary keys its caches with the hash stored at upload time"""
+
+    def test_create_summary_does_not_rehash_registered_upload(self, tmp_path, monkeypatch):
+        import asyncio
+        import services.summary_service as summary_service
+        from services.backends import MockSciBertModel
+        from services.document_metadata import DocumentMetadata
+
+        monkeypatch.setattr(document_metadata_module.uploads, "UPLOAD_DIR", tmp_path)
+        document_id = uuid.uuid4()
+        (tmp_path / f"{document_id}.pdf").write_bytes(b"%PDF-1.4")
+        cache = DocumentMetadataCache(persist=False)
+        cache._remember(DocumentMetadata(document_id, "Paper", None, 1, 8, "stored-hash"))
+        monkeypatch.setattr(summary_service, "document_metadata", cache)
+
+        async def no_hash(path):
+            raise AssertionError("the upload was hashed again")
+
+        async def cached_summary(content_hash, version, options):
+            return f"summary for {content_hash}"
+
+        async def save(document_id, content, length, session=None):
+            return {"id": "s1", "content": content}
+
+        monkeypatch.setattr(summary_service, "hash_file", no_hash)
+        monkeypatch.setattr(summary_service.summary_result_cache, "get", cached_summary)
+        monkeypatch.setattr(summary_service.summary_store, "save", save)
+
+        service = summary_service.SummaryService(None, model=MockSciBertModel())
+        summary = asyncio.run(service.create_summary(document_id))
+
+        assert summary["content"] == "summary for stored-hash"
@@ -0,0 +1,131 @@
+import os
+import time
+
+import pytest
+import fitz  # PyMuPDF
+
+from services.extraction_engine import ExtractionEngine, ExtractionError, InvalidPDFError, split_page_ranges
+
+
+def _make_pdf(path, pages):
+    """Create a small PDF with one line of text per page"""
+    doc = fitz.open()
+    for i in range(pages):
+        page = doc.new_page()
+        page.insert_text((72, 72), f"Page number {i + 1}")
+    doc.save(path)
+    doc.close()
+
+
+def _die_once(marker_path, deadline):
+    """Worker job that kills its process the first time it runs"""
+    if not os.path.exists(marker_path):
+        open(marker_path, "w").close()
+        os._exit(1)
+    return os.getpid()
+
+
+def _die(deadline):
+    os._exit(1)
+
+
+class TestExtractionEngine:
+    """Tests for the process-pool extraction engine"""
+
+    @pytest.mark.asyncio
+    async def test_extract_text(self, tmp_path):
+        """Text of every page is returned in order"""
+        pdf_path = tmp_path / "doc.pdf"
+        _make_pdf(pdf_path, 3)
+
+        engine = ExtractionEngine(max_workers=1)
+        try:
+            text = await engine.extract_text(str(pdf_path))
+        finally:
+            await engine.shutdown()
+
+        assert text.index("Page number 1") < text.index("Page number 2") < text.index("Page number 3")
+
+    @pytest.mark.asyncio
+    async def test_invalid_pdf(self, tmp_path):
+        """A non-PDF file raises InvalidPDFError from the worker"""
+        bad_path = tmp_path / "bad.pdf"
+        bad_path.write_bytes(b"this is not a pdf")
+
+        engine = ExtractionEngine(max_workers=1)
+        try:
+            with pytest.raises(InvalidPDFError):
+                await engine.extract_text(str(bad_path))
+        finally:
+            await engine.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_page_parallel_extraction(self, tmp_path):
+        """Page ranges extracted in parallel are joined back in page order"""
+        pdf_path = tmp_path / "long.pdf"
+        _make_pdf(pdf_path, 12)
+
+        engine = ExtractionEngine(max_workers=2, parallel_threshold=4, min_pages_per_range=2)
+        try:
+            text = await engine.extract_text(str(pdf_path))
+        finally:
+            await engine.shutdown()
+
+        positions = [text.index(f"Page number {i}\n") for i in range(1, 13)]
+        assert positions == sorted(positions)
+
+    def test_split_page_ranges(self):
+        """Ranges cover every page exactly once and respect the minimum size"""
+        assert split_page_ranges(10, 4, min_pages=1) == [(0, 3), (3, 6), (6, 9), (9, 10)]
+        assert split_page_ranges(10, 4, min_pages=5) == [(0, 5), (5, 10)]
+        assert split_page_ranges(3, 8, min_pages=16) == [(0, 3)]
+        assert split_page_ranges(0, 4) == []
+
+    @pytest.mark.asyncio
+    async def test_iter_pages_streams_in_order(self, tmp_path):
+        """Pages are streamed one by one with their page numbers"""
+        pdf_path = tmp_path / "long.pdf"
+        _make_pdf(pdf_path, 10)
+
+        engine = ExtractionEngine(max_workers=2, parallel_threshold=4)
+        try:
+            pages = [page async for page in engine.iter_pages(str(pdf_path), pages_per_batch=3)]
+        finally:
+            await engine.shutdown()
+
+        assert [page.page_number for page in pages] == list(range(1, 11))
+        assert all(f"Page number {page.page_number}\n" in page.text for page in pages)
+
+
+class TestBrokenPool:
+    """Tests for recovering from dead worker processes"""
+
+    @pytest.mark.asyncio
+    async def test_job_is_retried_on_a_new_pool(self, tmp_path):
+        """A worker dying mid-job breaks the pool; the job runs again on a fresh one"""
+        engine = ExtractionEngine(max_workers=1)
+        try:
+            await engine.start(warm=False)
+            assert engine._executor._mp_context.get_start_method() != "fork"
+
+            pid = await engine._submit(time.time() + 30, _die_once, str(tmp_path / "marker"))
+
+            assert pid != os.getpid()
+            assert engine.pool_restarts == 1
+        finally:
+            await engine.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_second_crash_is_reported(self, tmp_path):
+        """A job that kills every worker fails with ExtractionError and leaves a usable pool"""
+        pdf_path = tmp_path / "doc.pdf"
+        _make_pdf(pdf_path, 2)
+        engine = ExtractionEngine(max_workers=1)
+        try:
+            with pytest.raises(ExtractionError):
+                await engine._submit(time.time() + 30, _die)
+
+            assert engine.pool_restarts == 2
+            assert "Page number 2" in await engine.extract_text(str(pdf_path))
+        finally:
+            await engine.shutdown()
@@ -0,0 +1,155 @@
+import asyncio
+import uuid
+
+import pytest
+from fastapi import HTTPException
+
+from services.job_queue import JobQueue, JobQueueFullError, JobState
+
+
+async def wait_finished(queue, job, timeout=2.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not (await queue.get(job.id)).finished:
+        assert asyncio.get_running_loop().time() < deadline, "job did not finish"
+        await asyncio.sleep(0.01)
+
+
+class TestJobQueue:
+    """Tests for the background summarization job queue"""
+
+    @pytest.mark.asyncio
+    async def test_job_runs_and_reports_progress(self):
+        """A submitted job is processed by a worker and records the summary id"""
+        release = asyncio.Event()
+
+        async def handler(job):
+            job.update_progress("summarizing", 0.5)
+            await release.wait()
+            return {"id": "summary-1"}
+
+        queue = JobQueue(workers=1)
+        await queue.start(handler)
+        try:
+            job = await queue.submit(uuid.uuid4(), user_id="user-1")
+            await asyncio.sleep(0.05)
+            assert job.state == JobState.RUNNING
+            assert job.to_dict()["progress"] == 0.5
+
+            release.set()
+            await wait_finished(queue, job)
+        finally:
+            await queue.stop()
+
+        assert job.state == JobState.SUCCEEDED
+        assert job.summary_id == "summary-1"
+        assert job.progress == 1.0
+        assert queue.stats()["succeeded_total"] == 1
+
+    @pytest.mark.asyncio
+    async def test_http_errors_are_recorded(self):
+        """Handler HTTP errors mark the job failed with their status code"""
+        async def handler(job):
+            raise HTTPException(status_code=422, detail="The file is not a valid PDF document")
+
+        queue = JobQueue(workers=1)
+        await queue.start(handler)
+        try:
+            job = await queue.submit(uuid.uuid4())
+            await wait_finished(queue, job)
+        finally:
+            await queue.stop()
+
+        assert job.state == JobState.FAILED
+        assert job.status_code == 422
+        assert job.error == "The file is not a valid PDF document"
+
+    @pytest.mark.asyncio
+    async def test_worker_concurrency_and_capacity(self):
+        """At most `workers` jobs run at once and a full queue rejects new jobs"""
+        running = 0
+        peak = 0
+        release = asyncio.Event()
+
+        async def handler(job):
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await release.wait()
+            running -= 1
+            return {"id": str(job.id)}
+
+        queue = JobQueue(workers=2, max_queue_size=2)
+        await queue.start(handler)
+        try:
+            jobs = [await queue.submit(uuid.uuid4()) for _ in range(2)]
+            await asyncio.sleep(0.05)
+            jobs += [await queue.submit(uuid.uuid4()) for _ in range(2)]
+            with pytest.raises(JobQueueFullError):
+                await queue.submit(uuid.uuid4())
+
+            release.set()
+            for job in jobs:
+                await wait_finished(queue, job)
+        finally:
+            await queue.stop()
+
+        assert peak == 2
+        assert all(job.state == JobState.SUCCEEDED for job in jobs)
+
+    @pytest.mark.asyncio
+    async def test_finished_jobs_are_retired(self):
+        """Only the most recent finished jobs are kept for polling"""
+        async def handler(job):
+            return {"id": "summary"}
+
+        queue = JobQueue(workers=1, retention=1)
+        await queue.start(handler)
+        try:
+            first = await queue.submit(uuid.uuid4())
+            await wait_finished(queue, first)
+            second = await queue.submit(uuid.uuid4())
+            await wait_finished(queue, second)
+        finally:
+            await queue.stop()
+
+        assert await queue.get(first.id) is None
+        assert await queue.get(second.id) is second
+
+
+class TestRetryBackoff:
+    """Tests for the Postgres queue retry policy"""
+
+    def test_retry_delay_grows_and_is_capped(self):
+        """Backoff doubles per attempt (with jitter) and never exceeds the cap"""
+        from services.pg_job_queue import retry_delay
+
+        assert all(0 <= retry_delay(1, base=5, cap=600) <= 5 for _ in range(50))
+        assert all(0 <= retry_delay(3, base=5, cap=600) <= 20 for _ in range(50))
+        assert all(retry_delay(20, base=5, cap=600) <= 600 for _ in range(50))
+
+
+class TestSharedUploads:
+    """Tests for the upload storage requirements of multi-node job processing"""
+
+    def test_postgres_queue_requires_shared_upload_dir(self, tmp_path):
+        from services.uploads import check_shared_upload_dir
+
+        check_shared_upload_dir("memory", None)
+        check_shared_upload_dir("postgres", str(tmp_path))
+        for setting in (None, "uploads", str(tmp_path / "not-mounted")):
+            with pytest.raises(RuntimeError):
+                check_shared_upload_dir("postgres", setting)
+
+    def test_missing_upload_is_retryable(self, tmp_path, monkeypatch):
+        """A job whose PDF this worker can't see fails with a status the Postgres queue retries"""
+        import services.uploads as uploads
+        from services.job_queue import SummaryJob
+        from services.pg_job_queue import _is_retryable
+        from services.summary_service import run_summary_job
+
+        monkeypatch.setattr(uploads, "UPLOAD_DIR", tmp_path)
+        job = SummaryJob(id=uuid.uuid4(), document_id=uuid.uuid4())
+
+        with pytest.raises(HTTPException) as error:
+            asyncio.run(run_summary_job(job))
+        assert _is_retryable(error.value.status_code)
@@ -0,0 +1,49 @@
+import pytest
+
+from services.metrics import Gauge, Histogram, pipeline_stage, pipeline_stage_duration, pipeline_stages_in_flight, render_gauges
+
+
+class TestHistogram:
+    """Tests for the Prometheus histogram"""
+
+    def test_cumulative_buckets_sum_and_count(self):
+        histogram = Histogram("latency_seconds", "Latency", ("route",), buckets=(0.1, 1.0))
+
+        histogram.observe(0.05, "/a")
+        histogram.observe(0.1, "/a")
+        histogram.observe(0.5, "/a")
+        histogram.observe(5.0, "/a")
+
+        assert histogram.render() == [
+            "# HELP latency_seconds Latency",
+            "# TYPE latency_seconds histogram",
+            'latency_seconds_bucket{route="/a",le="0.1"} 2',
+            'latency_seconds_bucket{route="/a",le="1.0"} 3',
+            'latency_seconds_bucket{route="/a",le="+Inf"} 4',
+            'latency_seconds_sum{route="/a"} 5.65',
+            'latency_seconds_count{route="/a"} 4',
+        ]
+
+    def test_label_values_are_escaped(self):
+        gauge = Gauge("g", "Gauge", ("path",))
+        gauge.set(1, 'a"b\\c')
+
+        assert gauge.render()[-1] == 'g{path="a\\"b\\\\c"} 1'
+
+
+class TestPipelineStage:
+    """Tests for pipeline stage timing"""
+
+    def test_stage_is_observed_even_on_error(self):
+        before = pipeline_stage_duration.count("test_stage")
+
+        with pytest.raises(RuntimeError):
+            with pipeline_stage("test_stage"):
+                assert pipeline_stages_in_flight._values[("test_stage",)] == 1
+                raise RuntimeError("boom")
+
+        assert pipeline_stage_duration.count("test_stage") == before + 1
+        assert pipeline_stages_in_flight._values[("test_stage",)] == 0
+
+    def test_render_gauges_without_label(self):
+        assert render_gauges("up", "Up", None, [(None, 1)])[-1] == "up 1"
@@ -0,0 +1,162 @@
+"""Integration tests of the Postgres job queue SQL (claim, lease, reaper, retry)
+
+Run against the local Supabase database (DATABASE_URL, migrations applied
+with `supabase db reset`); skipped when it can't be reached.
+"""
+import asyncio
+import uuid
+
+import pytest
+from sqlalchemy import text
+
+from db.database import engine
+from services.job_queue import JobState
+from services import pg_job_queue
+from services.pg_job_queue import PostgresJobQueue, _HEARTBEAT
+
+
+def run_pg(coroutine_function, *args):
+    """Run a test coroutine and drop the pool's connections, which are bound to its loop"""
+    async def main():
+        try:
+            return await coroutine_function(*args)
+        finally:
+            await engine.dispose()
+    return asyncio.run(main())
+
+
+async def _probe():
+    async with engine.connect() as conn:
+        table = await conn.scalar(text("select to_regclass('scisummarize.summary_jobs')"))
+        pending = await conn.scalar(text(
+            "select count(*) from scisummarize.summary_jobs where state in ('queued', 'running')"
+        )) if table is not None else 0
+    return table, pending
+
+
+@pytest.fixture
+def queue():
+    try:
+        table, pending = run_pg(lambda: asyncio.wait_for(_probe(), timeout=5))
+    except Exception as e:
+        pytest.skip(f"Postgres is not available: {str(e)}")
+    if table is None:
+        pytest.skip("scisummarize.summary_jobs does not exist - apply the Supabase migrations")
+    if pending:
+        # Claim bierze najstarsze zadanie - cudze zadania zostałyby przejęte przez test
+        pytest.skip("The database has queued or running jobs")
+
+    queue = PostgresJobQueue(workers=0, lease_seconds=30, max_attempts=2)
+    queue.document_ids = []
+    yield queue
+
+    async def cleanup():
+        async with engine.begin() as conn:
+            await conn.execute(text("delete from scisummarize.summary_jobs where document_id = any(:ids)"),
+                               {"ids": queue.document_ids})
+    run_pg(cleanup)
+
+
+async def submit(queue, count=1, profile_id=None):
+    jobs = []
+    for _ in range(count):
+        job = await queue.submit(uuid.uuid4(), profile_id=profile_id)
+        queue.document_ids.append(job.document_id)
+        jobs.append(job)
+    return jobs
+
+
+async def expire_lease(job_id):
+    async with engine.begin() as conn:
+        await conn.execute(text(
+            "update scisummarize.summary_jobs set lease_expires_at = now() - interval '1 second' where id = :id"
+        ), {"id": job_id})
+
+
+class TestPostgresJobQueue:
+    """Tests of the claim/lease/reaper SQL against a real database"""
+
+    def test_concurrent_claims_get_different_jobs(self, queue):
+        async def scenario():
+            jobs = await submit(queue, 2)
+            claimed = await asyncio.gather(queue._claim("node-a:1:0"), queue._claim("node-b:1:0"))
+            assert {job.id for job in claimed} == {job.id for job in jobs}
+            assert all(job.state == JobState.RUNNING and job.attempts == 1 for job in claimed)
+            assert await queue._claim("node-c:1:0") is None
+
+        run_pg(scenario)
+
+    def test_claimed_job_keeps_the_trace_and_profile(self, queue, monkeypatch):
+        traceparent = "00-4bf92f3577b34da6a3ce929d0e0e4736-00f067aa0ba902b7-01"
+        monkeypatch.setattr(pg_job_queue.tracer, "traceparent", lambda: traceparent)
+
+        async def scenario():
+            [job] = await submit(queue, profile_id="f3a1c2")
+            claimed = await queue._claim("node-a:1:0")
+            assert (job.traceparent, claimed.traceparent) == (traceparent, traceparent)
+            assert claimed.profile_id == "f3a1c2"
+
+        run_pg(scenario)
+
+    def test_heartbeat_needs_the_lease(self, queue):
+        async def scenario():
+            [job] = await submit(queue)
+            claimed = await queue._claim("node-a:1:0")
+            params = {"id": claimed.id, "lease": 30, "stage": "summarizing", "progress": 0.5}
+            async with engine.begin() as conn:
+                owner = await conn.execute(_HEARTBEAT, {**params, "worker": "node-a:1:0"})
+                stranger = await conn.execute(_HEARTBEAT, {**params, "worker": "node-b:1:0"})
+            assert (owner.rowcount, stranger.rowcount) == (1, 0)
+            assert (await queue.get(job.id)).progress == 0.5
+
+        run_pg(scenario)
+
+    def test_expired_lease_is_reaped_then_dead_lettered(self, queue):
+        async def scenario():
+            [job] = await submit(queue)
+            await queue._claim("node-a:1:0")
+            await expire_lease(job.id)
+
+            # Zadanie martwego workera wraca do kolejki i od razu trafia do innego
+            reclaimed = await queue._claim("node-b:1:0")
+            assert reclaimed.id == job.id
+            assert reclaimed.attempts == 2
+            assert queue.reaped_total == 1
+
+            await expire_lease(job.id)
+            assert await queue._claim("node-c:1:0") is None
+            dead = await queue.get(job.id)
+            assert dead.state == JobState.DEAD
+            assert dead.error == "Worker lease expired"
+
+        run_pg(scenario)
+
+    def test_server_errors_are_retried_client_errors_fail(self, queue):
+        async def scenario():
+            [job] = await submit(queue)
+            claimed = await queue._claim("node-a:1:0")
+            await queue._fail("node-a:1:0", claimed, 503, "Document file not available on this worker")
+            assert (await queue.get(job.id)).state == JobState.QUEUED
+            assert queue.retried_total == 1
+
+            async with engine.begin() as conn:
+                await conn.execute(text("update scisummarize.summary_jobs set run_after = now() where id = :id"),
+                                   {"id": job.id})
+            claimed = await queue._claim("node-b:1:0")
+            await queue._fail("node-b:1:0", claimed, 422, "The file is not a valid PDF document")
+            failed = await queue.get(job.id)
+            assert (failed.state, failed.status_code) == (JobState.FAILED, 422)
+
+        run_pg(scenario)
+
+    def test_stop_releases_running_jobs(self, queue):
+        async def scenario():
+            [job] = await submit(queue)
+            await queue._claim("node-a:1:0")
+            queue._worker_ids = ["node-a:1:0"]
+            await queue.stop()
+
+            released = await queue.get(job.id)
+            assert (released.state, released.attempts) == (JobState.QUEUED, 0)
+
+        run_pg(scenario)
@@ -0,0 +1,84 @@
+import asyncio
+
+import pytest
+from starlette.requests import Request
+
+from services import profiling
+from services.profiling import RequestProfiler, current_profile_id, profile_id_for, profiled
+
+
+def make_request(headers: dict) -> Request:
+    return Request({
+        "type": "http",
+        "method": "GET",
+        "path": "/api/documents/x/summaries/pdf",
+        "headers": [(key.lower().encode(), value.encode()) for key, value in headers.items()],
+        "query_string": b"",
+    })
+
+
+class TestProfileSelection:
+    """Tests for selecting requests to profile"""
+
+    def test_admin_token_selects_request(self, monkeypatch):
+        monkeypatch.setattr(profiling, "PROFILE_ADMIN_TOKEN", "admin-token")
+
+        assert profile_id_for(make_request({}), sample_rate=0) is None
+        assert profile_id_for(make_request({"X-Profile-Token": "wrong"}), sample_rate=0) is None
+        assert profile_id_for(make_request({"X-Profile-Token": "admin-token", "X-Request-ID": "req-1"}),
+                              sample_rate=0) == "req-1"
+        # Identyfikator żądania nienadający się na nazwę pliku jest zastępowany
+        profile_id = profile_id_for(make_request({"X-Profile-Token": "admin-token", "X-Request-ID": "../x"}),
+                                    sample_rate=0)
+        assert profile_id not in (None, "../x")
+
+    def test_no_token_configured(self, monkeypatch):
+        monkeypatch.setattr(profiling, "PROFILE_ADMIN_TOKEN", None)
+
+        assert profile_id_for(make_request({"X-Profile-Token": ""}), sample_rate=0) is None
+        assert profile_id_for(make_request({}), sample_rate=1.0) is not None
+
+    def test_sampled_request_gets_a_random_id(self, monkeypatch):
+        monkeypatch.setattr(profiling, "PROFILE_ADMIN_TOKEN", "admin-token")
+
+        profile_id = profile_id_for(make_request({"X-Request-ID": "req-1"}), sample_rate=1.0)
+        assert profile_id not in (None, "req-1")
+
+
+class TestProfiledCalls:
+    """Tests for the profiling decorator and the bounded profile directory"""
+
+    @pytest.fixture
+    def profiler(self, tmp_path, monkeypatch):
+        profiler = RequestProfiler(directory=str(tmp_path), max_files=2)
+        monkeypatch.setattr(profiling, "request_profiler", profiler)
+        monkeypatch.setattr(RequestProfiler, "_pyinstrument", staticmethod(lambda: None))
+        return profiler
+
+    def test_unselected_call_is_not_profiled(self, profiler):
+        @profiled("work")
+        async def work():
+            return 42
+
+        assert asyncio.run(work()) == 42
+        assert profiler.list_profiles() == []
+
+    def test_selected_calls_are_saved_and_pruned(self, profiler):
+        @profiled("work")
+        async def work():
+            await asyncio.sleep(0)
+            return sum(range(1000))
+
+        async def run(profile_id: str):
+            current_profile_id.set(profile_id)
+            return await work()
+
+        for profile_id in ("a", "b", "c"):
+            assert asyncio.run(run(profile_id)) == 499500
+
+        names = sorted(profile["filename"] for profile in profiler.list_profiles())
+        assert len(names) == 2
+        assert all(name.endswith(".work.pstats") for name in names)
+        assert profiler.profiles_written == 3
+        assert profiler.get_path(names[0]) is not None
+        assert profiler.get_path("../" + names[0]) is None
@@ -0,0 +1,55 @@
+import time
+
+import pytest
+
+from models.summary import SummaryOptions
+from services.result_cache import DiskResultTier, MemoryResultTier, SummaryResultCache
+
+
+class TestSummaryResultCache:
+    """Tests for the tiered summary result cache"""
+
+    @pytest.mark.asyncio
+    async def test_key_includes_version_and_normalized_options(self, tmp_path):
+        """Equivalent options hit the same entry; another model version misses"""
+        cache = SummaryResultCache([MemoryResultTier(), DiskResultTier(str(tmp_path))])
+        options = SummaryOptions.from_form("short", focusAreas=["Methods", "results"])
+        await cache.put("hash", "v1", options, "summary")
+
+        same = SummaryOptions.from_form("short", focusAreas=["results", "methods"])
+        assert await cache.get("hash", "v1", same) == "summary"
+        assert await cache.get("hash", "v2", same) is None
+        assert await cache.get("hash", "v1", SummaryOptions.from_form("long")) is None
+        assert await cache.get("other-hash", "v1", same) is None
+
+    @pytest.mark.asyncio
+    async def test_disk_hit_is_promoted_to_memory(self, tmp_path):
+        """Entries found on disk are copied to the memory tier"""
+        options = SummaryOptions()
+        await SummaryResultCache([DiskResultTier(str(tmp_path))]).put("hash", "v1", options, "summary")
+
+        cache = SummaryResultCache([MemoryResultTier(), DiskResultTier(str(tmp_path))])
+        assert await cache.get("hash", "v1", options) == "summary"
+        assert await cache.get("hash", "v1", options) == "summary"
+        assert cache.stats()["hits"] == {"memory": 1, "disk": 1}
+
+    @pytest.mark.asyncio
+    async def test_expired_entries_miss(self, tmp_path):
+        """Entries are not served after their TTL"""
+        cache = SummaryResultCache([MemoryResultTier(), DiskResultTier(str(tmp_path))], ttl_seconds=-1)
+        await cache.put("hash", "v1", SummaryOptions(), "summary")
+        assert await cache.get("hash", "v1", SummaryOptions()) is None
+
+    @pytest.mark.asyncio
+    async def test_invalidate_other_model_versions(self, tmp_path):
+        """invalidate drops entries of every version except the current one"""
+        disk = DiskResultTier(str(tmp_path))
+        cache = SummaryResultCache([MemoryResultTier(), disk])
+        await cache.put("hash", "old-model", SummaryOptions(), "old")
+        await cache.put("hash", "new-model", SummaryOptions(), "new")
+
+        await cache.invalidate(keep_version="new-model")
+
+        assert await cache.get("hash", "old-model", SummaryOptions()) is None
+        assert await cache.get("hash", "new-model", SummaryOptions()) == "new"
+        assert [path.name for path in tmp_path.iterdir()] == ["new-model"]
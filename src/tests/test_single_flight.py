@@ -0,0 +1,68 @@
+import asyncio
+
+import pytest
+
+from services.single_flight import SingleFlight
+
+
+class TestSingleFlight:
+    """Tests for coalescing of duplicate in-flight work"""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_calls_share_one_execution(self):
+        """Concurrent callers with the same key get the result of a single run"""
+        flights = SingleFlight("test")
+        calls = 0
+        joined = []
+
+        async def work():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.02)
+            return {"id": calls}
+
+        results = await asyncio.gather(*[
+            flights.do("doc", work, on_join=lambda: joined.append(True)) for _ in range(5)
+        ])
+
+        assert calls == 1
+        assert all(result is results[0] for result in results)
+        assert len(joined) == 4
+        assert flights.stats() == {"in_flight": 0, "leaders_total": 1, "coalesced_total": 4}
+
+    @pytest.mark.asyncio
+    async def test_different_keys_and_sequential_calls_run_separately(self):
+        """Only overlapping calls are coalesced; finished work is not cached"""
+        flights = SingleFlight("test")
+        calls = []
+
+        async def work(key):
+            calls.append(key)
+            await asyncio.sleep(0.01)
+            return key
+
+        assert await asyncio.gather(flights.do("a", lambda: work("a")), flights.do("b", lambda: work("b"))) == ["a", "b"]
+        await flights.do("a", lambda: work("a"))
+        assert calls == ["a", "b", "a"]
+
+    @pytest.mark.asyncio
+    async def test_errors_reach_every_caller_and_cancellation_is_isolated(self):
+        """A failure is raised to all callers; a cancelled caller doesn't cancel the others"""
+        flights = SingleFlight("test")
+
+        async def failing():
+            await asyncio.sleep(0.01)
+            raise ValueError("boom")
+
+        results = await asyncio.gather(flights.do("x", failing), flights.do("x", failing), return_exceptions=True)
+        assert [type(result) for result in results] == [ValueError, ValueError]
+
+        async def slow():
+            await asyncio.sleep(0.05)
+            return "done"
+
+        first = asyncio.create_task(flights.do("y", slow))
+        second = asyncio.create_task(flights.do("y", slow))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        assert await second == "done"
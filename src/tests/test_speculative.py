@@ -0,0 +1,93 @@
+import asyncio
+import uuid
+
+import pytest
+
+from models.summary import SummaryOptions
+from services.speculative import SpeculativePipeline
+
+
+class CountingPipeline(SpeculativePipeline):
+    """Pipeline whose run returns a fake summary instead of processing a PDF"""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.runs = 0
+        self.current_summary_id = None
+
+    async def _run(self, document_id, file_path, options):
+        self.runs += 1
+        await asyncio.sleep(0.01)
+        self.current_summary_id = f"summary-{self.runs}"
+        return {"id": self.current_summary_id, "length": options.summary_length}
+
+    async def _current_summary_id(self, document_id):
+        return self.current_summary_id
+
+
+class TestSpeculativePipeline:
+    """Tests for upload-time speculative summarization"""
+
+    @pytest.mark.asyncio
+    async def test_request_attaches_to_run_with_same_options(self):
+        """A summary request with the upload's options reuses the speculative result"""
+        pipeline = CountingPipeline(mode="summarize")
+        document_id = uuid.uuid4()
+        options = SummaryOptions.from_form("short", focusAreas=["Results", "methods"])
+
+        pipeline.start(document_id, "uploads/doc.pdf", options)
+        same = SummaryOptions.from_form("short", focusAreas=["methods", "results"])
+        task = await pipeline.attach(document_id, same)
+
+        assert task is not None
+        assert await pipeline.attach(document_id, same) is task
+        assert (await task)["id"] == "summary-1"
+        assert pipeline.runs == 1
+        # Po zakończeniu przebiegu kolejne żądanie tworzy nowe podsumowanie
+        assert await pipeline.attach(document_id, same) is None
+        await pipeline.stop()
+
+    @pytest.mark.asyncio
+    async def test_finished_run_is_handed_out_once_while_current(self):
+        """A finished run serves the first request only, and only if no newer summary exists"""
+        pipeline = CountingPipeline(mode="summarize")
+        document_id = uuid.uuid4()
+        options = SummaryOptions.from_form("short")
+
+        pipeline.start(document_id, "uploads/doc.pdf", options)
+        await asyncio.sleep(0.05)
+        task = await pipeline.attach(document_id, options)
+        assert (await task)["id"] == "summary-1"
+        assert await pipeline.attach(document_id, options) is None
+
+        # Inne żądanie zapisało nowszą wersję, zanim ktoś odebrał wynik spekulatywny
+        pipeline.start(document_id, "uploads/doc.pdf", options)
+        await asyncio.sleep(0.05)
+        pipeline.current_summary_id = "summary-newer"
+        assert await pipeline.attach(document_id, options) is None
+        assert pipeline.stats()["attached_total"] == 1
+        await pipeline.stop()
+
+    @pytest.mark.asyncio
+    async def test_different_options_do_not_attach(self):
+        """Requests with other options, or extract-only runs, run the pipeline themselves"""
+        pipeline = CountingPipeline(mode="summarize")
+        document_id = uuid.uuid4()
+        pipeline.start(document_id, "uploads/doc.pdf", SummaryOptions.from_form("short"))
+        assert await pipeline.attach(document_id, SummaryOptions.from_form("long")) is None
+        assert pipeline.options_for(document_id).summary_length == "short"
+        await pipeline.stop()
+
+        extract_only = CountingPipeline(mode="extract")
+        extract_only.start(document_id, "uploads/doc.pdf", SummaryOptions())
+        assert await extract_only.attach(document_id, SummaryOptions()) is None
+        await extract_only.stop()
+
+    @pytest.mark.asyncio
+    async def test_disabled_pipeline_does_nothing(self):
+        """Mode "off" never starts background work"""
+        pipeline = CountingPipeline(mode="off")
+        pipeline.start(uuid.uuid4(), "uploads/doc.pdf", SummaryOptions())
+        await asyncio.sleep(0.02)
+        assert pipeline.runs == 0
+        assert pipeline.stats()["started_total"] == 0
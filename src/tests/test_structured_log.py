@@ -0,0 +1,172 @@
+import json
+import logging
+
+import pytest
+
+from services import structured_log
+from services.e2e_events import E2EEvent, E2EEventEmitter
+from services.structured_log import JsonFormatter, StructuredLogger, start_queue_logging, stop_queue_logging
+
+
+class ListHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+        self.lines = []
+
+    def emit(self, record):
+        self.records.append(record)
+        self.lines.append(self.format(record))
+
+
+@pytest.fixture
+def handler():
+    handler = ListHandler()
+    logger = logging.getLogger("structured_log_test")
+    logger.addHandler(handler)
+    logger.setLevel(logging.DEBUG)
+    yield handler
+    logger.removeHandler(handler)
+    logger.setLevel(logging.NOTSET)
+
+
+class TestStructuredLogger:
+    """Tests for level-gated, sampled structured events"""
+
+    def test_event_fields_and_redaction(self, handler):
+        log = StructuredLogger("structured_log_test")
+
+        log.info("auth.login", user_id="u1", session_token="secret-token")
+
+        record = handler.records[0]
+        assert record.event == "auth.login"
+        assert record.getMessage() == "auth.login user_id=u1 session_token=[redacted]"
+        assert "secret-token" not in record.getMessage()
+
+    def test_disabled_level_is_skipped(self, handler):
+        logging.getLogger("structured_log_test").setLevel(logging.INFO)
+        log = StructuredLogger("structured_log_test")
+
+        log.debug("auth.authenticated", user_id="u1")
+
+        assert handler.records == []
+
+    def test_sampling(self, handler):
+        StructuredLogger("structured_log_test", sample_rate=0.0).warning("auth.session_invalid", sampled=True)
+        assert handler.records == []
+
+        StructuredLogger("structured_log_test", sample_rate=1.0).warning("auth.session_invalid", sampled=True)
+        assert handler.records[0].fields["sample_rate"] == 1.0
+
+        # Zdarzenia bez sampled=True nie są próbkowane
+        StructuredLogger("structured_log_test", sample_rate=0.0).warning("auth.session_invalid")
+        assert len(handler.records) == 2
+
+
+class TestQueueLogging:
+    """Tests for the queue sink of the hot-path loggers"""
+
+    def test_records_are_written_by_the_listener(self):
+        handler = ListHandler()
+        logger = logging.getLogger("structured_log_queue_test")
+        logger.setLevel(logging.INFO)
+        stop_queue_logging()
+        try:
+            start_queue_logging("structured_log_queue_test", handlers=[handler], log_format="text")
+            assert logger.propagate is False
+
+            StructuredLogger("structured_log_queue_test").info("page.upload", authenticated=True)
+        finally:
+            # Zatrzymanie listenera opróżnia kolejkę
+            stop_queue_logging()
+            logger.setLevel(logging.NOTSET)
+
+        assert [record.getMessage() for record in handler.records] == ["page.upload authenticated=True"]
+        assert logger.propagate is True
+        assert structured_log._listener is None
+
+    def test_json_format_and_restore(self):
+        handler = ListHandler()
+        text_formatter = logging.Formatter("%(message)s")
+        handler.setFormatter(text_formatter)
+        logger = logging.getLogger("structured_log_queue_test")
+        logger.addHandler(handler)
+        logger.setLevel(logging.INFO)
+        stop_queue_logging()
+        try:
+            start_queue_logging("structured_log_queue_test", log_format="json")
+            assert handler not in logger.handlers
+
+            StructuredLogger("structured_log_queue_test").info("http.request", status=200, cookie="abc")
+            logger.info("plain message")
+            stop_queue_logging()
+
+            lines = [json.loads(line) for line in handler.lines]
+        finally:
+            stop_queue_logging()
+            logger.removeHandler(handler)
+            logger.setLevel(logging.NOTSET)
+
+        # Po zatrzymaniu handler wraca do loggera z poprzednim formatterem
+        assert handler.formatter is text_formatter
+        assert lines[0]["event"] == "http.request"
+        assert lines[0]["status"] == 200
+        assert lines[0]["cookie"] == "[redacted]"
+        assert lines[1]["message"] == "plain message"
+
+    def test_json_formatter_keeps_base_keys(self):
+        record = logging.LogRecord("x", logging.INFO, __file__, 1, "msg", None, None)
+        record.event = "e"
+        record.fields = {"level": "spoofed", "n": 1}
+
+        payload = json.loads(JsonFormatter().format(record))
+
+        assert payload["level"] == "INFO"
+        assert payload["n"] == 1
+
+    @pytest.mark.parametrize("log_format", ["json", "text"])
+    def test_test_event_line_is_rendered_through_the_queue(self, log_format):
+        handler = ListHandler()
+        handler.setFormatter(logging.Formatter("%(levelname)s - %(message)s"))
+        logger = logging.getLogger("structured_log_queue_test")
+        logger.setLevel(logging.INFO)
+        stop_queue_logging()
+        try:
+            start_queue_logging("structured_log_queue_test", handlers=[handler], log_format=log_format)
+            E2EEventEmitter(enabled=True, logger_name="structured_log_queue_test").emit(
+                E2EEvent.SUMMARY_GENERATED, document_id="d1", session_token="secret")
+        finally:
+            stop_queue_logging()
+            logger.setLevel(logging.NOTSET)
+
+        line = handler.lines[0]
+        # Testy E2E szukają markera w zapisanej linii, nie w rekordzie
+        assert "TEST_EVENT: summary_generated, document_id=d1" in line
+        assert "secret" not in line
+        if log_format == "json":
+            payload = json.loads(line)
+            assert payload["message"] == "TEST_EVENT: summary_generated, document_id=d1, session_token=[redacted]"
+            assert payload["event"] == "test_event.summary_generated"
+
+
+class TestE2EEvents:
+    """Tests for the TEST_EVENT emitter"""
+
+    def test_enabled_emitter_logs_legacy_marker(self, handler):
+        emitter = E2EEventEmitter(enabled=True, logger_name="structured_log_test")
+
+        emitter.emit(E2EEvent.DOCUMENT_UPLOADED, document_id="d1", filename="a.pdf")
+
+        record = handler.records[0]
+        assert record.getMessage() == "TEST_EVENT: document_uploaded, document_id=d1, filename=a.pdf"
+        assert record.event == "test_event.document_uploaded"
+
+    def test_disabled_emitter_logs_nothing(self, handler):
+        emitter = E2EEventEmitter(enabled=False, logger_name="structured_log_test")
+
+        emitter.emit(E2EEvent.SUMMARY_RETRIEVED, document_id="d1")
+        assert handler.records == []
+
+        emitter.set_enabled(True)
+        emitter.emit(E2EEvent.SUMMARY_RETRIEVED, document_id="d1")
+        assert len(handler.records) == 1
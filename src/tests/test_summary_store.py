@@ -0,0 +1,237 @@
+import asyncio
+import json
+import uuid
+from datetime import datetime
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy.exc import IntegrityError
+from starlette.requests import Request
+
+import services.summary_service as summary_service
+from services.summary_store import FileSummaryStore, create_summary_store, DatabaseSummaryStore
+from tools.import_summaries import DATABASE_URL, import_records, load_records, parse_summary
+
+
+class TestFileSummaryStore:
+    """Tests for the file-based summary store used without a database"""
+
+    @pytest.mark.asyncio
+    async def test_save_creates_new_current_version(self, tmp_path):
+        """Each save replaces the current summary and bumps its version"""
+        store = FileSummaryStore(str(tmp_path))
+        document_id = uuid.uuid4()
+
+        assert await store.get_current(document_id) is None
+
+        first = await store.save(document_id, "first", "short")
+        second = await store.save(document_id, "second", "long")
+
+        current = await store.get_current(document_id)
+        assert current == second
+        assert (first["version"], second["version"]) == (1, 2)
+        assert current["content"] == "second" and current["length"] == "long"
+        assert list(tmp_path.iterdir()) == [tmp_path / f"{document_id}.json"]
+
+    def test_backend_selection(self):
+        assert isinstance(create_summary_store("database"), DatabaseSummaryStore)
+        assert isinstance(create_summary_store("files"), FileSummaryStore)
+        with pytest.raises(ValueError):
+            create_summary_store("redis")
+
+
+class ConflictingSession:
+    """AsyncSession stand-in whose first commits hit the version constraint"""
+
+    def __init__(self, conflicts: int, constraint: str = "summaries_document_id_version_key"):
+        self.conflicts = conflicts
+        self.constraint = constraint
+        self.latest = 1
+        self.rollbacks = 0
+        self.added = []
+
+    async def scalar(self, statement):
+        return self.latest
+
+    async def execute(self, statement):
+        pass
+
+    def add(self, summary):
+        self.added.append(summary)
+
+    async def commit(self):
+        if self.conflicts:
+            self.conflicts -= 1
+            # Równoległy zapis zajął tę wersję
+            self.latest += 1
+            raise IntegrityError("insert", {}, Exception(f'duplicate key value violates unique constraint "{self.constraint}"'))
+
+    async def rollback(self):
+        self.rollbacks += 1
+
+
+class TestDatabaseSummaryStore:
+    """Tests for version allocation in the database summary store"""
+
+    @pytest.mark.asyncio
+    async def test_version_conflict_is_retried(self):
+        session = ConflictingSession(conflicts=2)
+
+        summary = await DatabaseSummaryStore().save(uuid.uuid4(), "content", "short", session=session)
+
+        assert summary["version"] == 4
+        assert session.rollbacks == 2
+        assert [added.version for added in session.added] == [2, 3, 4]
+
+    @pytest.mark.asyncio
+    async def test_other_integrity_errors_and_exhausted_retries_are_raised(self):
+        with pytest.raises(IntegrityError):
+            await DatabaseSummaryStore().save(uuid.uuid4(), "content", session=ConflictingSession(1, "other_key"))
+
+        session = ConflictingSession(conflicts=5)
+        with pytest.raises(IntegrityError):
+            await DatabaseSummaryStore(max_attempts=2).save(uuid.uuid4(), "content", session=session)
+        assert session.rollbacks == 2
+
+
+def make_request(query: bytes = b"") -> Request:
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": [], "query_string": query})
+
+
+class TestReadSummary:
+    """Tests for the in-process summary read shared by the API and the summary page"""
+
+    @pytest.fixture(autouse=True)
+    def file_store(self, tmp_path, monkeypatch):
+        store = FileSummaryStore(str(tmp_path))
+        monkeypatch.setattr(summary_service, "summary_store", store)
+        return store
+
+    @pytest.mark.asyncio
+    async def test_reads_current_summary(self, file_store):
+        document_id = uuid.uuid4()
+        saved = await file_store.save(document_id, "Summary text", "short")
+
+        assert await summary_service.read_summary(document_id, make_request(b"test_mode=true")) == saved
+
+    @pytest.mark.asyncio
+    async def test_test_mode_creates_missing_summary(self):
+        summary = await summary_service.read_summary(uuid.uuid4(), make_request(b"test_mode=true"))
+        assert summary["type"] == "test"
+        assert summary["content"] == summary_service.TEST_SUMMARY_CONTENT
+
+    @pytest.mark.asyncio
+    async def test_requires_session_cookie_outside_test_mode(self):
+        with pytest.raises(HTTPException) as exc_info:
+            await summary_service.read_summary(uuid.uuid4(), make_request())
+        assert exc_info.value.status_code == 401
+
+
+class TestImportSummaries:
+    """Tests for parsing legacy summary files before the bulk import"""
+
+    def test_parse_legacy_and_test_mode_files(self, tmp_path):
+        document_id = uuid.uuid4()
+        path = tmp_path / f"{document_id}.json"
+        path.write_text("{}")
+        summary_id = uuid.uuid4()
+
+        record = parse_summary({
+            "id": str(summary_id),
+            "content": "Summary text",
+            "type": "test",
+            "created_at": "2025-04-20T10:00:00",
+        }, path)
+
+        assert record[:6] == (summary_id, document_id, "Summary text", 1, True, "test")
+        assert record[6].year == 2025
+
+    def test_load_records_skips_invalid_files(self, tmp_path):
+        document_id = uuid.uuid4()
+        (tmp_path / f"{document_id}.json").write_text(json.dumps({
+            "id": str(uuid.uuid4()),
+            "document_id": str(document_id),
+            "content": "Summary text",
+            "length": "medium",
+            "created_at": "2025-04-20T10:00:00",
+        }))
+        (tmp_path / "broken.json").write_text("{not json")
+        (tmp_path / f"{uuid.uuid4()}.json").write_text(json.dumps({"content": ""}))
+
+        records, skipped = load_records(tmp_path)
+
+        assert [record[1] for record in records] == [document_id]
+        assert len(skipped) == 2
+
+
+async def _pg_connect():
+    import asyncpg
+
+    return await asyncio.wait_for(
+        asyncpg.connect(DATABASE_URL.replace("postgresql+asyncpg://", "postgresql://", 1)), timeout=5
+    )
+
+
+class TestImportSummariesIntoDatabase:
+    """Integration test of the bulk import against the local database (skipped without it)"""
+
+    @pytest.fixture
+    def documents(self):
+        async def probe():
+            conn = await _pg_connect()
+            try:
+                return await conn.fetchval("select to_regclass('scisummarize.summaries')")
+            finally:
+                await conn.close()
+
+        try:
+            table = asyncio.run(probe())
+        except Exception as e:
+            pytest.skip(f"Postgres is not available: {str(e)}")
+        if table is None:
+            pytest.skip("scisummarize.summaries does not exist - apply the Supabase migrations")
+
+        document_ids = [uuid.uuid4(), uuid.uuid4()]
+        yield document_ids
+
+        async def cleanup():
+            conn = await _pg_connect()
+            try:
+                await conn.execute("delete from scisummarize.summaries where document_id = any($1::uuid[])",
+                                   document_ids)
+            finally:
+                await conn.close()
+        asyncio.run(cleanup())
+
+    @pytest.mark.parametrize("method", ["copy", "executemany"])
+    def test_reimport_skips_documents_the_app_already_wrote(self, documents, method):
+        """Legacy files never replace or collide with summaries written by the application"""
+        written, legacy_only = documents
+        app_summary_id = uuid.uuid4()
+
+        def legacy(document_id):
+            return (uuid.uuid4(), document_id, "legacy summary", 1, True, "medium", datetime(2025, 4, 20))
+
+        async def scenario():
+            conn = await _pg_connect()
+            try:
+                # Aplikacja zapisała już nowszą wersję z tym samym numerem co plik
+                await conn.execute("""
+                    insert into scisummarize.summaries (id, document_id, content, version, is_current, length, created_at)
+                    values ($1, $2, 'app summary', 1, true, 'short', now())
+                """, app_summary_id, written)
+
+                inserted = await import_records([legacy(written), legacy(legacy_only)], method)
+                again = await import_records([legacy(written), legacy(legacy_only)], method)
+                current = await conn.fetch(
+                    "select document_id, id, content from scisummarize.summaries "
+                    "where document_id = any($1::uuid[]) and is_current", documents)
+            finally:
+                await conn.close()
+            return inserted, again, {row["document_id"]: row for row in current}
+
+        inserted, again, current = asyncio.run(scenario())
+
+        assert (inserted, again) == (1, 0)
+        assert current[written]["id"] == app_summary_id
+        assert current[legacy_only]["content"] == "legacy summary"
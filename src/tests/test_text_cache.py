@@ -0,0 +1,112 @@
+import pytest
+
+from services.text_cache import ExtractedTextCache, hash_file
+
+
+class TestExtractedTextCache:
+    """Tests for the content-addressed extracted-text cache"""
+
+    @pytest.mark.asyncio
+    async def test_miss_then_hit(self, tmp_path):
+        """A stored entry is served from memory and counted as a hit"""
+        cache = ExtractedTextCache(directory=str(tmp_path))
+
+        assert await cache.get("abc") is None
+        await cache.put("abc", ["page one", "page two"])
+
+        assert await cache.get("abc") == ["page one", "page two"]
+        stats = cache.stats()
+        assert stats["misses"] == 1
+        assert stats["memory_hits"] == 1
+
+    @pytest.mark.asyncio
+    async def test_disk_tier_survives_new_instance(self, tmp_path):
+        """Entries are persisted compressed on disk and shared between instances"""
+        await ExtractedTextCache(directory=str(tmp_path)).put("abc", ["persisted"])
+
+        cache = ExtractedTextCache(directory=str(tmp_path))
+        assert await cache.get("abc") == ["persisted"]
+        assert cache.stats()["disk_hits"] == 1
+        assert list(tmp_path.glob("*/*.json.gz"))
+
+    @pytest.mark.asyncio
+    async def test_version_is_part_of_the_key(self, tmp_path):
+        """Changing the extractor version invalidates existing entries"""
+        await ExtractedTextCache(directory=str(tmp_path), version="v1").put("abc", ["old"])
+
+        cache = ExtractedTextCache(directory=str(tmp_path), version="v2")
+        assert await cache.get("abc") is None
+
+    @pytest.mark.asyncio
+    async def test_memory_lru_eviction(self, tmp_path):
+        """The memory tier drops least recently used entries past its limit"""
+        cache = ExtractedTextCache(directory=str(tmp_path), memory_max_bytes=10)
+        await cache.put("a", ["aaaaa"])
+        await cache.put("b", ["bbbbb"])
+        await cache.get("a")
+        await cache.put("c", ["ccccc"])
+
+        assert cache.stats()["memory_entries"] == 2
+        assert cache._memory_get(cache._key("b")) is None
+
+    @pytest.mark.asyncio
+    async def test_disk_size_eviction(self, tmp_path):
+        """The disk tier is trimmed once it exceeds its size limit"""
+        cache = ExtractedTextCache(directory=str(tmp_path), disk_max_bytes=1)
+        await cache.put("a", ["x" * 100])
+        await cache.put("b", ["y" * 100])
+
+        assert cache.stats()["evictions"] >= 1
+
+    @pytest.mark.asyncio
+    async def test_streamed_entry(self, tmp_path):
+        """Pages written one by one are readable after commit, also from a new instance"""
+        cache = ExtractedTextCache(directory=str(tmp_path))
+        writer = cache.writer("abc")
+        await writer.add("page \"one\"")
+        await writer.add("page two")
+        assert await cache.get("abc") is None
+
+        await writer.commit()
+
+        assert await cache.get("abc") == ["page \"one\"", "page two"]
+        fresh = ExtractedTextCache(directory=str(tmp_path))
+        assert await fresh.get("abc") == ["page \"one\"", "page two"]
+        assert fresh.stats()["disk_hits"] == 1
+
+    @pytest.mark.asyncio
+    async def test_aborted_stream_leaves_nothing(self, tmp_path):
+        """An entry whose stream stopped early is never stored"""
+        cache = ExtractedTextCache(directory=str(tmp_path))
+        writer = cache.writer("abc")
+        await writer.add("first page")
+        writer.abort()
+        await writer.commit()
+
+        assert await cache.get("abc") is None
+        assert not [path for path in tmp_path.rglob("*") if path.is_file()]
+
+    @pytest.mark.asyncio
+    async def test_large_streamed_entry_skips_memory(self, tmp_path):
+        """Pages past the per-entry limit are not held in memory while streaming"""
+        cache = ExtractedTextCache(directory=str(tmp_path), memory_entry_max_bytes=10)
+        writer = cache.writer("abc")
+        await writer.add("x" * 8)
+        await writer.add("y" * 8)
+        assert writer._pages is None
+
+        await writer.commit()
+
+        assert cache.stats()["memory_entries"] == 0
+        assert await cache.get("abc") == ["x" * 8, "y" * 8]
+        assert cache.stats()["disk_hits"] == 1
+
+    @pytest.mark.asyncio
+    async def test_hash_file(self, tmp_path):
+        """Identical files hash to the same key"""
+        first = tmp_path / "a.pdf"
+        second = tmp_path / "b.pdf"
+        first.write_bytes(b"%PDF-1.4 same content")
+        second.write_bytes(b"%PDF-1.4 same content")
+
+        assert await hash_file(first) == await hash_file(second)
@@ -0,0 +1,46 @@
+import pytest
+
+from services.backends.textrank import TextRankBackend
+
+TEXT = (
+    "The transformer relies entirely on attention to draw global dependencies. "
+    "Attention layers replace the recurrent layers used in encoder decoder models. "
+    "We thank our colleagues for useful comments. "
+    "Multi-head attention lets the model attend to information from different positions. "
+    "The weather in the city was pleasant during the conference. "
+    "Self attention layers are faster than recurrent layers for typical sequence lengths."
+)
+
+
+class TestTextRankBackend:
+    """Tests for the extractive TF-IDF/TextRank summarizer"""
+
+    @pytest.mark.parametrize("method", ["textrank", "centroid"])
+    def test_summary_respects_word_budget(self, method):
+        """Selected sentences fit the budget and keep document order"""
+        backend = TextRankBackend(method=method)
+        summary = backend.summarize(TEXT, max_words=30)
+
+        assert 0 < len(summary.split()) <= 30
+        sentences = [s for s in TEXT.split(". ") if s.rstrip(".") in summary]
+        positions = [TEXT.index(s) for s in sentences]
+        assert positions == sorted(positions)
+
+    def test_prefers_central_sentences(self):
+        """Off-topic sentences rank below sentences about the main topic"""
+        summary = TextRankBackend().summarize(TEXT, max_words=30)
+        assert "weather" not in summary
+        assert "attention" in summary
+
+    def test_short_text_is_returned_whole(self):
+        """Text already within the budget is returned unchanged"""
+        assert TextRankBackend().summarize("One short sentence.", max_words=50) == "One short sentence."
+
+    def test_generate_batch(self):
+        """generate returns one summary per input text"""
+        summaries = TextRankBackend().generate([TEXT, "Second text."], max_words=20)
+        assert len(summaries) == 2
+
+    def test_version_depends_on_method(self):
+        """Cached summaries of one scoring method are never served for the other"""
+        assert TextRankBackend(method="textrank").version != TextRankBackend(method="centroid").version
@@ -0,0 +1,70 @@
+import json
+import time
+
+import jwt
+import pytest
+from cryptography.hazmat.primitives.asymmetric import rsa
+
+import auth.verifier as verifier_module
+from auth.verifier import TokenVerifier
+
+SECRET = "test-secret-test-secret-test-secret"
+
+
+def _token(key=SECRET, algorithm="HS256", headers=None, **claims):
+    payload = {"sub": "00000000-0000-0000-0000-000000000001", "aud": "authenticated",
+               "exp": int(time.time()) + 3600, "user_metadata": {"login": "tester"}}
+    payload.update(claims)
+    return jwt.encode(payload, key, algorithm=algorithm, headers=headers)
+
+
+class TestTokenVerifier:
+    """Tests for local verification of Supabase session tokens"""
+
+    @pytest.mark.asyncio
+    async def test_hs256_token_is_verified_once_and_cached(self):
+        verifier = TokenVerifier(secret=SECRET, jwks_url=None)
+        token = _token()
+
+        claims = await verifier.verify(token)
+        assert claims["user_metadata"]["login"] == "tester"
+        assert await verifier.verify(token) == claims
+        assert (verifier.hits, verifier.misses) == (1, 1)
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("token", [
+        _token(key="another-secret-another-secret-another"),
+        _token(exp=int(time.time()) - 10),
+        _token(aud="anon"),
+        jwt.encode({"sub": "x", "aud": "authenticated"}, SECRET, algorithm="HS256"),
+    ], ids=["bad-signature", "expired", "wrong-audience", "no-exp"])
+    async def test_invalid_tokens_are_rejected(self, token):
+        verifier = TokenVerifier(secret=SECRET, jwks_url=None)
+        with pytest.raises(jwt.InvalidTokenError):
+            await verifier.verify(token)
+        assert verifier.failures == 1
+
+    @pytest.mark.asyncio
+    async def test_cached_claims_are_not_used_after_exp(self, monkeypatch):
+        verifier = TokenVerifier(secret=SECRET, jwks_url=None)
+        exp = int(time.time()) + 60
+        token = _token(exp=exp)
+        await verifier.verify(token)
+
+        # Zegar po exp: wpis w cache jest pomijany i token weryfikowany od nowa
+        monkeypatch.setattr(verifier_module.time, "time", lambda: exp + 1)
+        await verifier.verify(token)
+        assert (verifier.hits, verifier.misses) == (0, 2)
+
+    @pytest.mark.asyncio
+    async def test_asymmetric_token_uses_cached_key_set(self):
+        private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        jwk = json.loads(jwt.algorithms.RSAAlgorithm.to_jwk(private_key.public_key()))
+        verifier = TokenVerifier(secret=None, jwks_url=None)
+        verifier.load_keys({"keys": [{**jwk, "kid": "key-1", "alg": "RS256", "use": "sig"}]})
+
+        claims = await verifier.verify(_token(key=private_key, algorithm="RS256", headers={"kid": "key-1"}))
+        assert claims["sub"].endswith("1")
+
+        with pytest.raises(jwt.InvalidTokenError):
+            await verifier.verify(_token(key=private_key, algorithm="RS256", headers={"kid": "rotated"}))
@@ -0,0 +1,71 @@
+import json
+
+import pytest
+
+from services.tracing import FileSpanExporter, Tracer, parse_traceparent, run_traced
+from tools.trace_report import load_spans
+
+
+def read_spans(path) -> list:
+    return [span for spans in load_spans(str(path)).values() for span in spans]
+
+
+class TestTracer:
+    """Tests for spans and the OTLP/JSON file exporter"""
+
+    @pytest.fixture
+    def export_path(self, tmp_path):
+        return tmp_path / "traces.jsonl"
+
+    def test_nested_spans_are_exported(self, export_path):
+        tracer = Tracer(FileSpanExporter(str(export_path)))
+
+        with tracer.span("create_summary") as parent:
+            with tracer.span("extract_text", page_count=3):
+                pass
+        tracer.shutdown()
+
+        spans = {span["name"]: span for span in read_spans(export_path)}
+        assert spans["extract_text"]["parentSpanId"] == parent.span_id
+        assert spans["extract_text"]["traceId"] == parent.trace_id
+        assert "parentSpanId" not in spans["create_summary"]
+        assert {"key": "page_count", "value": {"intValue": "3"}} in spans["extract_text"]["attributes"]
+
+        line = json.loads(export_path.read_text().splitlines()[0])
+        assert line["resourceSpans"][0]["resource"]["attributes"][0]["key"] == "service.name"
+
+    def test_remote_parent_and_error_status(self, export_path):
+        tracer = Tracer(FileSpanExporter(str(export_path)))
+        traceparent = "00-4bf92f3577b34da6a3ce929d0e0e4736-00f067aa0ba902b7-01"
+
+        with pytest.raises(ValueError):
+            with tracer.span("summary_job", traceparent=traceparent):
+                raise ValueError("boom")
+        tracer.shutdown()
+
+        span = read_spans(export_path)[0]
+        assert span["traceId"] == "4bf92f3577b34da6a3ce929d0e0e4736"
+        assert span["parentSpanId"] == "00f067aa0ba902b7"
+        assert span["status"] == {"code": 2, "message": "ValueError: boom"}
+
+    def test_worker_span_continues_trace(self):
+        traceparent = "00-4bf92f3577b34da6a3ce929d0e0e4736-00f067aa0ba902b7-01"
+
+        result, spans = run_traced(traceparent, "_extract_page_range", sum, [1, 2, 3])
+
+        assert result == 6
+        assert spans[0]["parentSpanId"] == "00f067aa0ba902b7"
+        assert spans[0]["name"] == "_extract_page_range"
+
+    def test_disabled_tracer_is_noop(self):
+        tracer = Tracer()
+
+        with tracer.span("upload") as span:
+            span.set_attribute("ignored", True)
+            assert tracer.traceparent() is None
+
+        assert not tracer.enabled
+
+    def test_invalid_traceparent(self):
+        assert parse_traceparent("not-a-traceparent") is None
+        assert parse_traceparent(None) is None
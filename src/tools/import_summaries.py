@@ -0,0 +1,141 @@
+"""One-shot import of legacy summaries/{document_id}.json files into scisummarize.summaries
+
+Usage (from the src directory, after the 20261016150000 migration):
+    python -m tools.import_summaries --dir summaries --dry-run
+    python -m tools.import_summaries --dir summaries
+    python -m tools.import_summaries --dir summaries --method executemany
+
+The default method streams the rows with COPY into a temporary table and
+inserts them from there; executemany is slower but works through poolers
+that don't support COPY. Documents that already have summaries in the table
+are skipped: the application may have written newer versions since the
+switch, and the manage_summary_versions trigger would make an imported
+legacy summary the current one. The import can be re-run safely.
+"""
+import argparse
+import asyncio
+import json
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import List, Tuple
+
+from db.database import DATABASE_URL
+
+COLUMNS = ("id", "document_id", "content", "version", "is_current", "length", "created_at")
+
+# Wiersz tabeli summaries w kolejności COLUMNS
+SummaryRecord = Tuple[uuid.UUID, uuid.UUID, str, int, bool, str, datetime]
+
+# Pomijamy dokumenty, które mają już wiersze; "on conflict do nothing" obejmuje
+# też unikalne (document_id, version) w obrębie importowanych plików
+_INSERT_FROM_STAGING = f"""
+    insert into scisummarize.summaries ({", ".join(COLUMNS)})
+    select {", ".join(COLUMNS)} from summaries_import
+    where not exists (
+        select 1 from scisummarize.summaries s where s.document_id = summaries_import.document_id
+    )
+    order by document_id, version
+    on conflict do nothing
+"""
+
+_INSERT_ROW = f"""
+    insert into scisummarize.summaries ({", ".join(COLUMNS)})
+    select $1::uuid, $2::uuid, $3::text, $4::integer, $5::boolean, $6::varchar, $7::timestamp
+    where not exists (select 1 from scisummarize.summaries s where s.document_id = $2::uuid)
+    on conflict do nothing
+"""
+
+
+def parse_summary(data: dict, path: Path) -> SummaryRecord:
+    """Convert one legacy summary file to a summaries row
+
+    Args:
+        data: Parsed JSON content of the file
+        path: File path; its stem is the document id for files without one
+
+    Returns:
+        Row values in COLUMNS order
+
+    Raises:
+        ValueError: If the file has no content or invalid ids/dates
+    """
+    content = data.get("content")
+    if not isinstance(content, str) or not content.strip():
+        raise ValueError("missing summary content")
+    created_at = data.get("created_at")
+    return (
+        uuid.UUID(data["id"]) if data.get("id") else uuid.uuid4(),
+        uuid.UUID(data.get("document_id") or path.stem),
+        content,
+        int(data.get("version", 1)),
+        bool(data.get("is_current", True)),
+        # Podsumowania z trybu testowego mają tylko pole "type"
+        data.get("length") or data.get("type"),
+        datetime.fromisoformat(created_at) if created_at else datetime.fromtimestamp(path.stat().st_mtime),
+    )
+
+
+def load_records(directory: Path) -> Tuple[List[SummaryRecord], List[Tuple[Path, str]]]:
+    """Read every *.json file in the directory
+
+    Returns:
+        Parsed rows and the (path, reason) pairs of skipped files
+    """
+    records, skipped = [], []
+    for path in sorted(directory.glob("*.json")):
+        try:
+            with open(path, "r") as f:
+                records.append(parse_summary(json.load(f), path))
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            skipped.append((path, str(e)))
+    return records, skipped
+
+
+async def import_records(records: List[SummaryRecord], method: str = "copy") -> int:
+    """Insert the rows in one transaction
+
+    Returns:
+        Number of rows in scisummarize.summaries added by the import
+    """
+    import asyncpg
+
+    conn = await asyncpg.connect(DATABASE_URL.replace("postgresql+asyncpg://", "postgresql://", 1))
+    try:
+        async with conn.transaction():
+            before = await conn.fetchval("select count(*) from scisummarize.summaries")
+            if method == "copy":
+                await conn.execute("""
+                    create temporary table summaries_import
+                    (like scisummarize.summaries including defaults) on commit drop
+                """)
+                await conn.copy_records_to_table("summaries_import", records=records, columns=COLUMNS)
+                await conn.execute(_INSERT_FROM_STAGING)
+            else:
+                await conn.executemany(_INSERT_ROW, records)
+            after = await conn.fetchval("select count(*) from scisummarize.summaries")
+    finally:
+        await conn.close()
+    return after - before
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dir", default="summaries", help="Directory with the legacy JSON files")
+    parser.add_argument("--method", choices=["copy", "executemany"], default="copy")
+    parser.add_argument("--dry-run", action="store_true", help="Only parse the files and report")
+    args = parser.parse_args()
+
+    records, skipped = load_records(Path(args.dir))
+    for path, reason in skipped:
+        print(f"skipped {path}: {reason}")
+    print(f"{len(records)} summaries parsed, {len(skipped)} files skipped")
+    if args.dry_run or not records:
+        return
+
+    inserted = asyncio.run(import_records(records, args.method))
+    print(f"{inserted} summaries imported, {len(records) - inserted} skipped (document already in the table)")
+
+
+if __name__ == "__main__":
+    main()
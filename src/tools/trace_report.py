@@ -0,0 +1,116 @@
+"""Span tree and critical path of traces exported to TRACE_EXPORT_PATH
+
+Reads the OTLP/JSON lines written by services.tracing.FileSpanExporter
+(spans from worker processes included) and prints the span tree of one
+trace - by default the slowest one - with the critical path marked: from
+the root, repeatedly the child that finished last.
+
+Usage (from the src directory):
+    python -m tools.trace_report traces.jsonl
+    python -m tools.trace_report traces.jsonl --list 10
+    python -m tools.trace_report traces.jsonl --trace-id 4bf92f3577b34da6a3ce929d0e0e4736
+"""
+import argparse
+import json
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Set
+
+
+def load_spans(path: str) -> Dict[str, List[Dict[str, Any]]]:
+    """Spans of the export file grouped by trace ID"""
+    traces: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            for resource_spans in json.loads(line)["resourceSpans"]:
+                for scope_spans in resource_spans["scopeSpans"]:
+                    for span in scope_spans["spans"]:
+                        traces[span["traceId"]].append(span)
+    return traces
+
+
+def duration_ms(span: Dict[str, Any]) -> float:
+    return (int(span["endTimeUnixNano"]) - int(span["startTimeUnixNano"])) / 1e6
+
+
+def trace_duration_ms(spans: List[Dict[str, Any]]) -> float:
+    start = min(int(span["startTimeUnixNano"]) for span in spans)
+    end = max(int(span["endTimeUnixNano"]) for span in spans)
+    return (end - start) / 1e6
+
+
+def attribute(span: Dict[str, Any], key: str) -> Optional[Any]:
+    for item in span.get("attributes", []):
+        if item["key"] == key:
+            return next(iter(item["value"].values()))
+    return None
+
+
+def critical_path(roots: List[Dict[str, Any]], children: Dict[str, List[Dict[str, Any]]]) -> Set[str]:
+    """Span IDs on the critical path: from the last-ending root, the child ending last at each level"""
+    path = set()
+    span = max(roots, key=lambda s: int(s["endTimeUnixNano"]), default=None)
+    while span is not None:
+        path.add(span["spanId"])
+        span = max(children.get(span["spanId"], []), key=lambda s: int(s["endTimeUnixNano"]), default=None)
+    return path
+
+
+def print_trace(spans: List[Dict[str, Any]]):
+    ids = {span["spanId"] for span in spans}
+    children: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+    roots = []
+    for span in spans:
+        if span.get("parentSpanId") in ids:
+            children[span["parentSpanId"]].append(span)
+        else:
+            roots.append(span)
+    on_path = critical_path(roots, children)
+    trace_start = min(int(span["startTimeUnixNano"]) for span in spans)
+
+    def show(span: Dict[str, Any], depth: int):
+        offset = (int(span["startTimeUnixNano"]) - trace_start) / 1e6
+        marker = "*" if span["spanId"] in on_path else " "
+        details = [f"pid={attribute(span, 'process.pid')}"]
+        for key in ("page_count", "chunks", "input_chars"):
+            value = attribute(span, key)
+            if value is not None:
+                details.append(f"{key}={value}")
+        if span.get("status", {}).get("code") == 2:
+            details.append(f"error={span['status'].get('message')}")
+        print(f"{marker} {'  ' * depth}{span['name']:<{40 - 2 * depth}} +{offset:9.1f} ms "
+              f"{duration_ms(span):9.1f} ms  {' '.join(details)}")
+        for child in sorted(children.get(span["spanId"], []), key=lambda s: int(s["startTimeUnixNano"])):
+            show(child, depth + 1)
+
+    print(f"trace {spans[0]['traceId']}: {len(spans)} spans, {trace_duration_ms(spans):.1f} ms (* critical path)")
+    for root in sorted(roots, key=lambda s: int(s["startTimeUnixNano"])):
+        show(root, 0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("path", help="OTLP/JSON lines file (TRACE_EXPORT_PATH)")
+    parser.add_argument("--trace-id", help="Trace to show, by default the slowest one")
+    parser.add_argument("--list", type=int, metavar="N", help="List the N slowest traces instead")
+    args = parser.parse_args()
+
+    traces = load_spans(args.path)
+    if not traces:
+        print("No spans found")
+        return
+    if args.list:
+        slowest = sorted(traces.items(), key=lambda item: trace_duration_ms(item[1]), reverse=True)
+        for trace_id, spans in slowest[:args.list]:
+            root = min(spans, key=lambda s: int(s["startTimeUnixNano"]))
+            print(f"{trace_id}  {trace_duration_ms(spans):9.1f} ms  {len(spans):4d} spans  {root['name']}")
+        return
+    trace_id = args.trace_id or max(traces, key=lambda t: trace_duration_ms(traces[t]))
+    if trace_id not in traces:
+        parser.error(f"Trace {trace_id} not found")
+    print_trace(traces[trace_id])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""Standalone summarization worker
+
+Drains the Postgres job queue (JOB_QUEUE_BACKEND=postgres) without serving
+HTTP. Start as many as needed, on any node:
+
+    cd src && JOB_QUEUE_BACKEND=postgres python worker.py
+
+Web nodes can then run with JOB_WORKERS=0 and only enqueue jobs. Every
+web and worker node must see the same uploads: set UPLOAD_DIR to the same
+absolute path on shared storage (NFS, EFS, a cluster volume) everywhere.
+"""
+import asyncio
+import logging
+import signal
+
+from services.extraction_engine import extraction_engine
+from services.model_registry import model_registry
+from services.batching import batch_scheduler
+from services.job_queue import job_queue, JOB_QUEUE_BACKEND
+from services.summary_service import run_summary_job
+from services.result_cache import summary_result_cache
+from services.uploads import check_shared_upload_dir
+
+# Konfiguracja loggera
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+)
+logger = logging.getLogger(__name__)
+
+
+async def run_worker():
+    """Start the pipeline and the job workers, run until SIGINT/SIGTERM"""
+    if JOB_QUEUE_BACKEND != "postgres":
+        raise SystemExit("worker.py needs JOB_QUEUE_BACKEND=postgres - the memory queue is per process")
+    try:
+        check_shared_upload_dir()
+    except RuntimeError as e:
+        raise SystemExit(str(e))
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    await extraction_engine.start()
+    await model_registry.load()
+    model = await model_registry.get_model()
+    await batch_scheduler.start(model)
+    await summary_result_cache.invalidate(keep_version=model.version)
+    await job_queue.start(run_summary_job)
+    logger.info("Summarization worker running")
+
+    try:
+        await stop.wait()
+    finally:
+        # Zadania w toku wracają do kolejki dla innych workerów
+        logger.info("Summarization worker shutting down...")
+        await job_queue.stop()
+        await batch_scheduler.stop()
+        await extraction_engine.shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(run_worker())
@@ -0,0 +1,53 @@
+/*
+ * Migration: Create summary_jobs queue table
+ * Purpose: Durable queue of background summarization jobs shared by all app nodes
+ * Tables Created: summary_jobs
+ * Notes:
+ *   - workers claim jobs with "select ... for update skip locked", so concurrent
+ *     workers never receive the same job
+ *   - a claimed job holds a lease (lease_expires_at) renewed by worker heartbeats;
+ *     jobs with an expired lease are returned to the queue by other workers
+ *   - failed jobs are retried with backoff (run_after) until max_attempts,
+ *     then kept in the 'dead' state for inspection (dead-letter)
+ *   - document_id has no foreign key: uploaded files are not yet registered
+ *     in scisummarize.documents
+ */
+
+-- queue table for background summarization jobs
+create table scisummarize.summary_jobs (
+    id uuid primary key default gen_random_uuid(),
+    document_id uuid not null,
+    -- owner of the job (auth user id from the session token)
+    user_id text,
+    state varchar(16) not null default 'queued'
+        check (state in ('queued', 'running', 'succeeded', 'failed', 'dead')),
+    stage varchar(32) not null default 'queued',
+    progress real not null default 0 check (progress between 0 and 1),
+    attempts integer not null default 0,
+    max_attempts integer not null default 5,
+    -- earliest time the job can be claimed (used for retry backoff)
+    run_after timestamptz not null default now(),
+    -- worker holding the job and its lease
+    locked_by text,
+    lease_expires_at timestamptz,
+    heartbeat_at timestamptz,
+    summary_id uuid,
+    error text,
+    status_code integer,
+    created_at timestamptz not null default now(),
+    started_at timestamptz,
+    finished_at timestamptz
+);
+
+-- partial index used by the claim query: oldest claimable job first
+create index idx_summary_jobs_claimable on scisummarize.summary_jobs(run_after) where state = 'queued';
+
+-- partial index used to find running jobs with an expired lease
+create index idx_summary_jobs_lease on scisummarize.summary_jobs(lease_expires_at) where state = 'running';
+
+-- index for looking up a document's jobs
+create index idx_summary_jobs_document_id on scisummarize.summary_jobs(document_id);
+
+-- enable row level security; the application connects as the table owner,
+-- which bypasses rls, so no policies are needed for the workers
+alter table scisummarize.summary_jobs enable row level security;
@@ -0,0 +1,10 @@
+/*
+ * Migration: Add summary options to summary_jobs
+ * Purpose: Jobs carry the summary options chosen by the user (length, focus areas, ...)
+ * Tables Modified: summary_jobs (new nullable column, no data changes)
+ * Notes:
+ *   - null means "use the options submitted with the upload"
+ */
+
+-- normalized summary options as submitted with the request
+alter table scisummarize.summary_jobs add column options jsonb;
@@ -0,0 +1,26 @@
+/*
+ * Migration: Create summary_result_cache table
+ * Purpose: Shared tier of the summary result cache (RESULT_CACHE_TIERS=...,postgres)
+ * Tables Created: summary_result_cache
+ * Notes:
+ *   - cache_key is the sha256 of the PDF content hash and the normalized summary options
+ *   - entries expire after 24 hours, matching document expiry
+ *   - on startup the application deletes entries of other model versions
+ */
+
+-- cached final summaries, shared by all app nodes
+create table scisummarize.summary_result_cache (
+    model_version text not null,
+    cache_key text not null,
+    content text not null,
+    created_at timestamptz not null default now(),
+    expires_at timestamptz not null,
+    primary key (model_version, cache_key)
+);
+
+-- index used to purge expired entries
+create index idx_summary_result_cache_expires_at on scisummarize.summary_result_cache(expires_at);
+
+-- enable row level security; the application connects as the table owner,
+-- which bypasses rls, so no policies are needed
+alter table scisummarize.summary_result_cache enable row level security;
@@ -0,0 +1,22 @@
+/*
+ * Migration: Prepare summaries table for application-managed summary storage
+ * Purpose: Summaries move from per-document JSON files (summaries/{document_id}.json)
+ *          to scisummarize.summaries
+ * Tables Modified: summaries
+ * Changes:
+ *   - drop the foreign key summaries.document_id -> documents.id (see below)
+ *   - add the nullable "length" column (short/medium/long/custom/test)
+ * Special considerations:
+ *   - uploaded files are still stored as uploads/{document_id}.pdf and are not
+ *     registered in scisummarize.documents, so the foreign key would reject
+ *     every summary; it can be restored once uploads create document rows
+ *   - no data is modified or deleted
+ */
+
+-- drop the foreign key to documents: summaries reference uploaded files by id
+-- until uploads are registered in scisummarize.documents. deleting a document
+-- no longer cascades to its summaries; expired uploads are removed with their files.
+alter table scisummarize.summaries drop constraint if exists summaries_document_id_fkey;
+
+-- summary length option the summary was generated with
+alter table scisummarize.summaries add column length varchar(16);
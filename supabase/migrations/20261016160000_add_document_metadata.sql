@@ -0,0 +1,24 @@
+/*
+ * Migration: Store PDF metadata of uploaded documents
+ * Purpose: Uploads are registered in scisummarize.documents together with the
+ *          metadata read from the PDF once at upload time, so page views and
+ *          exports no longer open the file
+ * Tables Modified: documents
+ * Changes:
+ *   - add author, page_count, file_size_bytes and content_hash columns
+ *   - drop the foreign key documents.user_id -> users.id (see below)
+ * Special considerations:
+ *   - users log in through Supabase Auth and are not rows of scisummarize.users,
+ *     so the foreign key would reject every upload
+ *   - no data is modified or deleted
+ */
+
+-- users come from supabase auth; user_id keeps the auth user id without a foreign key
+alter table scisummarize.documents drop constraint if exists documents_user_id_fkey;
+
+-- metadata read from the pdf at upload time
+alter table scisummarize.documents add column author varchar(255);
+alter table scisummarize.documents add column page_count integer;
+alter table scisummarize.documents add column file_size_bytes bigint;
+-- sha-256 of the file bytes, as used by the text and summary caches
+alter table scisummarize.documents add column content_hash varchar(64);
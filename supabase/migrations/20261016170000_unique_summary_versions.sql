@@ -0,0 +1,37 @@
+/*
+ * Migration: Make summary version numbers unique per document
+ * Purpose: The application allocates the next version as max(version) + 1;
+ *          two summaries saved concurrently for the same document could get
+ *          the same number. The unique constraint turns that race into a
+ *          conflict the application retries with a fresh number
+ * Tables Modified: summaries
+ * Changes:
+ *   - renumber versions of documents that already have duplicates
+ *   - add unique (document_id, version)
+ * Special considerations:
+ *   - only documents with duplicate versions are renumbered (1..n in the
+ *     order of version, created_at); other rows are not modified
+ *   - the constraint's index also serves the max(version) lookup, so no
+ *     separate index is added
+ */
+
+-- renumber documents that already have duplicate versions
+with duplicated as (
+    select document_id
+    from scisummarize.summaries
+    group by document_id, version
+    having count(*) > 1
+),
+ranked as (
+    select id, row_number() over (partition by document_id order by version, created_at, id) as new_version
+    from scisummarize.summaries
+    where document_id in (select document_id from duplicated)
+)
+update scisummarize.summaries s
+set version = ranked.new_version
+from ranked
+where s.id = ranked.id;
+
+-- one summary per document and version
+alter table scisummarize.summaries
+    add constraint summaries_document_id_version_key unique (document_id, version);
@@ -0,0 +1,14 @@
+/*
+ * Migration: Add trace context to summary_jobs
+ * Purpose: A job claimed by a worker on another node continues the trace and
+ *          the profile of the request that submitted it
+ * Tables Modified: summary_jobs (new nullable columns, no data changes)
+ * Notes:
+ *   - null for jobs submitted outside a traced or profiled request
+ */
+
+-- W3C traceparent of the submitting request's span
+alter table scisummarize.summary_jobs add column traceparent text;
+
+-- profile ID of the sampled request; the worker saves the job's profile under it
+alter table scisummarize.summary_jobs add column profile_id text;